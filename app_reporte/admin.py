@@ -2,7 +2,7 @@ from django.contrib import admin
 
 
 # Register your models here.
-from .models import PlanPPDA,Region,Ciudad,Comuna,OrganismoResponsable,Medida,MedioVerificacion,Reporte
+from .models import PlanPPDA,Region,Ciudad,Comuna,OrganismoResponsable,Medida,MedioVerificacion,Reporte,ReporteArchivado
 
 # Register your models here.
 admin.site.register(PlanPPDA)
@@ -13,11 +13,27 @@ admin.site.register(OrganismoResponsable)
 admin.site.register(Medida)
 admin.site.register(MedioVerificacion)
 admin.site.register(Reporte)
+admin.site.register(ReporteArchivado)
 from django.contrib import admin
 from .models import HistorialEstadoReporte
 
 @admin.register(HistorialEstadoReporte)
 class HistorialEstadoReporteAdmin(admin.ModelAdmin):
-    list_display = ('reporte', 'estado_anterior', 'estado_nuevo', 'actualizado_por', 'fecha')
+    list_display = ('reporte', 'estado_anterior', 'estado_nuevo', 'created_by', 'fecha')
     list_filter = ('estado_nuevo', 'fecha')
-    search_fields = ('reporte__id', 'actualizado_por')
+    search_fields = ('reporte__id', 'created_by__username')
+    list_select_related = ('reporte__organismo', 'reporte__medida', 'created_by')
+
+
+from .models import Tarea, TareaProgramada
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nombre', 'cola', 'prioridad', 'estado', 'intentos', 'ejecutar_desde', 'terminada_en')
+    list_filter = ('estado', 'cola', 'nombre')
+    list_select_related = ('creada_por',)
+
+@admin.register(TareaProgramada)
+class TareaProgramadaAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'tarea', 'intervalo_segundos', 'activa', 'proxima_ejecucion', 'ultima_ejecucion')
+    list_editable = ('activa',)
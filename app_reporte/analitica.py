@@ -0,0 +1,167 @@
+"""
+Analítica de tiempos de revisión a partir de `HistorialEstadoReporte`.
+
+Cada fila del historial cuyo estado anterior es "pendiente" representa la
+acción de un revisor. El tiempo en pendiente es la diferencia entre esa fila y
+el cambio anterior del mismo reporte (LAG sobre el historial) o, si no lo hay,
+la creación del reporte. Un reenvío que vuelve el reporte a pendiente reinicia
+el conteo.
+
+Los resultados se agregan por mes y por organismo, plan y revisor y se guardan
+en `MetricaRevision`, que las vistas leen sin recalcular.
+"""
+import statistics
+from collections import defaultdict
+from datetime import datetime, time
+
+from django.db import connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import Lag
+from django.utils import timezone
+
+from .models import EstadoReporteField, HistorialEstadoReporte, MetricaRevision, OrganismoResponsable, PlanPPDA
+
+ESTADO_PENDIENTE = 'pendiente'
+
+# Bits de GROUPING(organismo_id, plan_id, revisor): 1 = columna no agrupada
+DIMENSION_POR_AGRUPACION = {
+    0b011: 'organismo',
+    0b101: 'plan',
+    0b110: 'revisor',
+    0b111: 'total',
+}
+
+SQL_METRICAS_POSTGRES = """
+WITH intervalos AS (
+    SELECT h.reporte_id,
+           COALESCE(u.username, %s) AS revisor,
+           h.fecha,
+           h.estado_anterior,
+           h.estado_nuevo,
+           LAG(h.fecha) OVER (PARTITION BY h.reporte_id ORDER BY h.fecha, h.id) AS fecha_previa
+    FROM app_reporte_historialestadoreporte h
+    LEFT JOIN auth_user u ON u.id = h.created_by_id
+), revisiones AS (
+    SELECT r.organismo_id,
+           m.plan_id,
+           i.revisor,
+           date_trunc('month', i.fecha)::date AS mes,
+           EXTRACT(EPOCH FROM i.fecha - COALESCE(i.fecha_previa, r.created_at, r.fecha_envio::timestamptz)) AS segundos
+    FROM intervalos i
+    JOIN app_reporte_reporte r ON r.id = i.reporte_id
+    JOIN app_reporte_medida m ON m.id = r.medida_id
+    WHERE i.estado_anterior = %s AND i.estado_nuevo <> %s
+)
+SELECT mes,
+       organismo_id,
+       plan_id,
+       revisor,
+       GROUPING(organismo_id, plan_id, revisor) AS agrupacion,
+       COUNT(*),
+       AVG(segundos),
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY segundos),
+       percentile_cont(0.9) WITHIN GROUP (ORDER BY segundos),
+       percentile_cont(0.95) WITHIN GROUP (ORDER BY segundos)
+FROM revisiones
+GROUP BY GROUPING SETS ((mes, organismo_id), (mes, plan_id), (mes, revisor), (mes))
+"""
+
+
+def _metricas_postgres():
+    """Calcula las métricas en una sola consulta con LAG, percentile_cont y GROUPING SETS."""
+    with connection.cursor() as cursor:
+        # Los estados del historial se guardan como códigos enteros
+        codigo_pendiente = EstadoReporteField.CODIGOS[ESTADO_PENDIENTE]
+        cursor.execute(SQL_METRICAS_POSTGRES, [
+            HistorialEstadoReporte.USUARIO_DESCONOCIDO, codigo_pendiente, codigo_pendiente,
+        ])
+        for mes, organismo_id, plan_id, revisor, agrupacion, total, promedio, p50, p90, p95 in cursor.fetchall():
+            dimension = DIMENSION_POR_AGRUPACION[agrupacion]
+            clave = {'organismo': organismo_id, 'plan': plan_id, 'revisor': revisor, 'total': ''}[dimension]
+            yield dimension, clave, mes, total, promedio, p50, p90, p95
+
+
+def _percentil(valores_ordenados, fraccion):
+    """Percentil con interpolación lineal, equivalente a percentile_cont."""
+    posicion = (len(valores_ordenados) - 1) * fraccion
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    peso = posicion - inferior
+    return valores_ordenados[inferior] * (1 - peso) + valores_ordenados[superior] * peso
+
+
+def _metricas_genericas():
+    """
+    Alternativa para motores sin percentile_cont ni GROUPING SETS: los intervalos
+    se obtienen igualmente con LAG en SQL y solo la agregación se hace en Python.
+    """
+    historial = (
+        HistorialEstadoReporte.objects
+        .annotate(fecha_previa=Window(
+            Lag('fecha'),
+            partition_by=[F('reporte_id')],
+            order_by=[F('fecha').asc(), F('id').asc()],
+        ))
+        .values_list(
+            'estado_anterior', 'estado_nuevo', 'created_by__username', 'fecha', 'fecha_previa',
+            'reporte__organismo_id', 'reporte__medida__plan_id',
+            'reporte__created_at', 'reporte__fecha_envio',
+        )
+    )
+    grupos = defaultdict(list)
+    for anterior, nuevo, revisor, fecha, previa, organismo_id, plan_id, creado, enviado in historial:
+        if anterior != ESTADO_PENDIENTE or nuevo == ESTADO_PENDIENTE:
+            continue
+        revisor = revisor or HistorialEstadoReporte.USUARIO_DESCONOCIDO
+        inicio = previa or creado or timezone.make_aware(datetime.combine(enviado, time.min))
+        segundos = (fecha - inicio).total_seconds()
+        mes = timezone.localtime(fecha).date().replace(day=1)
+        for dimension, clave in (('organismo', organismo_id), ('plan', plan_id), ('revisor', revisor), ('total', '')):
+            grupos[(dimension, clave, mes)].append(segundos)
+
+    for (dimension, clave, mes), valores in grupos.items():
+        valores.sort()
+        yield (dimension, clave, mes, len(valores), statistics.fmean(valores),
+               _percentil(valores, 0.5), _percentil(valores, 0.9), _percentil(valores, 0.95))
+
+
+def calcular_metricas_revision():
+    if connection.vendor == 'postgresql':
+        return list(_metricas_postgres())
+    return list(_metricas_genericas())
+
+
+@transaction.atomic
+def refrescar_metricas_revision():
+    """
+    Recalcula y reemplaza el contenido de `MetricaRevision`.
+    Retorna la cantidad de filas materializadas.
+    """
+    filas = calcular_metricas_revision()
+    organismos = OrganismoResponsable.objects.in_bulk(
+        {clave for dimension, clave, *_ in filas if dimension == 'organismo'}
+    )
+    planes = PlanPPDA.objects.in_bulk(
+        {clave for dimension, clave, *_ in filas if dimension == 'plan'}
+    )
+    etiquetas = {'organismo': organismos, 'plan': planes}
+
+    calculado_en = timezone.now()
+    metricas = []
+    for dimension, clave, mes, total, promedio, p50, p90, p95 in filas:
+        objeto = etiquetas.get(dimension, {}).get(clave)
+        metricas.append(MetricaRevision(
+            dimension=dimension,
+            clave='' if clave is None else str(clave),
+            etiqueta=str(objeto) if objeto else ('' if clave is None else str(clave)),
+            mes=mes,
+            revisiones=total,
+            promedio_segundos=promedio,
+            p50_segundos=p50,
+            p90_segundos=p90,
+            p95_segundos=p95,
+            calculado_en=calculado_en,
+        ))
+    MetricaRevision.objects.all().delete()
+    MetricaRevision.objects.bulk_create(metricas, batch_size=1000)
+    return len(metricas)
@@ -0,0 +1,119 @@
+"""
+Archivo de reportes cerrados.
+
+Los reportes aprobados o rechazados con fecha de envío anterior al horizonte
+(`ARCHIVO_HORIZONTE_DIAS`) se mueven por lotes a `ReporteArchivado`, junto con
+su historial de estados, y se eliminan de las tablas de uso diario. Siguen
+disponibles en el detalle del reporte y en su historial. Los contadores por estado
+incluyen los reportes archivados, por lo que archivar no los modifica.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from .models import HistorialEstadoReporte, Reporte, ReporteArchivado
+from .serializers import HistorialEstadoReporteSerializer
+
+ESTADOS_CERRADOS = ('aprobado', 'rechazado')
+
+TABLAS = {
+    'reportes': Reporte._meta.db_table,
+    'historial': HistorialEstadoReporte._meta.db_table,
+    'archivo': ReporteArchivado._meta.db_table,
+}
+
+
+def fecha_limite(horizonte_dias=None):
+    if horizonte_dias is None:
+        horizonte_dias = settings.ARCHIVO_HORIZONTE_DIAS
+    return now().date() - timedelta(days=horizonte_dias)
+
+
+def candidatos(limite_fecha):
+    return Reporte.objects.filter(estado__in=ESTADOS_CERRADOS, fecha_envio__lt=limite_fecha)
+
+
+def _archivar_lote(ids):
+    """Archiva los reportes indicados que sigan cerrados. Retorna cuántos se archivaron."""
+    with transaction.atomic():
+        # Se omiten los reportes bloqueados por otra transacción; quedan para el próximo lote
+        reportes = list(
+            Reporte.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=ids, estado__in=ESTADOS_CERRADOS)
+        )
+        if not reportes:
+            return 0
+        ids = [r.pk for r in reportes]
+        historiales = {pk: [] for pk in ids}
+        entradas = (
+            HistorialEstadoReporte.objects.filter(reporte_id__in=ids)
+            .select_related('created_by').order_by('reporte_id', 'fecha', 'id')
+        )
+        for entrada in HistorialEstadoReporteSerializer(entradas, many=True).data:
+            historiales[entrada['reporte']].append(entrada)
+
+        ReporteArchivado.objects.bulk_create([
+            ReporteArchivado(
+                id=r.pk, medida_id=r.medida_id, organismo_id=r.organismo_id,
+                medio_verificacion_id=r.medio_verificacion_id, fecha_envio=r.fecha_envio,
+                descripcion=r.descripcion, archivo=r.archivo.name or '', estado=r.estado,
+                created_at=r.created_at, updated_at=r.updated_at,
+                created_by_id=r.created_by_id, updated_by_id=r.updated_by_id,
+                historial=historiales[r.pk],
+            )
+            for r in reportes
+        ])
+        HistorialEstadoReporte.objects.filter(reporte_id__in=ids).delete()
+        Reporte.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archivar_reportes(horizonte_dias=None, lote=500, maximo=None):
+    """
+    Archiva por lotes los reportes cerrados anteriores al horizonte. Cada lote es
+    una transacción corta. Retorna la cantidad de reportes archivados.
+    """
+    limite_fecha = fecha_limite(horizonte_dias)
+    total = 0
+    ultimo_id = 0
+    while maximo is None or total < maximo:
+        tamano = lote if maximo is None else min(lote, maximo - total)
+        ids = list(
+            candidatos(limite_fecha).filter(pk__gt=ultimo_id).order_by('pk').values_list('pk', flat=True)[:tamano]
+        )
+        if not ids:
+            break
+        total += _archivar_lote(ids)
+        ultimo_id = ids[-1]
+    return total
+
+
+def tamanos_tablas():
+    """
+    Tamaño en bytes (con índices y TOAST) de las tablas involucradas, sumando las
+    particiones del historial. Vacío fuera de PostgreSQL.
+    """
+    if connection.vendor != 'postgresql':
+        return {}
+    tamanos = {}
+    with connection.cursor() as cursor:
+        for clave, tabla in TABLAS.items():
+            # pg_partition_tree no retorna filas para tablas sin particiones
+            cursor.execute(
+                "SELECT COALESCE(SUM(pg_total_relation_size(relid)), pg_total_relation_size(%s::regclass))::bigint "
+                "FROM pg_partition_tree(%s)", [tabla, tabla]
+            )
+            tamanos[clave] = cursor.fetchone()[0]
+    return tamanos
+
+
+def vacuum():
+    """VACUUM ANALYZE de las tablas de uso diario para que el espacio liberado se reutilice."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for clave in ('reportes', 'historial'):
+            cursor.execute(f"VACUUM ANALYZE {TABLAS[clave]}")
+
@@ -0,0 +1,91 @@
+"""
+Índice de prefijos en memoria para autocompletar nombres territoriales y de organismos.
+
+Por cada tipo se mantienen dos arreglos ordenados de claves normalizadas
+(minúsculas, sin tildes): uno con el nombre completo y otro con cada palabra
+interior ("viña del mar" -> "del mar", "mar"). Una consulta hace dos búsquedas
+binarias y recorre solo las entradas que comparten el prefijo, sin tocar la base
+de datos. Los índices se construyen al primer uso y se reconstruyen cuando
+cambia la generación de su modelo en la caché compartida (ver similitud.py).
+"""
+import threading
+from bisect import bisect_left
+
+from .models import Ciudad, Comuna, OrganismoResponsable, Region
+from .similitud import generacion, normalizar_texto
+
+# tipo -> (modelo, campo del padre)
+TIPOS = {
+    'region': (Region, None),
+    'ciudad': (Ciudad, 'region_id'),
+    'comuna': (Comuna, 'ciudad_id'),
+    'organismo': (OrganismoResponsable, None),
+}
+
+_indices = {}
+_candado = threading.Lock()
+
+
+class IndicePrefijos:
+    def __init__(self, filas):
+        """`filas`: iterable de (id, nombre, padre_id)."""
+        self.elementos = {}
+        inicio, palabras = [], []
+        for pk, nombre, padre in filas:
+            self.elementos[pk] = (nombre, padre)
+            clave = ' '.join(normalizar_texto(nombre).split())
+            inicio.append((clave, pk))
+            partes = clave.split(' ')
+            for i in range(1, len(partes)):
+                palabras.append((' '.join(partes[i:]), pk))
+        inicio.sort()
+        palabras.sort()
+        self.claves = ([c for c, _ in inicio], [c for c, _ in palabras])
+        self.ids = ([pk for _, pk in inicio], [pk for _, pk in palabras])
+
+    def buscar(self, texto, limite=10):
+        """
+        Retorna hasta `limite` tuplas (id, nombre, padre_id): primero los nombres que
+        comienzan con el texto y luego los que tienen una palabra que comienza con él.
+        """
+        prefijo = ' '.join(normalizar_texto(texto).split())
+        if not prefijo:
+            return []
+        encontrados = []
+        vistos = set()
+        for claves, ids in zip(self.claves, self.ids):
+            i = bisect_left(claves, prefijo)
+            while i < len(claves) and claves[i].startswith(prefijo) and len(encontrados) < limite:
+                pk = ids[i]
+                if pk not in vistos:
+                    vistos.add(pk)
+                    encontrados.append((pk, *self.elementos[pk]))
+                i += 1
+        return encontrados
+
+
+def indice_para(tipo):
+    modelo, campo_padre = TIPOS[tipo]
+    vigente = generacion(modelo)
+    guardado = _indices.get(tipo)
+    if guardado is None or guardado[0] != vigente:
+        with _candado:
+            guardado = _indices.get(tipo)
+            if guardado is None or guardado[0] != vigente:
+                campos = ('pk', 'nombre', campo_padre) if campo_padre else ('pk', 'nombre')
+                filas = modelo.objects.values_list(*campos)
+                if not campo_padre:
+                    filas = ((pk, nombre, None) for pk, nombre in filas)
+                guardado = (vigente, IndicePrefijos(filas))
+                _indices[tipo] = guardado
+    return guardado[1]
+
+
+def autocompletar(texto, tipos, limite=10):
+    resultado = []
+    for tipo in tipos:
+        for pk, nombre, padre in indice_para(tipo).buscar(texto, limite - len(resultado)):
+            resultado.append({'tipo': tipo, 'id': pk, 'nombre': nombre, 'padre': padre})
+        if len(resultado) >= limite:
+            break
+    return resultado
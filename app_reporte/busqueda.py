@@ -0,0 +1,89 @@
+"""
+Búsqueda de texto completo en español sobre medidas y reportes.
+
+En PostgreSQL cada fila guarda su `tsvector` en la columna `busqueda` (con índice
+GIN), calculado con la configuración `es_busqueda`: una copia de `spanish` que,
+si la extensión unaccent está disponible, elimina tildes antes de aplicar el
+stemmer. Las señales de `app_reporte.signals` mantienen la columna al guardar.
+
+En otros motores se usa una alternativa funcional con `icontains`.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Q
+
+from .models import Medida, Reporte
+
+CONFIGURACION_BUSQUEDA = 'es_busqueda'
+
+CAMPOS_MEDIDA = (
+    ('nombre_corto', 'A'),
+    ('referencia_pda', 'A'),
+    ('descripcion', 'B'),
+    ('indicador', 'C'),
+    ('formula_calculo', 'C'),
+)
+CAMPOS_REPORTE = (
+    ('descripcion', 'A'),
+)
+
+
+def busqueda_disponible():
+    return connection.vendor == 'postgresql'
+
+
+def vector(campos):
+    """Expresión tsvector ponderada para los campos indicados."""
+    vectores = [SearchVector(campo, weight=peso, config=CONFIGURACION_BUSQUEDA) for campo, peso in campos]
+    resultado = vectores[0]
+    for v in vectores[1:]:
+        resultado = resultado + v
+    return resultado
+
+
+def actualizar_vector_medida(ids):
+    if busqueda_disponible():
+        Medida.objects.filter(pk__in=ids).update(busqueda=vector(CAMPOS_MEDIDA))
+
+
+def actualizar_vector_reporte(ids):
+    if busqueda_disponible():
+        Reporte.objects.filter(pk__in=ids).update(busqueda=vector(CAMPOS_REPORTE))
+
+
+def reindexar():
+    """Recalcula todos los vectores en un UPDATE por tabla."""
+    if not busqueda_disponible():
+        return 0, 0
+    return (
+        Medida.objects.update(busqueda=vector(CAMPOS_MEDIDA)),
+        Reporte.objects.update(busqueda=vector(CAMPOS_REPORTE)),
+    )
+
+
+def buscar(queryset, texto, campos):
+    """
+    Filtra `queryset` por `texto` y lo ordena por relevancia (anotación `rango`).
+    """
+    if busqueda_disponible():
+        consulta = SearchQuery(texto, config=CONFIGURACION_BUSQUEDA, search_type='websearch')
+        return (
+            queryset
+            .filter(busqueda=consulta)
+            .annotate(rango=SearchRank(F('busqueda'), consulta))
+            .order_by('-rango', 'pk')
+        )
+
+    # Alternativa sin tsvector: todas las palabras deben aparecer en algún campo
+    for palabra in texto.split():
+        condicion = Q()
+        for campo, _ in campos:
+            condicion |= Q(**{f'{campo}__icontains': palabra})
+        queryset = queryset.filter(condicion)
+    resultados = list(queryset)
+    palabras = [p.lower() for p in texto.split()]
+    for obj in resultados:
+        textos = [(getattr(obj, campo) or '').lower() for campo, _ in campos]
+        obj.rango = float(sum(t.count(p) for t in textos for p in palabras))
+    resultados.sort(key=lambda obj: (-obj.rango, obj.pk))
+    return resultados
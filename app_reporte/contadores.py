@@ -0,0 +1,105 @@
+"""
+Contadores desnormalizados de reportes por estado.
+
+`Medida` y `OrganismoResponsable` guardan cuántos reportes tienen en cada estado
+(`reportes_pendientes`, `reportes_aprobados`, `reportes_rechazados`) para que los
+frontends muestren insignias sin ejecutar un COUNT por elemento.
+
+Las vistas que escriben reportes llaman a estas funciones dentro de la misma
+transacción que la escritura; `recalcular_contadores` repara cualquier desvío.
+Los reportes archivados (`ReporteArchivado`) siguen contando en su estado.
+"""
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Medida, OrganismoResponsable, Reporte, ReporteArchivado
+
+CAMPOS_CONTADOR = {
+    'pendiente': 'reportes_pendientes',
+    'aprobado': 'reportes_aprobados',
+    'rechazado': 'reportes_rechazados',
+}
+
+
+def ajustar_contadores(medida_id, organismo_id, estado, delta):
+    """
+    Suma `delta` (positivo o negativo) al contador del `estado` indicado en la
+    medida y el organismo. Se usa F() para que el incremento sea atómico en la BD.
+    """
+    campo = CAMPOS_CONTADOR.get(estado)
+    if not campo or not delta:
+        return
+    Medida.objects.filter(pk=medida_id).update(**{campo: F(campo) + delta})
+    OrganismoResponsable.objects.filter(pk=organismo_id).update(**{campo: F(campo) + delta})
+
+
+def registrar_creacion(reporte):
+    ajustar_contadores(reporte.medida_id, reporte.organismo_id, reporte.estado, 1)
+
+
+def registrar_eliminacion(reporte):
+    ajustar_contadores(reporte.medida_id, reporte.organismo_id, reporte.estado, -1)
+
+
+def eliminar_reporte(reporte):
+    """
+    Elimina el reporte y descuenta sus contadores, con la fila bloqueada: de dos
+    eliminaciones concurrentes solo la primera descuenta. Retorna False si el
+    reporte ya no existía.
+    """
+    with transaction.atomic():
+        # Se descuenta según el estado vigente, no el de una instancia leída antes
+        actual = Reporte.objects.select_for_update().filter(pk=reporte.pk).first()
+        if actual is None:
+            return False
+        _, eliminados = actual.delete()
+        if not eliminados.get(Reporte._meta.label):
+            return False
+        registrar_eliminacion(actual)
+    return True
+
+
+def registrar_cambio(anterior, reporte):
+    """
+    Ajusta los contadores cuando un reporte cambia de estado, medida u organismo.
+    `anterior` es una tupla (medida_id, organismo_id, estado) tomada antes de guardar.
+    """
+    actual = (reporte.medida_id, reporte.organismo_id, reporte.estado)
+    if anterior == actual:
+        return
+    ajustar_contadores(*anterior, -1)
+    ajustar_contadores(*actual, 1)
+
+
+def _conteo(modelo, campo_relacion, estado):
+    """Subconsulta escalar con la cantidad de filas de `modelo` en `estado` para la fila externa."""
+    reportes = (
+        modelo.objects
+        .filter(**{campo_relacion: OuterRef('pk')}, estado=estado)
+        .order_by()
+        .values(campo_relacion)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(reportes, output_field=IntegerField()), Value(0))
+
+
+def _conteo_total(campo_relacion, estado):
+    return _conteo(Reporte, campo_relacion, estado) + _conteo(ReporteArchivado, campo_relacion, estado)
+
+
+@transaction.atomic
+def recalcular_contadores():
+    """
+    Recalcula todos los contadores en bloque: un UPDATE por modelo con
+    subconsultas correlacionadas, sin recorrer filas en Python.
+    Retorna la cantidad de medidas y organismos actualizados.
+    """
+    medidas = Medida.objects.update(**{
+        campo: _conteo_total('medida', estado) for estado, campo in CAMPOS_CONTADOR.items()
+    })
+    organismos = OrganismoResponsable.objects.update(**{
+        campo: _conteo_total('organismo', estado) for estado, campo in CAMPOS_CONTADOR.items()
+    })
+    return medidas, organismos
@@ -0,0 +1,220 @@
+"""
+Publicación y suscripción de eventos de reportes.
+
+`ReporteEstadoUpdateView` publica cada cambio de estado, al confirmar la
+transacción, en el canal del organismo del reporte (`organismo:<id>`) y en el
+canal `todos`. El flujo SSE `/api/reportes/eventos/` suscribe a cada cliente a
+los canales que puede ver.
+
+El bus se elige con `EVENTOS_BUS`:
+- `BusLocal` (por defecto) reparte los eventos dentro del proceso. Sirve con un
+  solo proceso de servidor y en pruebas.
+- `BusPostgres` los envía con `pg_notify` y cada proceso los recibe con `LISTEN`
+  en un hilo propio, de modo que funcionan con varios workers sin otro broker.
+
+Las suscripciones tienen una cola acotada: si un cliente no consume, se
+descartan sus eventos más antiguos. Al reconectar, el cliente recupera lo
+perdido con `Last-Event-ID` (ver `eventos_pendientes`).
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.module_loading import import_string
+
+from .models import HistorialEstadoReporte
+
+logger = logging.getLogger(__name__)
+
+CANAL_TODOS = 'todos'
+TAMANO_COLA = 100
+# Entradas del historial por consulta al recuperar lo perdido
+PAGINA_PENDIENTES = 100
+
+
+def canal_organismo(organismo_id):
+    return f'organismo:{organismo_id}'
+
+
+class Suscripcion:
+    """Cola de eventos de un cliente, atendida desde su event loop."""
+
+    def __init__(self, bus, canales):
+        self.bus = bus
+        self.canales = tuple(canales)
+        self.loop = asyncio.get_running_loop()
+        self.cola = asyncio.Queue(maxsize=TAMANO_COLA)
+
+    def entregar(self, mensaje):
+        """Se puede llamar desde cualquier hilo."""
+        self.loop.call_soon_threadsafe(self._poner, mensaje)
+
+    def _poner(self, mensaje):
+        if self.cola.full():
+            self.cola.get_nowait()
+        self.cola.put_nowait(mensaje)
+
+    async def siguiente(self, timeout=None):
+        """Próximo evento, o None si pasan `timeout` segundos sin eventos."""
+        try:
+            return await asyncio.wait_for(self.cola.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def cerrar(self):
+        self.bus.desuscribir(self)
+
+
+class BusLocal:
+    """Bus dentro del proceso."""
+
+    def __init__(self):
+        self._suscripciones = {}
+        self._lock = threading.Lock()
+
+    def suscribir(self, canales):
+        """Crea una suscripción; debe llamarse desde el event loop que la consumirá."""
+        suscripcion = Suscripcion(self, canales)
+        with self._lock:
+            for canal in suscripcion.canales:
+                self._suscripciones.setdefault(canal, set()).add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion):
+        with self._lock:
+            for canal in suscripcion.canales:
+                suscritos = self._suscripciones.get(canal)
+                if suscritos:
+                    suscritos.discard(suscripcion)
+                    if not suscritos:
+                        del self._suscripciones[canal]
+
+    def publicar(self, canal, mensaje):
+        self.entregar_local(canal, mensaje)
+
+    def entregar_local(self, canal, mensaje):
+        with self._lock:
+            suscritos = list(self._suscripciones.get(canal, ()))
+        for suscripcion in suscritos:
+            try:
+                suscripcion.entregar(mensaje)
+            except RuntimeError:
+                # El event loop del cliente ya se cerró
+                self.desuscribir(suscripcion)
+
+
+class BusPostgres(BusLocal):
+    """Bus entre procesos con LISTEN/NOTIFY de PostgreSQL."""
+
+    CANAL_PG = 'sna_eventos'
+
+    def __init__(self):
+        super().__init__()
+        self._escucha = None
+        # Se activa cuando la conexión ya ejecutó LISTEN
+        self.escuchando = threading.Event()
+        self._detener = threading.Event()
+
+    def suscribir(self, canales):
+        self._iniciar_escucha()
+        return super().suscribir(canales)
+
+    def publicar(self, canal, mensaje):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.CANAL_PG, json.dumps({'canal': canal, 'mensaje': mensaje})])
+
+    def _iniciar_escucha(self):
+        with self._lock:
+            if self._escucha is None or not self._escucha.is_alive():
+                self._escucha = threading.Thread(target=self._escuchar, name='eventos-listen', daemon=True)
+                self._escucha.start()
+
+    def _escuchar(self):
+        # Conexión propia en autocommit: las notificaciones llegan fuera de transacciones
+        base = connections['default']
+        conexion = base.get_new_connection(base.get_connection_params())
+        conexion.autocommit = True
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.CANAL_PG}")
+            self.escuchando.set()
+            while not self._detener.is_set():
+                if select.select([conexion], [], [], 1) == ([], [], []):
+                    continue
+                conexion.poll()
+                while conexion.notifies:
+                    notificacion = conexion.notifies.pop(0)
+                    try:
+                        datos = json.loads(notificacion.payload)
+                    except ValueError:
+                        logger.warning("Notificación de eventos inválida: %r", notificacion.payload)
+                        continue
+                    self.entregar_local(datos['canal'], datos['mensaje'])
+        except Exception:
+            logger.exception("Se detuvo la escucha de eventos; se reinicia con la próxima suscripción")
+        finally:
+            self.escuchando.clear()
+            conexion.close()
+
+    def detener(self):
+        """Termina el hilo de escucha (por ejemplo, al apagar el proceso o en pruebas)."""
+        self._detener.set()
+        if self._escucha is not None:
+            self._escucha.join()
+        self._detener.clear()
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def obtener_bus():
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = import_string(settings.EVENTOS_BUS)()
+        return _bus
+
+
+def evento_cambio_estado(entrada, reporte):
+    """Mensaje publicado por cada entrada del historial de estados."""
+    return {
+        'id': entrada.id,
+        'reporte': reporte.id,
+        'organismo': reporte.organismo_id,
+        'medida': reporte.medida_id,
+        'estado_anterior': entrada.estado_anterior,
+        'estado_nuevo': entrada.estado_nuevo,
+        'fecha': entrada.fecha.isoformat(),
+    }
+
+
+def publicar_cambio_estado(entrada, reporte):
+    mensaje = evento_cambio_estado(entrada, reporte)
+    bus = obtener_bus()
+    for canal in (canal_organismo(reporte.organismo_id), CANAL_TODOS):
+        try:
+            bus.publicar(canal, mensaje)
+        except Exception:
+            # Un fallo del bus no afecta al cambio ya confirmado; el cliente lo recupera al reconectar
+            logger.exception("No se pudo publicar el cambio de estado del reporte %s", reporte.id)
+
+
+def eventos_pendientes(ultimo_id, organismos=None, limite=PAGINA_PENDIENTES):
+    """
+    Cambios de estado posteriores a la entrada `ultimo_id` del historial (el
+    `Last-Event-ID` del cliente), limitados a `organismos` (None: todos). Entrega
+    a lo más `limite`; quien necesite todos pide la página siguiente desde el ID
+    del último.
+    """
+    entradas = (
+        HistorialEstadoReporte.objects.filter(id__gt=ultimo_id)
+        .select_related('reporte').order_by('id')
+    )
+    if organismos is not None:
+        entradas = entradas.filter(reporte__organismo_id__in=organismos)
+    return [evento_cambio_estado(entrada, entrada.reporte) for entrada in entradas[:limite]]
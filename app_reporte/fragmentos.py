@@ -0,0 +1,63 @@
+"""
+Caché de fragmentos serializados de reportes.
+
+Cada reporte se guarda con su representación completa de `ReporteSerializer`
+bajo una clave con su ID y `updated_at`. Toda modificación con save() cambia
+`updated_at`, y con ello la clave, así que no hay que invalidar nada: los
+fragmentos viejos dejan de pedirse y expiran tras `FRAGMENTOS_REPORTE_SEGUNDOS`.
+Las escrituras con `update()` sobre campos que expone el serializer deben fijar
+`updated_at` (como hace reenvio.py).
+
+El listado y el detalle consultan solo (id, updated_at), piden los fragmentos de
+toda la página en una lectura (`get_many`) y serializan solo los que faltan, con
+la lectura rápida de lectura.py. Los reportes sin `updated_at` (anteriores a ese
+campo) se serializan siempre.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from . import lectura
+from .models import Reporte
+from .serializers import ReporteSerializer
+
+# Cambiar al modificar ReporteSerializer para no servir fragmentos con el formato anterior
+VERSION = 1
+
+
+def clave(id_reporte, updated_at):
+    return f'reporte:fragmento:v{VERSION}:{id_reporte}:{updated_at.isoformat()}'
+
+
+def obtener(filas):
+    """
+    Representaciones de los reportes `filas` ((id, updated_at), por ejemplo una
+    página de `values_list('id', 'updated_at')`) en el mismo orden. Se omiten los
+    que ya no existen.
+    """
+    filas = list(filas)
+    claves = {id_reporte: clave(id_reporte, updated_at) for id_reporte, updated_at in filas if updated_at}
+    encontrados = cache.get_many(claves.values()) if claves else {}
+    fragmentos = {
+        id_reporte: encontrados[claves[id_reporte]] for id_reporte, _ in filas if claves.get(id_reporte) in encontrados
+    }
+
+    faltantes = [id_reporte for id_reporte, _ in filas if id_reporte not in fragmentos]
+    if faltantes:
+        lector = lectura.lector(ReporteSerializer)
+        crudas = list(lector.valores(Reporte.objects.filter(pk__in=faltantes)))
+        nuevos = {}
+        for cruda, fragmento in zip(crudas, lector.convertir(crudas)):
+            fragmentos[cruda['id']] = fragmento
+            # Con el updated_at leído ahora, por si cambió desde la consulta de la página
+            if cruda['updated_at']:
+                nuevos[clave(cruda['id'], cruda['updated_at'])] = fragmento
+        if nuevos:
+            cache.set_many(nuevos, settings.FRAGMENTOS_REPORTE_SEGUNDOS)
+    return [fragmentos[id_reporte] for id_reporte, _ in filas if id_reporte in fragmentos]
+
+
+def proyectar(fragmentos, campos):
+    """Limita los fragmentos a `campos` (`?fields=`), en el orden del serializer."""
+    if campos is None:
+        return fragmentos
+    return [{nombre: valor for nombre, valor in fragmento.items() if nombre in campos} for fragmento in fragmentos]
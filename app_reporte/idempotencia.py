@@ -0,0 +1,123 @@
+"""
+Soporte de la cabecera `Idempotency-Key` en vistas que escriben.
+
+La primera solicitud con una clave la reserva (`ClaveIdempotencia` en curso) antes
+de ejecutar la vista y al terminar guarda el código, el cuerpo y las cabeceras de
+la respuesta. Los reintentos con la misma clave reciben esa respuesta sin ejecutar
+la vista ni leer el cuerpo de la solicitud (por ejemplo, un archivo subido), hasta
+`IDEMPOTENCIA_TTL_HORAS`. Un reintento mientras la primera sigue en curso se
+rechaza con 409 a partir de la restricción única, sin esperar ni bloquear.
+
+Las claves son por usuario. Las respuestas 5xx y las excepciones liberan la clave
+para que el cliente pueda reintentar.
+"""
+import functools
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import ClaveIdempotencia
+
+CABECERA = 'Idempotency-Key'
+CABECERA_REPRODUCIDA = 'Idempotency-Replayed'
+LARGO_MAXIMO = 255
+
+
+def _reservar(request, clave):
+    """Retorna (registro, reservada). Si la clave ya existe, `reservada` es False."""
+    ahora = now()
+    datos = {
+        'metodo': request.method,
+        'ruta': request.path,
+        'estado': 'en_curso',
+        'codigo_respuesta': None,
+        'cuerpo': None,
+        'cabeceras': {},
+        # Si el proceso muere a mitad de camino la clave se libera sola
+        'expira_en': ahora + timedelta(seconds=settings.IDEMPOTENCIA_EN_CURSO_SEGUNDOS),
+    }
+    try:
+        with transaction.atomic():
+            return ClaveIdempotencia.objects.create(usuario=request.user, clave=clave, **datos), True
+    except IntegrityError:
+        pass
+
+    registro = ClaveIdempotencia.objects.filter(usuario=request.user, clave=clave).first()
+    if registro is not None and registro.expira_en <= ahora:
+        # Clave vencida: se reutiliza salvo que otro reintento la haya tomado primero
+        if ClaveIdempotencia.objects.filter(pk=registro.pk, expira_en=registro.expira_en).update(**datos):
+            for campo, valor in datos.items():
+                setattr(registro, campo, valor)
+            return registro, True
+        registro = ClaveIdempotencia.objects.filter(pk=registro.pk).first()
+    return registro, False
+
+
+def _respuesta_registrada(registro, request):
+    if registro is None or registro.estado == 'en_curso':
+        return Response(
+            {"error": "Hay una solicitud en curso con la misma Idempotency-Key."},
+            status=status.HTTP_409_CONFLICT
+        )
+    if (registro.metodo, registro.ruta) != (request.method, request.path):
+        return Response(
+            {"error": "La Idempotency-Key ya se usó con otra solicitud."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(
+        registro.cuerpo,
+        status=registro.codigo_respuesta,
+        headers={**registro.cabeceras, CABECERA_REPRODUCIDA: 'true'}
+    )
+
+
+def idempotente(metodo_vista):
+    """
+    Decorador para métodos de `APIView`. Debe quedar por fuera de cualquier
+    `transaction.atomic`, para que la reserva de la clave sea visible de inmediato
+    para los reintentos concurrentes.
+    """
+    @functools.wraps(metodo_vista)
+    def envoltura(vista, request, *args, **kwargs):
+        clave = request.headers.get(CABECERA)
+        if not clave or not request.user.is_authenticated:
+            return metodo_vista(vista, request, *args, **kwargs)
+        if len(clave) > LARGO_MAXIMO:
+            return Response(
+                {"error": f"La cabecera {CABECERA} admite hasta {LARGO_MAXIMO} caracteres."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        registro, reservada = _reservar(request, clave)
+        if not reservada:
+            return _respuesta_registrada(registro, request)
+
+        try:
+            response = metodo_vista(vista, request, *args, **kwargs)
+        except Exception:
+            registro.delete()
+            raise
+        if response.status_code >= 500:
+            registro.delete()
+            return response
+
+        ClaveIdempotencia.objects.filter(pk=registro.pk).update(
+            estado='completada',
+            codigo_respuesta=response.status_code,
+            cuerpo=response.data,
+            # Content-Type lo fija el renderizador al reproducir
+            cabeceras={nombre: valor for nombre, valor in response.items() if nombre.lower() != 'content-type'},
+            expira_en=now() + timedelta(hours=settings.IDEMPOTENCIA_TTL_HORAS),
+        )
+        return response
+    return envoltura
+
+
+def purgar_vencidas():
+    """Elimina las claves vencidas. Retorna la cantidad eliminada."""
+    eliminadas, _ = ClaveIdempotencia.objects.filter(expira_en__lte=now()).delete()
+    return eliminadas
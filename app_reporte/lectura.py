@@ -0,0 +1,142 @@
+"""
+Lectura rápida de listados a partir de `values()`.
+
+`ModelSerializer` crea una instancia del modelo por fila y recorre la maquinaria
+de campos de DRF para cada valor. Para listados de solo lectura, `Lector` arma
+las mismas respuestas desde las tuplas de `values()`: los conversores de cada
+campo se resuelven una vez por serializer (la mayoría son la identidad) y las
+relaciones muchos a muchos llegan como arreglo de IDs desde la base de datos
+(`ARRAY(SELECT ...)` en PostgreSQL; una consulta a la tabla intermedia en otros
+motores). El resultado, renderizado a JSON, es idéntico byte a byte al del
+serializer; el comando `comparar_serializacion` lo verifica y mide ambos caminos.
+
+Solo admite serializers cuyos campos corresponden a campos del modelo y sin
+relaciones expandidas; en otro caso las vistas usan el serializer.
+"""
+from functools import lru_cache
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import OuterRef
+from django.db.models.fields.files import FieldFile
+from rest_framework import serializers
+
+# Campos cuya representación es el mismo valor que entrega values()
+IDENTIDAD = (
+    serializers.IntegerField, serializers.CharField, serializers.BooleanField, serializers.FloatField,
+    serializers.ChoiceField, serializers.PrimaryKeyRelatedField, serializers.ReadOnlyField,
+)
+PREFIJO_M2M = '_m2m_'
+
+
+class LecturaNoSoportada(Exception):
+    """El serializer tiene campos que no se pueden armar desde values()."""
+
+
+def _conversor(campo, campo_modelo):
+    if isinstance(campo, serializers.FileField):
+        return lambda nombre: campo.to_representation(FieldFile(None, campo_modelo, nombre))
+    if isinstance(campo, IDENTIDAD):
+        return None
+    return campo.to_representation
+
+
+class Lector:
+    def __init__(self, serializer_class, campos=None):
+        serializer = serializer_class()
+        self.modelo = serializer.Meta.model
+        opciones = self.modelo._meta
+        # (clave en la respuesta, clave en values(), conversor o None)
+        self.columnas = []
+        # (clave en la respuesta, campo muchos a muchos del modelo)
+        self.muchos = []
+        for nombre, campo in serializer.fields.items():
+            if campos is not None and nombre not in campos:
+                continue
+            try:
+                campo_modelo = opciones.get_field(campo.source)
+            except FieldDoesNotExist:
+                raise LecturaNoSoportada(f"{serializer_class.__name__}.{nombre} no corresponde a un campo del modelo.")
+            if campo_modelo.many_to_many:
+                if not isinstance(campo, serializers.ManyRelatedField):
+                    raise LecturaNoSoportada(f"{serializer_class.__name__}.{nombre} no es una lista de IDs.")
+                self.muchos.append((nombre, campo_modelo))
+                self.columnas.append((nombre, PREFIJO_M2M + nombre, None))
+            elif campo_modelo.concrete:
+                self.columnas.append((nombre, campo_modelo.attname, _conversor(campo, campo_modelo)))
+            else:
+                raise LecturaNoSoportada(f"{serializer_class.__name__}.{nombre} no es una columna del modelo.")
+
+    def _tabla_intermedia(self, campo_modelo):
+        intermedia = campo_modelo.remote_field.through
+        origen = intermedia._meta.get_field(campo_modelo.m2m_field_name()).attname
+        destino = intermedia._meta.get_field(campo_modelo.m2m_reverse_field_name()).attname
+        return intermedia, origen, destino
+
+    def valores(self, queryset):
+        """`queryset` como values() con las columnas del serializer; se puede paginar."""
+        anotaciones = {}
+        if connection.vendor == 'postgresql':
+            for nombre, campo_modelo in self.muchos:
+                intermedia, origen, destino = self._tabla_intermedia(campo_modelo)
+                anotaciones[PREFIJO_M2M + nombre] = ArraySubquery(
+                    intermedia.objects.filter(**{origen: OuterRef('pk')}).order_by(destino).values(destino)
+                )
+        columnas = [columna for _, columna, _ in self.columnas if not columna.startswith(PREFIJO_M2M)]
+        if self.muchos:
+            # Para asociar las relaciones a cada fila aunque `fields` no pida el ID
+            columnas.append(self.modelo._meta.pk.attname)
+        return queryset.values(*dict.fromkeys(columnas), **anotaciones)
+
+    def _completar_muchos(self, filas):
+        pk = self.modelo._meta.pk.attname
+        for nombre, campo_modelo in self.muchos:
+            clave = PREFIJO_M2M + nombre
+            if filas and clave in filas[0]:
+                continue
+            intermedia, origen, destino = self._tabla_intermedia(campo_modelo)
+            ids = {fila[pk]: [] for fila in filas}
+            pares = intermedia.objects.filter(**{f'{origen}__in': list(ids)}).order_by(destino).values_list(origen, destino)
+            for id_origen, id_destino in pares:
+                ids[id_origen].append(id_destino)
+            for fila in filas:
+                fila[clave] = ids[fila[pk]]
+
+    def convertir(self, filas):
+        """Filas de `valores()` (ya evaluadas) a la representación del serializer."""
+        filas = list(filas)
+        if self.muchos:
+            self._completar_muchos(filas)
+        columnas = self.columnas
+        resultado = []
+        for fila in filas:
+            item = {}
+            for clave, columna, conversor in columnas:
+                valor = fila[columna]
+                # Como en DRF, los nulos no pasan por el conversor
+                item[clave] = valor if conversor is None or valor is None else conversor(valor)
+            resultado.append(item)
+        return resultado
+
+    def filas(self, queryset):
+        return self.convertir(self.valores(queryset))
+
+
+@lru_cache(maxsize=None)
+def _lector(serializer_class, campos):
+    return Lector(serializer_class, campos)
+
+
+def lector(serializer_class, proyeccion=None):
+    """
+    `Lector` para el serializer y la proyección (`?fields=`) pedida, o None si la
+    respuesta necesita el serializer (relaciones expandidas o campos calculados).
+    """
+    if proyeccion is not None and proyeccion.expandir:
+        return None
+    campos = None if proyeccion is None or proyeccion.campos is None else frozenset(proyeccion.campos)
+    try:
+        return _lector(serializer_class, campos)
+    except LecturaNoSoportada:
+        return None
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app_reporte import archivo
+
+
+def _formato(bytes_):
+    return f"{bytes_ / (1024 * 1024):.2f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve los reportes aprobados o rechazados anteriores al horizonte de archivo, con su historial "
+        "de estados, a la tabla de reportes archivados. Trabaja por lotes e informa el tamaño de las tablas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None,
+                            help=f'Antigüedad mínima en días desde el envío (por defecto ARCHIVO_HORIZONTE_DIAS={settings.ARCHIVO_HORIZONTE_DIAS}).')
+        parser.add_argument('--lote', type=int, default=500, help='Reportes por transacción (por defecto 500).')
+        parser.add_argument('--maximo', type=int, default=None, help='Cantidad máxima de reportes a archivar en esta ejecución.')
+        parser.add_argument('--simular', action='store_true', help='Solo informa cuántos reportes se archivarían.')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Ejecuta VACUUM ANALYZE sobre las tablas de reportes e historial al terminar (PostgreSQL).')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("El tamaño de lote debe ser mayor que cero.")
+        limite_fecha = archivo.fecha_limite(options['dias'])
+        if options['simular']:
+            total = archivo.candidatos(limite_fecha).count()
+            self.stdout.write(f"Se archivarían {total} reportes enviados antes del {limite_fecha}.")
+            return
+
+        antes = archivo.tamanos_tablas()
+        total = archivo.archivar_reportes(options['dias'], lote=options['lote'], maximo=options['maximo'])
+        if options['vacuum']:
+            archivo.vacuum()
+        despues = archivo.tamanos_tablas()
+
+        self.stdout.write(self.style.SUCCESS(f"{total} reportes enviados antes del {limite_fecha} archivados."))
+        for clave in antes:
+            diferencia = despues[clave] - antes[clave]
+            self.stdout.write(f"  {clave}: {_formato(antes[clave])} -> {_formato(despues[clave])} ({diferencia / (1024 * 1024):+.2f} MB)")
+        if antes and not options['vacuum']:
+            self.stdout.write("El espacio liberado se reutiliza después del próximo VACUUM (use --vacuum para ejecutarlo ahora).")
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from app_reporte import lectura
+from app_reporte.models import PlanPPDA, Region, Ciudad, Comuna, OrganismoResponsable, Medida, Reporte
+from app_reporte.proyeccion import Proyeccion
+from app_reporte.serializers import PlanPPDASerializer, RegionSerializer, CiudadSerializer, ComunaSerializer, \
+    OrganismoResponsableSerializer, MedidaSerializer, ReporteSerializer
+
+RECURSOS = {
+    'reportes': (Reporte, ReporteSerializer),
+    'medidas': (Medida, MedidaSerializer),
+    'planes': (PlanPPDA, PlanPPDASerializer),
+    'organismos': (OrganismoResponsable, OrganismoResponsableSerializer),
+    'comunas': (Comuna, ComunaSerializer),
+    'ciudades': (Ciudad, CiudadSerializer),
+    'regiones': (Region, RegionSerializer),
+}
+
+
+def _mejor_tiempo(funcion, repeticiones):
+    mejor, resultado = None, None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara, con los datos de la base, el listado armado con ModelSerializer y con la lectura rápida "
+        "desde values() (consulta, serialización y JSON): filas por segundo de cada camino y si el JSON "
+        "resultante es idéntico."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('recursos', nargs='*', metavar='recurso',
+                            help=f"Recursos a medir: {', '.join(RECURSOS)} (por defecto todos).")
+        parser.add_argument('--filas', type=int, default=1000, help='Filas por listado (por defecto 1000).')
+        parser.add_argument('--repeticiones', type=int, default=5,
+                            help='Repeticiones por camino; se informa la más rápida (por defecto 5).')
+
+    def handle(self, *args, **options):
+        if options['filas'] < 1 or options['repeticiones'] < 1:
+            raise CommandError("--filas y --repeticiones deben ser mayores que cero.")
+        renderer = JSONRenderer()
+        diferentes = []
+        self.stdout.write(f"{'recurso':<12}{'filas':>8}{'serializer (filas/s)':>24}{'values() (filas/s)':>22}{'mejora':>9}  JSON")
+        desconocidos = [r for r in options['recursos'] if r not in RECURSOS]
+        if desconocidos:
+            raise CommandError(f"Recursos desconocidos: {', '.join(desconocidos)}.")
+        for nombre in options['recursos'] or RECURSOS:
+            modelo, serializer_class = RECURSOS[nombre]
+            consulta = modelo.objects.order_by('pk')
+            lector = lectura.lector(serializer_class)
+            limite = options['filas']
+
+            def con_serializer():
+                filas = Proyeccion().optimizar(consulta, serializer_class)[:limite]
+                return renderer.render(serializer_class(filas, many=True).data)
+
+            def con_values():
+                return renderer.render(lector.convertir(lector.valores(consulta)[:limite]))
+
+            tiempo_serializer, json_serializer = _mejor_tiempo(con_serializer, options['repeticiones'])
+            tiempo_values, json_values = _mejor_tiempo(con_values, options['repeticiones'])
+            cantidad = min(limite, consulta.count())
+            identico = json_serializer == json_values
+            if not identico:
+                diferentes.append(nombre)
+            self.stdout.write(
+                f"{nombre:<12}{cantidad:>8}{cantidad / tiempo_serializer:>24,.0f}{cantidad / tiempo_values:>22,.0f}"
+                f"{tiempo_serializer / tiempo_values:>8.1f}x  {'idéntico' if identico else 'DIFERENTE'}"
+            )
+        if diferentes:
+            raise CommandError(f"El JSON difiere en: {', '.join(diferentes)}.")
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_reporte import salida
+
+
+class Command(BaseCommand):
+    help = (
+        "Entrega por lotes los eventos pendientes de la bandeja de salida (webhook y correo), con reintentos "
+        "y espera exponencial. Se pueden ejecutar varios workers a la vez: cada uno toma lotes distintos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=100, help='Eventos por lote (por defecto 100).')
+        parser.add_argument('--continuo', action='store_true',
+                            help='Sigue despachando hasta ser detenido, esperando --intervalo segundos cuando no hay eventos.')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos de espera en modo continuo (por defecto 5).')
+        parser.add_argument('--purgar', action='store_true',
+                            help='Elimina antes los eventos enviados anteriores a SALIDA_RETENCION_DIAS.')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("El tamaño de lote debe ser mayor que cero.")
+        if options['purgar']:
+            self.stdout.write(f"Eventos enviados purgados: {salida.purgar_enviados()}.")
+
+        while True:
+            enviados, fallidos = salida.despachar(options['lote'])
+            if enviados or fallidos or not options['continuo']:
+                self.stdout.write(self.style.SUCCESS(f"Eventos enviados: {enviados}, con error: {fallidos}."))
+            if not options['continuo']:
+                break
+            if not enviados:
+                time.sleep(options['intervalo'])
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+
+from app_reporte import particiones
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea las particiones anuales del historial de estados para el año actual y los siguientes, "
+        "y opcionalmente desvincula (o elimina) las de años anteriores. Pensado para ejecutarse "
+        "periódicamente, por ejemplo una vez al mes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anios-futuros', type=int, default=1,
+                            help='Cantidad de años posteriores al actual para los que se crean particiones (por defecto 1).')
+        parser.add_argument('--desvincular-anteriores-a', type=int, metavar='ANIO',
+                            help='Desvincula las particiones de los años anteriores al indicado.')
+        parser.add_argument('--eliminar', action='store_true',
+                            help='Elimina las particiones desvinculadas en lugar de conservarlas como tablas.')
+
+    def handle(self, *args, **options):
+        if not particiones.tabla_particionada():
+            raise CommandError("El historial de estados no está particionado (requiere PostgreSQL y la migración 0019).")
+
+        anio_actual = now().year
+        for anio in range(anio_actual, anio_actual + options['anios_futuros'] + 1):
+            if particiones.crear_particion(anio):
+                self.stdout.write(f"Partición {anio} creada.")
+
+        limite = options['desvincular_anteriores_a']
+        if limite is not None:
+            if limite > anio_actual:
+                raise CommandError("No se pueden desvincular particiones del año actual o posteriores.")
+            for anio in particiones.anios_particionados():
+                if anio < limite:
+                    particiones.desvincular_particion(anio, eliminar=options['eliminar'])
+                    accion = "eliminada" if options['eliminar'] else f"desvinculada como {particiones.TABLA_HISTORIAL}_{anio}"
+                    self.stdout.write(f"Partición {anio} {accion}.")
+
+        anios = particiones.anios_particionados()
+        self.stdout.write(self.style.SUCCESS(f"Particiones vigentes: {', '.join(map(str, anios)) or 'ninguna'}."))
@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from app_reporte import middleware, renderers
+from app_reporte.views import ReporteListView
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide GET /api/reportes/ (vista, renderer y compresión) con el JSON de DRF, el JSON con orjson, el "
+        "formato columnar y MessagePack si está instalado, sin comprimir, con gzip y con brotli si está "
+        "instalado: solicitudes por segundo y bytes de la respuesta."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Reportes por página (máximo 100).')
+        parser.add_argument('--repeticiones', type=int, default=50, help='Solicitudes por combinación.')
+        parser.add_argument('--usuario', help='Usuario con el que se consulta (por defecto el primer superusuario).')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError("--repeticiones debe ser mayor que cero.")
+        modelo_usuario = get_user_model()
+        if options['usuario']:
+            usuario = modelo_usuario.objects.filter(username=options['usuario']).first()
+        else:
+            usuario = modelo_usuario.objects.filter(is_superuser=True).order_by('pk').first()
+        if usuario is None:
+            raise CommandError("No hay un usuario con el que consultar; use --usuario.")
+
+        variantes = [
+            ('JSON (DRF)', JSONRenderer),
+            ('JSON (orjson)' if renderers.orjson else 'JSON (sin orjson)', renderers.JSONRapidoRenderer),
+            ('Columnar', renderers.ColumnarRenderer),
+        ]
+        if renderers.msgpack is not None:
+            variantes.append(('MessagePack', renderers.MessagePackRenderer))
+        codificaciones = ['identity', 'gzip'] + (['br'] if middleware.brotli is not None else [])
+        factory = APIRequestFactory()
+        parametros = {'page_size': options['page_size']}
+
+        self.stdout.write(f"{'renderer':<18}{'codificación':<14}{'solicitudes/s':>14}{'bytes':>10}")
+        cuerpos = {}
+        for nombre, renderer in variantes:
+            vista = ReporteListView.as_view(renderer_classes=[renderer])
+            procesar = middleware.CompresionMiddleware(lambda request: vista(request).render())
+            for codificacion in codificaciones:
+                inicio = time.perf_counter()
+                for _ in range(options['repeticiones']):
+                    request = factory.get('/api/reportes/', parametros, HTTP_ACCEPT=renderer.media_type,
+                                          HTTP_ACCEPT_ENCODING=codificacion)
+                    force_authenticate(request, user=usuario)
+                    response = procesar(request)
+                duracion = time.perf_counter() - inicio
+                if response.status_code != 200:
+                    raise CommandError(f"GET /api/reportes/ respondió {response.status_code}.")
+                if codificacion == 'identity':
+                    cuerpos[nombre] = response.content
+                self.stdout.write(
+                    f"{nombre:<18}{codificacion:<14}{options['repeticiones'] / duracion:>14,.1f}{len(response.content):>10,}"
+                )
+        json_drf, json_rapido = (cuerpos[nombre] for nombre, _ in variantes[:2])
+        self.stdout.write(f"JSON idéntico entre renderers: {'sí' if json_drf == json_rapido else 'NO'}")
@@ -0,0 +1,67 @@
+import os
+import socket
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from app_reporte import tareas
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta las tareas en segundo plano de la cola en la base de datos. Con --una-vez procesa lo pendiente "
+        "y termina (útil desde cron); sin él queda atendiendo la cola con --concurrencia hilos y encola las "
+        "tareas recurrentes de TAREAS_PROGRAMADAS. Se pueden ejecutar varios trabajadores en uno o más nodos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--colas', default='', help='Colas a atender separadas por coma (por defecto todas).')
+        parser.add_argument('--concurrencia', type=int, default=1, help='Hilos que ejecutan tareas (por defecto 1).')
+        parser.add_argument('--intervalo', type=float, default=2,
+                            help='Segundos de espera cuando no hay tareas y entre rondas del planificador (por defecto 2).')
+        parser.add_argument('--una-vez', action='store_true', help='Procesa las tareas ejecutables y termina.')
+        parser.add_argument('--sin-planificador', action='store_true', help='No encola las tareas recurrentes.')
+
+    def handle(self, *args, **options):
+        if options['concurrencia'] < 1:
+            raise CommandError("La concurrencia debe ser mayor que cero.")
+        colas = [c.strip() for c in options['colas'].split(',') if c.strip()] or None
+        nombre = f"{socket.gethostname()}:{os.getpid()}"
+        planificar = not options['sin_planificador']
+        if planificar:
+            tareas.sincronizar_programadas()
+
+        if options['una_vez']:
+            tareas.recuperar_vencidas()
+            if planificar:
+                tareas.programar_recurrentes()
+            completadas, fallidas = tareas.procesar_pendientes(nombre, colas)
+            self.stdout.write(self.style.SUCCESS(f"Tareas completadas: {completadas}, con error: {fallidas}."))
+            return
+
+        detener = threading.Event()
+        hilos = [
+            threading.Thread(
+                target=tareas.trabajar, args=(f"{nombre}/{n}", colas, detener, options['intervalo']),
+                name=f'tareas-{n}',
+            )
+            for n in range(1, options['concurrencia'] + 1)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        self.stdout.write(f"Trabajador {nombre} atendiendo {', '.join(colas) if colas else 'todas las colas'} "
+                          f"con {len(hilos)} hilo(s). Ctrl+C para detener.")
+        try:
+            while not detener.is_set():
+                close_old_connections()
+                tareas.recuperar_vencidas()
+                if planificar:
+                    tareas.programar_recurrentes()
+                detener.wait(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write("Deteniendo: se terminan las tareas en curso...")
+        finally:
+            detener.set()
+            for hilo in hilos:
+                hilo.join()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app_reporte.idempotencia import purgar_vencidas
+
+
+class Command(BaseCommand):
+    help = "Elimina las claves de idempotencia vencidas. Pensado para ejecutarse periódicamente, por ejemplo cada hora."
+
+    def handle(self, *args, **options):
+        eliminadas = purgar_vencidas()
+        self.stdout.write(self.style.SUCCESS(f"Claves de idempotencia eliminadas: {eliminadas}."))
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app_reporte.sincronizacion import purgar_eliminaciones
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina los registros de eliminación anteriores a SINCRONIZACION_RETENCION_DIAS. Los clientes con un "
+        "token más antiguo reciben una copia completa en su próxima sincronización."
+    )
+
+    def handle(self, *args, **options):
+        eliminados = purgar_eliminaciones()
+        self.stdout.write(self.style.SUCCESS(
+            f"Registros de eliminación purgados: {eliminados} (retención {settings.SINCRONIZACION_RETENCION_DIAS} días)."
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from app_reporte.contadores import recalcular_contadores
+
+
+class Command(BaseCommand):
+    help = "Recalcula en bloque los contadores de reportes por estado de medidas y organismos."
+
+    def handle(self, *args, **options):
+        medidas, organismos = recalcular_contadores()
+        self.stdout.write(self.style.SUCCESS(
+            f"Contadores recalculados: {medidas} medidas, {organismos} organismos."
+        ))
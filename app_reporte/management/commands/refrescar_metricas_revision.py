@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app_reporte.analitica import refrescar_metricas_revision
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la tabla materializada de tiempos de revisión (MetricaRevision) "
+        "a partir del historial de estados. Pensado para ejecutarse periódicamente."
+    )
+
+    def handle(self, *args, **options):
+        total = refrescar_metricas_revision()
+        self.stdout.write(self.style.SUCCESS(f"{total} métricas de revisión calculadas."))
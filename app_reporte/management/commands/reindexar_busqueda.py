@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app_reporte import busqueda
+
+
+class Command(BaseCommand):
+    help = "Recalcula los vectores de búsqueda de texto completo de medidas y reportes (solo PostgreSQL)."
+
+    def handle(self, *args, **options):
+        if not busqueda.busqueda_disponible():
+            self.stdout.write("La base de datos no es PostgreSQL; no hay vectores que recalcular.")
+            return
+        medidas, reportes = busqueda.reindexar()
+        self.stdout.write(self.style.SUCCESS(f"Vectores recalculados: {medidas} medidas, {reportes} reportes."))
@@ -0,0 +1,127 @@
+"""
+Middleware del proyecto.
+"""
+import re
+import time
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from . import routers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+COOKIE_PRIMARIA = 'sna_primaria_hasta'
+CABECERA_PRIMARIA = 'X-Primaria-Hasta'
+
+
+class PrimariaTrasEscrituraMiddleware:
+    """
+    Garantiza que un cliente lea sus propias escrituras cuando hay réplicas.
+
+    Las peticiones que escriben se atienden completas en la base principal y la
+    respuesta indica hasta cuándo (timestamp Unix) el cliente debe seguir leyendo
+    de ella, en la cookie `sna_primaria_hasta` y en la cabecera `X-Primaria-Hasta`.
+    Los clientes que no usan cookies pueden reenviar ese valor en la misma cabecera.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        escritura = request.method not in METODOS_SEGUROS
+        token = routers.fijar_primaria(escritura or self._dentro_de_ventana(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.restaurar(token)
+
+        if escritura and response.status_code < 400 and settings.REPLICAS_LECTURA:
+            ventana = settings.REPLICA_VENTANA_PRIMARIA
+            hasta = str(int(time.time()) + ventana)
+            response.set_cookie(COOKIE_PRIMARIA, hasta, max_age=ventana, httponly=True, samesite='Lax')
+            response[CABECERA_PRIMARIA] = hasta
+        return response
+
+    def _dentro_de_ventana(self, request):
+        valor = request.headers.get(CABECERA_PRIMARIA) or request.COOKIES.get(COOKIE_PRIMARIA)
+        if not valor:
+            return False
+        try:
+            hasta = int(valor)
+        except ValueError:
+            return False
+        ahora = time.time()
+        # Se ignoran valores más allá de la ventana para que un cliente no quede fijado indefinidamente
+        return ahora < hasta <= ahora + settings.REPLICA_VENTANA_PRIMARIA
+
+
+def codificaciones_aceptadas(cabecera):
+    """Codificaciones de `Accept-Encoding` que el cliente acepta (q distinto de 0)."""
+    aceptadas = set()
+    for parte in cabecera.split(','):
+        nombre, _, parametros = parte.partition(';')
+        calidad = re.search(r'q\s*=\s*([0-9.]+)', parametros)
+        try:
+            if calidad and float(calidad.group(1)) == 0:
+                continue
+        except ValueError:
+            continue
+        aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+class CompresionMiddleware(GZipMiddleware):
+    """
+    `GZipMiddleware` de Django, con su relleno aleatorio contra BREACH, más
+    brotli (si está instalado) para las respuestas de la API que no pueden
+    llevar secretos de sesión.
+
+    - Solo se comprimen respuestas de al menos `COMPRESION_MINIMO_BYTES`, que no
+      estén en streaming (SSE, descargas) ni traigan ya `Content-Encoding`.
+    - Brotli no tiene relleno, así que se limita a respuestas de `/api/` que no
+      son HTML, pedidas sin cookies (autenticadas con la cabecera Authorization o
+      anónimas). El resto, como el admin o la API navegable, usa gzip.
+    - `Accept-Encoding` se interpreta con q: `gzip;q=0` rechaza gzip.
+    """
+    CALIDAD_BROTLI = 5
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < settings.COMPRESION_MINIMO_BYTES:
+            return response
+
+        aceptadas = codificaciones_aceptadas(request.headers.get('Accept-Encoding', ''))
+        if brotli is not None and 'br' in aceptadas and self._sin_secretos_de_sesion(request, response):
+            return self._comprimir_brotli(response)
+        if 'gzip' not in aceptadas:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+        return super().process_response(request, response)
+
+    def _sin_secretos_de_sesion(self, request, response):
+        return (
+            request.path.startswith('/api/')
+            and not request.COOKIES
+            and not response.get('Content-Type', '').startswith('text/html')
+        )
+
+    def _comprimir_brotli(self, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        comprimido = brotli.compress(response.content, quality=self.CALIDAD_BROTLI)
+        if len(comprimido) >= len(response.content):
+            return response
+        response.content = comprimido
+        response['Content-Length'] = str(len(comprimido))
+        response['Content-Encoding'] = 'br'
+        # El ETag identifica el contenido sin comprimir
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,79 @@
+# Generated by Django 5.1.5 on 2026-10-19 13:04
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+CAMPOS_CONTADOR = {
+    'pendiente': 'reportes_pendientes',
+    'aprobado': 'reportes_aprobados',
+    'rechazado': 'reportes_rechazados',
+}
+
+
+def inicializar_contadores(apps, schema_editor):
+    """
+    Calcula los contadores de los reportes existentes con un UPDATE por modelo.
+    """
+    Reporte = apps.get_model('app_reporte', 'Reporte')
+    Medida = apps.get_model('app_reporte', 'Medida')
+    OrganismoResponsable = apps.get_model('app_reporte', 'OrganismoResponsable')
+
+    def conteo(campo_relacion, estado):
+        reportes = (
+            Reporte.objects
+            .filter(**{campo_relacion: OuterRef('pk')}, estado=estado)
+            .order_by()
+            .values(campo_relacion)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(reportes, output_field=IntegerField()), Value(0))
+
+    Medida.objects.update(**{
+        campo: conteo('medida', estado) for estado, campo in CAMPOS_CONTADOR.items()
+    })
+    OrganismoResponsable.objects.update(**{
+        campo: conteo('organismo', estado) for estado, campo in CAMPOS_CONTADOR.items()
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_reporte', '0013_alter_historialestadoreporte_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medida',
+            name='reportes_aprobados',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='medida',
+            name='reportes_pendientes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='medida',
+            name='reportes_rechazados',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='organismoresponsable',
+            name='reportes_aprobados',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='organismoresponsable',
+            name='reportes_pendientes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='organismoresponsable',
+            name='reportes_rechazados',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(inicializar_contadores, reverse_code=migrations.RunPython.noop),
+    ]
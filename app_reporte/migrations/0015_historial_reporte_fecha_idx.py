@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_reporte', '0014_contadores_reportes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Se crea primero el índice compuesto para no quedar sin índice sobre reporte_id
+        migrations.AddIndex(
+            model_name='historialestadoreporte',
+            index=models.Index(fields=['reporte', 'fecha'], name='historial_reporte_fecha_idx'),
+        ),
+        migrations.AlterField(
+            model_name='historialestadoreporte',
+            name='reporte',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='app_reporte.reporte'),
+        ),
+    ]
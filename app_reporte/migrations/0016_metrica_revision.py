@@ -0,0 +1,34 @@
+# Generated by Django 5.1.5 on 2026-10-19 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_reporte', '0015_historial_reporte_fecha_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricaRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('organismo', 'Organismo responsable'), ('plan', 'Plan PPDA'), ('revisor', 'Revisor')], max_length=20)),
+                ('clave', models.CharField(blank=True, max_length=150)),
+                ('etiqueta', models.CharField(blank=True, max_length=255)),
+                ('mes', models.DateField()),
+                ('revisiones', models.PositiveIntegerField()),
+                ('promedio_segundos', models.FloatField()),
+                ('p50_segundos', models.FloatField()),
+                ('p90_segundos', models.FloatField()),
+                ('p95_segundos', models.FloatField()),
+                ('calculado_en', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Métrica de Revisión',
+                'verbose_name_plural': 'Métricas de Revisión',
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'clave', 'mes'), name='unique_metrica_dimension_clave_mes')],
+            },
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.5 on 2026-10-19 13:10
+
+import logging
+
+import django.contrib.postgres.search
+from django.db import DatabaseError, migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION = 'es_busqueda'
+
+SQL_VECTOR_MEDIDA = f"""
+    setweight(to_tsvector('{CONFIGURACION}', COALESCE(nombre_corto, '')), 'A') ||
+    setweight(to_tsvector('{CONFIGURACION}', COALESCE(referencia_pda, '')), 'A') ||
+    setweight(to_tsvector('{CONFIGURACION}', COALESCE(descripcion, '')), 'B') ||
+    setweight(to_tsvector('{CONFIGURACION}', COALESCE(indicador, '')), 'C') ||
+    setweight(to_tsvector('{CONFIGURACION}', COALESCE(formula_calculo, '')), 'C')
+"""
+SQL_VECTOR_REPORTE = f"setweight(to_tsvector('{CONFIGURACION}', COALESCE(descripcion, '')), 'A')"
+
+
+def crear_busqueda(apps, schema_editor):
+    """
+    Crea la configuración de texto en español (con unaccent si la extensión está
+    disponible), los índices GIN y calcula los vectores existentes.
+    Solo aplica a PostgreSQL; en otros motores la búsqueda usa una alternativa.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_ts_config WHERE cfgname = %s", [CONFIGURACION])
+        if not cursor.fetchone():
+            cursor.execute(f"CREATE TEXT SEARCH CONFIGURATION {CONFIGURACION} (COPY = pg_catalog.spanish)")
+            cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'unaccent'")
+            if cursor.fetchone():
+                try:
+                    # El savepoint deshace solo esto si falla, sin abortar la migración
+                    with transaction.atomic(using=schema_editor.connection.alias):
+                        cursor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+                        cursor.execute(
+                            f"ALTER TEXT SEARCH CONFIGURATION {CONFIGURACION} "
+                            "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem"
+                        )
+                except DatabaseError as error:
+                    # Por ejemplo, sin permisos para crear la extensión: se mantiene la copia de spanish
+                    logger.warning(
+                        "Búsqueda sin unaccent: no se pudo configurar %s (%s). Las búsquedas distinguirán tildes.",
+                        CONFIGURACION, error,
+                    )
+
+        cursor.execute(f"UPDATE app_reporte_medida SET busqueda = {SQL_VECTOR_MEDIDA}")
+        cursor.execute(f"UPDATE app_reporte_reporte SET busqueda = {SQL_VECTOR_REPORTE}")
+        cursor.execute("CREATE INDEX medida_busqueda_gin ON app_reporte_medida USING gin (busqueda)")
+        cursor.execute("CREATE INDEX reporte_busqueda_gin ON app_reporte_reporte USING gin (busqueda)")
+
+
+def eliminar_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS medida_busqueda_gin")
+        cursor.execute("DROP INDEX IF EXISTS reporte_busqueda_gin")
+        cursor.execute(f"DROP TEXT SEARCH CONFIGURATION IF EXISTS {CONFIGURACION}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_reporte', '0016_metrica_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medida',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='reporte',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(crear_busqueda, reverse_code=eliminar_busqueda),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations, transaction
+
+TABLAS_NOMBRES = (
+    'app_reporte_region',
+    'app_reporte_ciudad',
+    'app_reporte_comuna',
+    'app_reporte_organismoresponsable',
+)
+
+
+def _extension_disponible(cursor, nombre):
+    cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = %s", [nombre])
+    return cursor.fetchone() is not None
+
+
+def _crear_extension(connection, cursor, nombre):
+    """Intenta crear la extensión; retorna False si no está disponible o faltan permisos."""
+    if not _extension_disponible(cursor, nombre):
+        return False
+    try:
+        with transaction.atomic(using=connection.alias):
+            cursor.execute(f"CREATE EXTENSION IF NOT EXISTS {nombre}")
+        return True
+    except Exception:
+        return False
+
+
+def crear_indices_trigramas(apps, schema_editor):
+    """
+    Crea la función inmutable sna_normalizar (minúsculas y, si hay unaccent, sin tildes)
+    y los índices GIN de trigramas sobre los nombres de los catálogos.
+    Si pg_trgm no está disponible, la aplicación usa el índice en memoria de similitud.py.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if _crear_extension(connection, cursor, 'unaccent'):
+            cuerpo = "SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1))"
+        else:
+            cuerpo = "SELECT lower($1)"
+        cursor.execute(
+            "CREATE OR REPLACE FUNCTION sna_normalizar(text) RETURNS text "
+            f"LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS $${cuerpo}$$"
+        )
+        if not _crear_extension(connection, cursor, 'pg_trgm'):
+            return
+        for tabla in TABLAS_NOMBRES:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {tabla}_nombre_trgm "
+                f"ON {tabla} USING gin (sna_normalizar(nombre) gin_trgm_ops)"
+            )
+
+
+def eliminar_indices_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for tabla in TABLAS_NOMBRES:
+            cursor.execute(f"DROP INDEX IF EXISTS {tabla}_nombre_trgm")
+        cursor.execute("DROP FUNCTION IF EXISTS sna_normalizar(text)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_reporte', '0017_busqueda_texto_completo'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices_trigramas, reverse_code=eliminar_indices_trigramas),
+    ]
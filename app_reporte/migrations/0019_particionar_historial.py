@@ -0,0 +1,105 @@
+from django.db import migrations
+
+TABLA = 'app_reporte_historialestadoreporte'
+TABLA_ANTERIOR = f'{TABLA}_sin_particionar'
+
+
+def _definiciones(cursor, tabla):
+    """Claves foráneas e índices (excepto la clave primaria) de la tabla, para recrearlos."""
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'", [tabla]
+    )
+    foraneas = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN ("
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p')", [tabla, tabla]
+    )
+    indices = cursor.fetchall()
+    return foraneas, indices
+
+
+def _reemplazar_tabla(cursor, crear_sql, despues_de_crear=None):
+    """
+    Reemplaza la tabla del historial por la creada con `crear_sql`, copiando los
+    datos y recreando claves foráneas e índices con los mismos nombres.
+    """
+    foraneas, indices = _definiciones(cursor, TABLA)
+    cursor.execute(f"ALTER TABLE {TABLA} RENAME TO {TABLA_ANTERIOR}")
+    cursor.execute(crear_sql)
+    if despues_de_crear:
+        despues_de_crear(cursor)
+    cursor.execute(f"INSERT INTO {TABLA} SELECT * FROM {TABLA_ANTERIOR}")
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLA}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {TABLA}"
+    )
+    cursor.execute(f"DROP TABLE {TABLA_ANTERIOR}")
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [TABLA]
+    )
+    pkey = cursor.fetchone()[0]
+    if pkey != f'{TABLA}_pkey':
+        cursor.execute(f"ALTER TABLE {TABLA} RENAME CONSTRAINT {pkey} TO {TABLA}_pkey")
+    for nombre, definicion in foraneas:
+        cursor.execute(f"ALTER TABLE {TABLA} ADD CONSTRAINT {nombre} {definicion}")
+    for _, definicion in indices:
+        cursor.execute(definicion)
+
+
+def particionar(apps, schema_editor):
+    """
+    Convierte el historial en una tabla particionada por año según `fecha` y crea
+    un índice BRIN sobre `Reporte.fecha_envio`.
+    La clave primaria pasa a ser (id, fecha), como exige PostgreSQL; `id` sigue
+    siendo único porque proviene de la misma secuencia. Se crea una partición por
+    cada año con datos, la del año siguiente y una partición por defecto.
+    Solo aplica a PostgreSQL.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    def crear_particiones(cursor):
+        cursor.execute(
+            f"SELECT COALESCE(EXTRACT(YEAR FROM MIN(fecha)), EXTRACT(YEAR FROM now()))::int, "
+            f"EXTRACT(YEAR FROM now())::int + 1 FROM {TABLA_ANTERIOR}"
+        )
+        desde, hasta = cursor.fetchone()
+        for anio in range(desde, hasta + 1):
+            cursor.execute(
+                f"CREATE TABLE {TABLA}_{anio} PARTITION OF {TABLA} "
+                f"FOR VALUES FROM ('{anio}-01-01 00:00:00+00') TO ('{anio + 1}-01-01 00:00:00+00')"
+            )
+        cursor.execute(f"CREATE TABLE {TABLA}_default PARTITION OF {TABLA} DEFAULT")
+
+    with schema_editor.connection.cursor() as cursor:
+        _reemplazar_tabla(
+            cursor,
+            f"CREATE TABLE {TABLA} (LIKE {TABLA_ANTERIOR} INCLUDING DEFAULTS INCLUDING IDENTITY, "
+            f"PRIMARY KEY (id, fecha)) PARTITION BY RANGE (fecha)",
+            crear_particiones,
+        )
+        # Los reportes se insertan en orden de fecha: un índice BRIN filtra por período
+        # ocupando unas pocas páginas, frente a un B-tree que crece con la tabla.
+        cursor.execute("CREATE INDEX reporte_fecha_envio_brin ON app_reporte_reporte USING brin (fecha_envio)")
+
+
+def desparticionar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS reporte_fecha_envio_brin")
+        _reemplazar_tabla(
+            cursor,
+            f"CREATE TABLE {TABLA} (LIKE {TABLA_ANTERIOR} INCLUDING DEFAULTS INCLUDING IDENTITY, PRIMARY KEY (id))",
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_reporte', '0018_busqueda_trigramas'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, reverse_code=desparticionar),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-19 13:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_reporte', '0019_particionar_historial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReporteArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha_envio', models.DateField()),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('archivo', models.CharField(blank=True, default='', max_length=100)),
+                ('estado', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+                ('historial', models.JSONField(blank=True, default=list)),
+                ('archivado_en', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('medida', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reportes_archivados', to='app_reporte.medida')),
+                ('medio_verificacion', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='reportes_archivados', to='app_reporte.medioverificacion')),
+                ('organismo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reportes_archivados', to='app_reporte.organismoresponsable')),
+                ('updated_by', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Reporte Archivado',
+                'verbose_name_plural': 'Reportes Archivados',
+            },
+        ),
+    ]
@@ -0,0 +1,115 @@
+import logging
+
+import app_reporte.models
+from django.conf import settings
+from django.db import migrations, models
+
+from app_reporte.rellenos import CODIGOS, caso, lotes, validar_estados
+
+logger = logging.getLogger(__name__)
+
+
+def validar_historial(apps, schema_editor):
+    Historial = apps.get_model('app_reporte', 'HistorialEstadoReporte')
+    validar_estados(Historial, 'estado_anterior', 'estado_nuevo')
+
+
+def completar_codigos(apps, schema_editor):
+    """
+    Copia los estados a las columnas enteras y asigna `created_by` a partir del
+    nombre de usuario guardado en `actualizado_por`. Se hace por lotes de IDs, cada
+    uno en su propia transacción, para no bloquear la tabla completa.
+    Los nombres sin usuario asociado quedan con `created_by` vacío y se informan
+    en el log, porque 0022 elimina la columna de texto.
+    """
+    Historial = apps.get_model('app_reporte', 'HistorialEstadoReporte')
+    Usuario = apps.get_model(settings.AUTH_USER_MODEL)
+    tabla = Historial._meta.db_table
+    tabla_usuarios = Usuario._meta.db_table
+    pares = [(f"'{nombre}'", codigo) for nombre, codigo in CODIGOS.items()]
+    sql = (
+        f"UPDATE {tabla} SET "
+        f"estado_anterior_codigo = {caso('estado_anterior', pares)}, "
+        f"estado_nuevo_codigo = {caso('estado_nuevo', pares)}, "
+        f"created_by_id = COALESCE(created_by_id, "
+        f"(SELECT u.id FROM {tabla_usuarios} u WHERE u.username = {tabla}.actualizado_por)) "
+        f"WHERE id > %s AND id <= %s"
+    )
+    for desde, hasta in lotes(schema_editor, tabla):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(sql, [desde, hasta])
+
+    sin_usuario = sorted(
+        Historial.objects.filter(created_by__isnull=True)
+        .values_list('actualizado_por', flat=True).distinct()
+    )
+    if sin_usuario:
+        logger.warning(
+            "%s nombres de actualizado_por no corresponden a ningún usuario y quedan sin created_by: %s",
+            len(sin_usuario), ', '.join(sin_usuario),
+        )
+
+
+def completar_textos(apps, schema_editor):
+    Historial = apps.get_model('app_reporte', 'HistorialEstadoReporte')
+    Usuario = apps.get_model(settings.AUTH_USER_MODEL)
+    tabla = Historial._meta.db_table
+    tabla_usuarios = Usuario._meta.db_table
+    pares = [(codigo, f"'{nombre}'") for nombre, codigo in CODIGOS.items()]
+    sql = (
+        f"UPDATE {tabla} SET "
+        f"estado_anterior = {caso('estado_anterior_codigo', pares)}, "
+        f"estado_nuevo = {caso('estado_nuevo_codigo', pares)}, "
+        f"actualizado_por = COALESCE("
+        f"(SELECT u.username FROM {tabla_usuarios} u WHERE u.id = {tabla}.created_by_id), 'Desconocido') "
+        f"WHERE id > %s AND id <= %s"
+    )
+    for desde, hasta in lotes(schema_editor, tabla):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(sql, [desde, hasta])
+
+
+class Migration(migrations.Migration):
+    # Cada lote del relleno se confirma por separado
+    atomic = False
+
+    dependencies = [
+        ('app_reporte', '0020_reportes_archivados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(validar_historial, reverse_code=migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='historialestadoreporte',
+            name='estado_anterior_codigo',
+            field=app_reporte.models.EstadoReporteField(
+                choices=[('pendiente', 'Pendiente'), ('aprobado', 'Aprobado'), ('rechazado', 'Rechazado')], null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name='historialestadoreporte',
+            name='estado_nuevo_codigo',
+            field=app_reporte.models.EstadoReporteField(
+                choices=[('pendiente', 'Pendiente'), ('aprobado', 'Aprobado'), ('rechazado', 'Rechazado')], null=True
+            ),
+        ),
+        # Las columnas de texto se vuelven opcionales para que, al revertir, se puedan
+        # volver a agregar vacías antes de rellenarlas
+        migrations.AlterField(
+            model_name='historialestadoreporte',
+            name='estado_anterior',
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='historialestadoreporte',
+            name='estado_nuevo',
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='historialestadoreporte',
+            name='actualizado_por',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.RunPython(completar_codigos, reverse_code=completar_textos),
+    ]
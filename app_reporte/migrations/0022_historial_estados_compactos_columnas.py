@@ -0,0 +1,48 @@
+import app_reporte.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_reporte', '0021_historial_estados_compactos'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='historialestadoreporte',
+            name='estado_anterior',
+        ),
+        migrations.RemoveField(
+            model_name='historialestadoreporte',
+            name='estado_nuevo',
+        ),
+        migrations.RemoveField(
+            model_name='historialestadoreporte',
+            name='actualizado_por',
+        ),
+        migrations.RenameField(
+            model_name='historialestadoreporte',
+            old_name='estado_anterior_codigo',
+            new_name='estado_anterior',
+        ),
+        migrations.RenameField(
+            model_name='historialestadoreporte',
+            old_name='estado_nuevo_codigo',
+            new_name='estado_nuevo',
+        ),
+        migrations.AlterField(
+            model_name='historialestadoreporte',
+            name='estado_anterior',
+            field=app_reporte.models.EstadoReporteField(
+                choices=[('pendiente', 'Pendiente'), ('aprobado', 'Aprobado'), ('rechazado', 'Rechazado')]
+            ),
+        ),
+        migrations.AlterField(
+            model_name='historialestadoreporte',
+            name='estado_nuevo',
+            field=app_reporte.models.EstadoReporteField(
+                choices=[('pendiente', 'Pendiente'), ('aprobado', 'Aprobado'), ('rechazado', 'Rechazado')]
+            ),
+        ),
+    ]
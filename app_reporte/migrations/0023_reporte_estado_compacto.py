@@ -0,0 +1,57 @@
+import app_reporte.models
+from django.db import migrations, models
+
+from app_reporte.rellenos import CODIGOS, caso, lotes, validar_estados
+
+
+def validar_reportes(apps, schema_editor):
+    validar_estados(apps.get_model('app_reporte', 'Reporte'), 'estado')
+
+
+def completar_codigos(apps, schema_editor):
+    """Copia el estado a la columna entera por lotes de IDs, cada uno en su propia transacción."""
+    tabla = apps.get_model('app_reporte', 'Reporte')._meta.db_table
+    pares = [(f"'{nombre}'", codigo) for nombre, codigo in CODIGOS.items()]
+    sql = f"UPDATE {tabla} SET estado_codigo = {caso('estado', pares)} WHERE id > %s AND id <= %s"
+    for desde, hasta in lotes(schema_editor, tabla):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(sql, [desde, hasta])
+
+
+def completar_textos(apps, schema_editor):
+    tabla = apps.get_model('app_reporte', 'Reporte')._meta.db_table
+    pares = [(codigo, f"'{nombre}'") for nombre, codigo in CODIGOS.items()]
+    sql = f"UPDATE {tabla} SET estado = {caso('estado_codigo', pares)} WHERE id > %s AND id <= %s"
+    for desde, hasta in lotes(schema_editor, tabla):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(sql, [desde, hasta])
+
+
+class Migration(migrations.Migration):
+    # Cada lote del relleno se confirma por separado
+    atomic = False
+
+    dependencies = [
+        ('app_reporte', '0022_historial_estados_compactos_columnas'),
+    ]
+
+    operations = [
+        migrations.RunPython(validar_reportes, reverse_code=migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='reporte',
+            name='estado_codigo',
+            field=app_reporte.models.EstadoReporteField(
+                choices=[('pendiente', 'Pendiente'), ('aprobado', 'Aprobado'), ('rechazado', 'Rechazado')], null=True
+            ),
+        ),
+        # Opcional para que, al revertir, la columna de texto se pueda volver a agregar vacía
+        migrations.AlterField(
+            model_name='reporte',
+            name='estado',
+            field=models.CharField(
+                choices=[('pendiente', 'Pendiente'), ('aprobado', 'Aprobado'), ('rechazado', 'Rechazado')],
+                default='pendiente', max_length=20, null=True
+            ),
+        ),
+        migrations.RunPython(completar_codigos, reverse_code=completar_textos),
+    ]
@@ -0,0 +1,49 @@
+import app_reporte.models
+from django.db import migrations, models
+
+
+def completar_pendientes(apps, schema_editor):
+    """Completa los reportes creados o modificados después del relleno por lotes de la migración 0023."""
+    tabla = apps.get_model('app_reporte', 'Reporte')._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {tabla} SET estado_codigo = CASE estado "
+            "WHEN 'aprobado' THEN 1 WHEN 'pendiente' THEN 2 WHEN 'rechazado' THEN 3 END "
+            "WHERE estado_codigo IS NULL OR estado_codigo <> CASE estado "
+            "WHEN 'aprobado' THEN 1 WHEN 'pendiente' THEN 2 WHEN 'rechazado' THEN 3 END"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_reporte', '0023_reporte_estado_compacto'),
+    ]
+
+    operations = [
+        migrations.RunPython(completar_pendientes, reverse_code=migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='reporte',
+            name='estado',
+        ),
+        migrations.RenameField(
+            model_name='reporte',
+            old_name='estado_codigo',
+            new_name='estado',
+        ),
+        migrations.AlterField(
+            model_name='reporte',
+            name='estado',
+            field=app_reporte.models.EstadoReporteField(
+                choices=[('pendiente', 'Pendiente'), ('aprobado', 'Aprobado'), ('rechazado', 'Rechazado')],
+                default='pendiente'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='reporte',
+            index=models.Index(
+                condition=models.Q(('estado', 'pendiente')), fields=['organismo', 'fecha_envio'],
+                name='reporte_pendientes_idx'
+            ),
+        ),
+    ]
@@ -3,18 +3,67 @@
 from django.db import models
 from django.contrib import admin
 from django.utils.timezone import now
-from django.db.models import Q
+from django.db.models import F, Q
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.utils.functional import cached_property
 
 
-class TimeStampedModel(models.Model):
+class EstadoReporteField(models.SmallIntegerField):
     """
-    Modelo base abstracto que añade campos de auditoría.
+    Estado de un reporte guardado como entero pequeño (2 bytes en lugar de un texto).
+    En Python, en los filtros y en la API se usa el nombre del estado
+    ('pendiente', 'aprobado', 'rechazado'). Los códigos siguen el orden alfabético
+    de los nombres, por lo que ordenar por el campo da el mismo resultado que con texto.
+    """
+    CODIGOS = {'aprobado': 1, 'pendiente': 2, 'rechazado': 3}
+    NOMBRES = {codigo: nombre for nombre, codigo in CODIGOS.items()}
+    description = "Estado de reporte guardado como entero pequeño"
+
+    @cached_property
+    def validators(self):
+        # Se omiten los validadores de rango de IntegerField: el valor en Python es el nombre
+        return list(self._validators)
+
+    def from_db_value(self, value, expression, connection):
+        return self.NOMBRES.get(value, value)
+
+    def to_python(self, value):
+        if value is None or value in self.CODIGOS:
+            return value
+        if value in self.NOMBRES:
+            return self.NOMBRES[value]
+        raise ValidationError(f"Estado de reporte inválido: {value!r}", code='invalid')
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None or value in self.NOMBRES:
+            return value
+        try:
+            return self.CODIGOS[value]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Estado de reporte inválido: {value!r}") from e
+
+
+class FechasAuditoriaModel(models.Model):
+    """
+    Modelo base abstracto con las fechas de creación y última modificación.
+    Las filas anteriores a estos campos quedan con NULL.
     """
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True,     null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+
+class TimeStampedModel(FechasAuditoriaModel):
+    """
+    Modelo base abstracto que añade campos de auditoría.
+    """
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -32,7 +81,7 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
-class PlanPPDA(models.Model):
+class PlanPPDA(FechasAuditoriaModel):
     """
     Representa el Plan de Prevención y Descontaminación Atmosférica que corresponde a cada comuna y región.
     Campos:
@@ -76,7 +125,7 @@ class PlanPPDA(models.Model):
         super().delete(*args, **kwargs)
 
 
-class Region(models.Model):
+class Region(FechasAuditoriaModel):
     """
     Representa una región geográfica.
 
@@ -102,7 +151,7 @@ class Region(models.Model):
         super().delete(*args, **kwargs)
 
 
-class Ciudad(models.Model):
+class Ciudad(FechasAuditoriaModel):
     """
     Representa una ciudad que pertenece a una región.
 
@@ -130,7 +179,7 @@ class Ciudad(models.Model):
         super().delete(*args, **kwargs)
 
 
-class Comuna(models.Model):
+class Comuna(FechasAuditoriaModel):
     """
     Representa una comuna dentro de una ciudad.
 
@@ -161,14 +210,19 @@ class Comuna(models.Model):
         super().delete(*args, **kwargs)
 
 
-class OrganismoResponsable(models.Model):
+class OrganismoResponsable(FechasAuditoriaModel):
     """
     Representa un organismo responsable de implementar o verificar medidas del plan.
 
     Atributos:
         nombre (str): Nombre del organismo.
+        reportes_pendientes, reportes_aprobados, reportes_rechazados (int):
+            Contadores desnormalizados de reportes por estado (ver contadores.py).
     """
     nombre = models.CharField(max_length=255)
+    reportes_pendientes = models.PositiveIntegerField(default=0, editable=False)
+    reportes_aprobados = models.PositiveIntegerField(default=0, editable=False)
+    reportes_rechazados = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.nombre
@@ -187,9 +241,12 @@ class OrganismoResponsable(models.Model):
         super().delete(*args, **kwargs)
 
 
-class Medida(models.Model):
+class Medida(FechasAuditoriaModel):
     """
     Representa una medida contenida en el plan PPDA.
+
+    Los campos `reportes_*` son contadores desnormalizados de reportes por estado,
+    mantenidos por `app_reporte.contadores`.
     """
     FRECUENCIA_CHOICES = [
         ('anual', 'Anual'),
@@ -212,6 +269,11 @@ class Medida(models.Model):
     plazo = models.DateField(blank=True, null=True)
     plan = models.ForeignKey('PlanPPDA', on_delete=models.PROTECT, related_name='medidas', null=False, blank=False)
     organismos = models.ManyToManyField('OrganismoResponsable', related_name='medidas')
+    reportes_pendientes = models.PositiveIntegerField(default=0, editable=False)
+    reportes_aprobados = models.PositiveIntegerField(default=0, editable=False)
+    reportes_rechazados = models.PositiveIntegerField(default=0, editable=False)
+    # Vector de texto completo (ver busqueda.py); solo se llena en PostgreSQL
+    busqueda = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.nombre_corto
@@ -298,11 +360,23 @@ class Reporte(TimeStampedModel):
         blank=True,
         related_name='reportes'
     )
-    estado = models.CharField(
-        max_length=20,
+    estado = EstadoReporteField(
         choices=ESTADOS_REPORTE,
         default='pendiente'
     )
+    # Vector de texto completo (ver busqueda.py); solo se llena en PostgreSQL
+    busqueda = SearchVectorField(null=True, editable=False)
+    # Reclamo de revisión (ver revision.py): quién revisa el reporte pendiente y hasta cuándo
+    reclamado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,
+        related_name='+'
+    )
+    reclamado_hasta = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         constraints = [
@@ -311,6 +385,17 @@ class Reporte(TimeStampedModel):
                 name='unique_reporte_medida_organismo_fecha'
             )
         ]
+        indexes = [
+            # Sincronización incremental (ver sincronizacion.py)
+            models.Index(fields=['updated_at'], name='reporte_updated_at_idx'),
+            # Cola de revisión: solo indexa los reportes pendientes, por lo que su tamaño
+            # no crece con los reportes ya revisados
+            models.Index(
+                fields=['organismo', 'fecha_envio'],
+                name='reporte_pendientes_idx',
+                condition=Q(estado='pendiente'),
+            ),
+        ]
 
     def __str__(self):
         return f"Reporte de {self.organismo} sobre {self.medida} - {self.fecha_envio}"
@@ -319,17 +404,281 @@ class Reporte(TimeStampedModel):
 class HistorialEstadoReporte(TimeStampedModel):
     """
     Registra los cambios de estado de los reportes para mantener trazabilidad.
-    Guarda el estado anterior, el nuevo, quién lo modificó y cuándo.
+    Guarda el estado anterior, el nuevo, quién lo modificó (`created_by`) y cuándo.
+    Los estados se guardan como enteros pequeños (`EstadoReporteField`).
+
+    En PostgreSQL la tabla está particionada por año según `fecha` (migración 0019),
+    con clave primaria (id, fecha); las particiones se mantienen con el comando
+    `gestionar_particiones`. Filtrar por `fecha` permite descartar particiones.
     """
-    reporte = models.ForeignKey(Reporte, on_delete=models.CASCADE)
-    estado_anterior = models.CharField(max_length=20)
-    estado_nuevo = models.CharField(max_length=20)
-    actualizado_por = models.CharField(max_length=100)
+    # El índice compuesto (reporte, fecha) cubre las búsquedas por reporte,
+    # por lo que no se crea el índice simple de la FK.
+    # Quien hizo el cambio es `created_by`; la API lo expone como `actualizado_por`.
+    USUARIO_DESCONOCIDO = "Desconocido"
+
+    reporte = models.ForeignKey(Reporte, on_delete=models.CASCADE, db_index=False)
+    estado_anterior = EstadoReporteField(choices=Reporte.ESTADOS_REPORTE)
+    estado_nuevo = EstadoReporteField(choices=Reporte.ESTADOS_REPORTE)
     fecha = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = "Historial de Cambio de Estado"
         verbose_name_plural = "Historiales de Cambios de Estado"
+        indexes = [
+            models.Index(fields=['reporte', 'fecha'], name='historial_reporte_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.reporte_id}: {self.estado_anterior} → {self.estado_nuevo} ({self.fecha.date()})"
+
+
+class MetricaRevision(models.Model):
+    """
+    Tabla materializada con el tiempo que los reportes permanecen en estado
+    pendiente antes de que un revisor actúe, agregado por mes y dimensión.
+    Se recalcula completa con `python manage.py refrescar_metricas_revision`.
+    """
+    DIMENSIONES = [
+        ('total', 'Total'),
+        ('organismo', 'Organismo responsable'),
+        ('plan', 'Plan PPDA'),
+        ('revisor', 'Revisor'),
+    ]
+
+    dimension = models.CharField(max_length=20, choices=DIMENSIONES)
+    clave = models.CharField(max_length=150, blank=True)
+    etiqueta = models.CharField(max_length=255, blank=True)
+    mes = models.DateField()
+    revisiones = models.PositiveIntegerField()
+    promedio_segundos = models.FloatField()
+    p50_segundos = models.FloatField()
+    p90_segundos = models.FloatField()
+    p95_segundos = models.FloatField()
+    calculado_en = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Métrica de Revisión"
+        verbose_name_plural = "Métricas de Revisión"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dimension', 'clave', 'mes'],
+                name='unique_metrica_dimension_clave_mes'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.dimension} {self.etiqueta or self.clave} {self.mes:%Y-%m}: p50 {self.p50_segundos:.0f}s"
+
+
+class ReporteArchivado(models.Model):
+    """
+    Reporte cerrado (aprobado o rechazado) movido fuera de las tablas de uso diario
+    por el comando `archivar_reportes`. Conserva el mismo ID del reporte original y
+    su historial de estados serializado en `historial`, sin vector de búsqueda ni
+    índices secundarios, para que ocupe lo mínimo.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    medida = models.ForeignKey('Medida', on_delete=models.PROTECT, related_name='reportes_archivados')
+    organismo = models.ForeignKey('OrganismoResponsable', on_delete=models.PROTECT, related_name='reportes_archivados')
+    medio_verificacion = models.ForeignKey(
+        'MedioVerificacion', on_delete=models.PROTECT, null=True, blank=True,
+        related_name='reportes_archivados', db_index=False
+    )
+    fecha_envio = models.DateField()
+    descripcion = models.TextField(blank=True, null=True)
+    archivo = models.CharField(max_length=100, blank=True, default='')
+    estado = models.CharField(max_length=20)
+    created_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', db_index=False
+    )
+    updated_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', db_index=False
+    )
+    historial = models.JSONField(default=list, blank=True)
+    archivado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Reporte Archivado"
+        verbose_name_plural = "Reportes Archivados"
+
+    def __str__(self):
+        return f"Reporte archivado {self.id} ({self.estado}, {self.fecha_envio})"
+
+
+class ClaveIdempotencia(models.Model):
+    """
+    Respuesta registrada para una cabecera `Idempotency-Key` (ver idempotencia.py).
+    Mientras la vista se ejecuta la clave queda `en_curso`; al terminar se guarda la
+    respuesta y se reproduce ante reintentos con la misma clave hasta `expira_en`.
+    """
+    ESTADOS = [
+        ('en_curso', 'En curso'),
+        ('completada', 'Completada'),
+    ]
+
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    clave = models.CharField(max_length=255)
+    metodo = models.CharField(max_length=10)
+    ruta = models.CharField(max_length=255)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='en_curso')
+    codigo_respuesta = models.PositiveSmallIntegerField(null=True, blank=True)
+    cuerpo = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    cabeceras = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expira_en = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Clave de Idempotencia"
+        verbose_name_plural = "Claves de Idempotencia"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['usuario', 'clave'],
+                name='unique_clave_idempotencia_usuario'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.clave} ({self.metodo} {self.ruta}, {self.estado})"
+
+
+class RegistroEliminacion(models.Model):
+    """
+    Lápida de un registro eliminado, para que la sincronización incremental
+    (ver sincronizacion.py) informe las eliminaciones. `coleccion` es el nombre de
+    la colección sincronizada y `organismo_id` permite filtrar las de reportes por
+    organismo. Se purgan con `python manage.py purgar_eliminaciones`.
+    """
+    coleccion = models.CharField(max_length=30)
+    objeto_id = models.BigIntegerField()
+    organismo_id = models.IntegerField(null=True, blank=True)
+    eliminado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Registro de Eliminación"
+        verbose_name_plural = "Registros de Eliminación"
+        indexes = [
+            models.Index(fields=['coleccion', 'eliminado_en'], name='eliminacion_coleccion_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.coleccion} {self.objeto_id} eliminado el {self.eliminado_en:%Y-%m-%d %H:%M}"
+
+
+class EventoSalida(models.Model):
+    """
+    Bandeja de salida (outbox) de eventos de reportes. Se escribe en la misma
+    transacción que el cambio que la origina, una fila por canal de entrega, y la
+    despacha por lotes el comando `despachar_eventos` (ver salida.py).
+    """
+    CANALES = [
+        ('webhook', 'Webhook'),
+        ('email', 'Correo electrónico'),
+    ]
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    canal = models.CharField(max_length=20, choices=CANALES)
+    datos = models.JSONField(encoder=DjangoJSONEncoder)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=now)
+    ultimo_error = models.TextField(blank=True, default='')
+    creado_en = models.DateTimeField(auto_now_add=True)
+    enviado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Evento de Salida"
+        verbose_name_plural = "Eventos de Salida"
+        indexes = [
+            # Solo los pendientes: el índice no crece con el historial de envíos
+            models.Index(
+                fields=['proximo_intento', 'id'],
+                name='evento_salida_pendientes_idx',
+                condition=Q(estado='pendiente'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} por {self.canal} ({self.estado})"
+
+
+class Tarea(models.Model):
+    """
+    Tarea en segundo plano, ejecutada por el comando `procesar_tareas` (ver
+    tareas.py). La cola vive en la misma base de datos: no requiere broker.
+    """
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_curso', 'En curso'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+        ('cancelada', 'Cancelada'),
+    ]
+
+    nombre = models.CharField(max_length=100)
+    argumentos = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    cola = models.CharField(max_length=50, default='default')
+    prioridad = models.SmallIntegerField(default=0, help_text="Mayor prioridad se ejecuta antes")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    maximo_intentos = models.PositiveSmallIntegerField(default=3)
+    ejecutar_desde = models.DateTimeField(default=now)
+    programada = models.ForeignKey(
+        'TareaProgramada', on_delete=models.SET_NULL, null=True, blank=True, related_name='tareas'
+    )
+    trabajador = models.CharField(max_length=100, blank=True, default='')
+    resultado = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    ultimo_error = models.TextField(blank=True, default='')
+    creada_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    creada_en = models.DateTimeField(auto_now_add=True)
+    iniciada_en = models.DateTimeField(null=True, blank=True)
+    vence_en = models.DateTimeField(null=True, blank=True)
+    terminada_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tarea"
+        verbose_name_plural = "Tareas"
+        indexes = [
+            # Solo las pendientes, en el orden en que se toman
+            models.Index(
+                F('prioridad').desc(), 'ejecutar_desde', 'id',
+                name='tarea_pendientes_idx',
+                condition=Q(estado='pendiente'),
+            ),
+            models.Index(fields=['cola'], name='tarea_en_curso_cola_idx', condition=Q(estado='en_curso')),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} #{self.id} ({self.estado})"
+
+
+class TareaProgramada(models.Model):
+    """
+    Tarea recurrente: el planificador del comando `procesar_tareas` encola una
+    `Tarea` cada `intervalo_segundos`. Las filas se crean desde
+    `TAREAS_PROGRAMADAS` en settings.
+    """
+    nombre = models.CharField(max_length=100, unique=True)
+    tarea = models.CharField(max_length=100)
+    argumentos = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    intervalo_segundos = models.PositiveIntegerField()
+    activa = models.BooleanField(default=True)
+    proxima_ejecucion = models.DateTimeField(default=now)
+    ultima_ejecucion = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tarea Programada"
+        verbose_name_plural = "Tareas Programadas"
 
     def __str__(self):
-        return f"{self.reporte.id}: {self.estado_anterior} → {self.estado_nuevo} ({self.fecha.date()})"
+        return f"{self.nombre} (cada {self.intervalo_segundos} s)"
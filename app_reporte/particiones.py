@@ -0,0 +1,73 @@
+"""
+Mantenimiento de las particiones anuales del historial de estados (solo PostgreSQL).
+
+La tabla de `HistorialEstadoReporte` está particionada por rango de `fecha`
+(migración 0019): una partición `<tabla>_<año>` por año y `<tabla>_default` para
+fechas sin partición. Crear las particiones antes de que empiece el año mantiene
+la partición por defecto vacía; desvincular las de años antiguos las deja como
+tablas independientes que se pueden respaldar y eliminar sin recorrer la tabla
+principal.
+"""
+from django.db import connection, transaction
+
+from .models import HistorialEstadoReporte
+
+TABLA_HISTORIAL = HistorialEstadoReporte._meta.db_table
+
+
+def tabla_particionada(tabla=TABLA_HISTORIAL):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [tabla])
+        fila = cursor.fetchone()
+    return fila is not None and fila[0] == 'p'
+
+
+def anios_particionados(tabla=TABLA_HISTORIAL):
+    """Años con partición propia, de menor a mayor."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass", [tabla]
+        )
+        nombres = [fila[0] for fila in cursor.fetchall()]
+    prefijo = f'{tabla}_'
+    return sorted(int(n[len(prefijo):]) for n in nombres if n[len(prefijo):].isdigit())
+
+
+def _rango(anio):
+    return f"'{anio}-01-01 00:00:00+00'", f"'{anio + 1}-01-01 00:00:00+00'"
+
+
+def crear_particion(anio, tabla=TABLA_HISTORIAL):
+    """
+    Crea la partición del año. Si la partición por defecto ya tiene filas de ese
+    año, se mueven a la nueva partición. Retorna False si ya existía.
+    """
+    if anio in anios_particionados(tabla):
+        return False
+    desde, hasta = _rango(anio)
+    por_defecto = f'{tabla}_default'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {por_defecto} WHERE fecha >= {desde} AND fecha < {hasta})")
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"CREATE TABLE {tabla}_{anio} PARTITION OF {tabla} FOR VALUES FROM ({desde}) TO ({hasta})")
+            return True
+        cursor.execute(f"ALTER TABLE {tabla} DETACH PARTITION {por_defecto}")
+        cursor.execute(f"CREATE TABLE {tabla}_{anio} PARTITION OF {tabla} FOR VALUES FROM ({desde}) TO ({hasta})")
+        cursor.execute(f"INSERT INTO {tabla} SELECT * FROM {por_defecto} WHERE fecha >= {desde} AND fecha < {hasta}")
+        cursor.execute(f"DELETE FROM {por_defecto} WHERE fecha >= {desde} AND fecha < {hasta}")
+        cursor.execute(f"ALTER TABLE {tabla} ATTACH PARTITION {por_defecto} DEFAULT")
+    return True
+
+
+def desvincular_particion(anio, eliminar=False, tabla=TABLA_HISTORIAL):
+    """
+    Separa la partición del año de la tabla principal; sus filas dejan de verse
+    desde la aplicación. Con `eliminar=True` además se borra la tabla.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {tabla} DETACH PARTITION {tabla}_{anio}")
+        if eliminar:
+            cursor.execute(f"DROP TABLE {tabla}_{anio}")
@@ -4,6 +4,16 @@ Definiciones de permisos de acceso para vistas
 from rest_framework import permissions
 from .models import OrganismoResponsable
 
+
+def organismos_del_usuario(user):
+    """
+    Retorna el queryset de organismos responsables a los que pertenece el usuario.
+    La pertenencia se define por grupos con el mismo nombre que el organismo.
+    """
+    grupos_usuario = user.groups.values_list('name', flat=True)
+    return OrganismoResponsable.objects.filter(nombre__in=grupos_usuario)
+
+
 class EsAdmin(permissions.BasePermission):
     """
     Define un permiso solo para administradores (Grupo)
@@ -0,0 +1,111 @@
+"""
+Proyección de campos (`?fields=`) y expansión de relaciones (`?expand=`).
+
+- `?fields=id,nombre_corto` limita la respuesta a esos campos y la consulta a
+  esas columnas (`only()`).
+- `?expand=plan,organismos` reemplaza los IDs de esas relaciones por los objetos
+  serializados. Las relaciones expandibles se declaran en `Meta.expandibles` de
+  cada serializer (ver `ProyeccionMixin` en serializers.py).
+- Ambos admiten rutas con punto para relaciones anidadas:
+  `?expand=medida.plan&fields=id,estado,medida.nombre_corto,medida.plan`.
+
+Las relaciones muchos a muchos y las expandidas se cargan con `Prefetch`, una
+consulta por relación sin importar la cantidad de filas, ordenadas por ID.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class CamposInvalidos(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_code = 'campos_invalidos'
+
+    def __init__(self, mensaje):
+        super().__init__({"error": mensaje})
+
+
+def _rutas(valor):
+    return [ruta.strip().split('.') for ruta in (valor or '').split(',') if ruta.strip()]
+
+
+class Proyeccion:
+    """Campos (None: todos) y relaciones expandidas de un nivel de la respuesta."""
+
+    def __init__(self, campos=None, expandir=None):
+        self.campos = campos
+        self.expandir = expandir or {}
+
+    @classmethod
+    def desde_request(cls, request, serializer_class):
+        """Interpreta `fields` y `expand` de la consulta; lanza `CamposInvalidos` si no corresponden al serializer."""
+        raiz = cls()
+        for ruta in _rutas(request.GET.get('expand')):
+            nodo = raiz
+            for nombre in ruta:
+                nodo = nodo.expandir.setdefault(nombre, cls())
+        for ruta in _rutas(request.GET.get('fields')):
+            nodo = raiz
+            for nombre in ruta[:-1]:
+                if nombre not in nodo.expandir:
+                    raise CamposInvalidos(f"Para pedir '{'.'.join(ruta)}' debe expandir '{nombre}' con ?expand=.")
+                nodo = nodo.expandir[nombre]
+            if nodo.campos is None:
+                nodo.campos = set()
+            nodo.campos.add(ruta[-1])
+        raiz.validar(serializer_class)
+        return raiz
+
+    def validar(self, serializer_class, prefijo=''):
+        disponibles = set(serializer_class().fields)
+        if self.campos is not None:
+            invalidos = sorted(self.campos - disponibles)
+            if invalidos:
+                raise CamposInvalidos(
+                    f"Campos inválidos: {', '.join(prefijo + c for c in invalidos)}. "
+                    f"Disponibles: {', '.join(sorted(disponibles))}."
+                )
+        expandibles = serializer_class.expandibles()
+        for nombre, sub in self.expandir.items():
+            if nombre not in expandibles:
+                raise CamposInvalidos(
+                    f"No se puede expandir '{prefijo + nombre}'. "
+                    f"Expandibles: {', '.join(sorted(expandibles)) or 'ninguno'}."
+                )
+            sub.validar(expandibles[nombre], f"{prefijo}{nombre}.")
+
+    def incluye(self, nombre):
+        return self.campos is None or nombre in self.campos or nombre in self.expandir
+
+    def optimizar(self, queryset, serializer_class, necesarios=()):
+        """
+        Ajusta `queryset` a lo que se va a serializar: solo las columnas pedidas
+        (más `necesarios`, campos que la vista lee para filtrar) y un `Prefetch`
+        por relación muchos a muchos o expandida.
+        """
+        modelo = queryset.model
+        campos_serializer = serializer_class().fields
+        expandibles = serializer_class.expandibles()
+        columnas = {modelo._meta.pk.name, *(n for n in necesarios if n not in campos_serializer)}
+        prefetches = []
+        for nombre, campo in campos_serializer.items():
+            if not (self.incluye(nombre) or nombre in necesarios):
+                continue
+            try:
+                campo_modelo = modelo._meta.get_field(campo.source)
+            except FieldDoesNotExist:
+                continue
+            if not campo_modelo.concrete and not campo_modelo.many_to_many:
+                continue
+            if not campo_modelo.many_to_many:
+                columnas.add(campo_modelo.name)
+            if nombre in self.expandir:
+                sub = self.expandir[nombre]
+                relacionados = sub.optimizar(campo_modelo.related_model.objects.order_by('pk'), expandibles[nombre])
+                prefetches.append(Prefetch(campo_modelo.name, queryset=relacionados))
+            elif campo_modelo.many_to_many:
+                prefetches.append(Prefetch(campo_modelo.name, queryset=campo_modelo.related_model.objects.only('pk').order_by('pk')))
+        if self.campos is not None:
+            queryset = queryset.only(*columnas)
+        return queryset.prefetch_related(*prefetches)
@@ -0,0 +1,141 @@
+"""
+Reenvío de reportes (upsert).
+
+Un organismo puede enviar un solo reporte por medida y día
+(`unique_reporte_medida_organismo_fecha`). En modo reenvío, un segundo envío el
+mismo día reemplaza la descripción, el archivo y el medio de verificación del
+reporte existente mientras siga pendiente, y deja constancia en el historial.
+Un reenvío sin archivo conserva el anterior; si trae uno nuevo, el reemplazado
+se elimina del almacenamiento al confirmar la transacción.
+
+En PostgreSQL se resuelve con un único `INSERT ... ON CONFLICT DO UPDATE`, sin
+consultar antes si el reporte existe; `xmax = 0` en la fila retornada indica que
+fue una inserción, y la subconsulta sobre la misma fila entrega el archivo
+anterior (ve la fila como estaba antes de la sentencia). Si el reporte ya fue
+revisado la sentencia no retorna filas.
+"""
+from datetime import date
+
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from . import busqueda, contadores, resultados, salida
+from .models import EstadoReporteField, HistorialEstadoReporte, Reporte
+
+SQL_REENVIO_POSTGRES = """
+INSERT INTO {tabla} AS r
+    (medida_id, organismo_id, fecha_envio, descripcion, archivo, medio_verificacion_id,
+     estado, created_at, updated_at, created_by_id, updated_by_id)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (medida_id, organismo_id, fecha_envio) DO UPDATE
+SET descripcion = EXCLUDED.descripcion,
+    archivo = COALESCE(EXCLUDED.archivo, r.archivo),
+    medio_verificacion_id = EXCLUDED.medio_verificacion_id,
+    updated_at = EXCLUDED.updated_at,
+    updated_by_id = EXCLUDED.updated_by_id
+WHERE r.estado = %s
+RETURNING r.id, (r.xmax = 0) AS insertado, (SELECT archivo FROM {tabla} WHERE id = r.id) AS archivo_anterior
+"""
+
+
+class ReporteYaRevisado(Exception):
+    """El reporte del día existe y ya no está pendiente."""
+
+
+def guardar_archivo(archivo):
+    """Guarda el archivo subido en el almacenamiento del campo y retorna su nombre."""
+    if not archivo:
+        return None
+    campo = Reporte._meta.get_field('archivo')
+    nombre = campo.generate_filename(None, archivo.name)
+    return campo.storage.save(nombre, archivo, max_length=campo.max_length)
+
+
+def _upsert_postgres(valores):
+    pendiente = EstadoReporteField.CODIGOS['pendiente']
+    with connection.cursor() as cursor:
+        cursor.execute(
+            SQL_REENVIO_POSTGRES.format(tabla=connection.ops.quote_name(Reporte._meta.db_table)),
+            [
+                valores['medida_id'], valores['organismo_id'], valores['fecha_envio'],
+                valores['descripcion'], valores['archivo'], valores['medio_verificacion_id'],
+                pendiente, valores['ahora'], valores['ahora'], valores['usuario_id'], valores['usuario_id'],
+                pendiente,
+            ]
+        )
+        return cursor.fetchone()
+
+
+def _upsert_generico(valores):
+    reporte = (
+        Reporte.objects.select_for_update()
+        .filter(medida_id=valores['medida_id'], organismo_id=valores['organismo_id'], fecha_envio=valores['fecha_envio'])
+        .first()
+    )
+    campos = {
+        'descripcion': valores['descripcion'],
+        'medio_verificacion_id': valores['medio_verificacion_id'],
+        'updated_at': valores['ahora'], 'updated_by_id': valores['usuario_id'],
+    }
+    if valores['archivo']:
+        campos['archivo'] = valores['archivo']
+    if reporte is None:
+        reporte = Reporte.objects.create(
+            medida_id=valores['medida_id'], organismo_id=valores['organismo_id'],
+            created_by_id=valores['usuario_id'], **campos
+        )
+        # auto_now_add fija la fecha al crear; se respeta la usada en la búsqueda
+        Reporte.objects.filter(pk=reporte.pk).update(fecha_envio=valores['fecha_envio'])
+        return reporte.pk, True, None
+    if reporte.estado != 'pendiente':
+        return None
+    Reporte.objects.filter(pk=reporte.pk).update(**campos)
+    return reporte.pk, False, reporte.archivo.name
+
+
+def reenviar_reporte(datos, usuario):
+    """
+    Crea el reporte del día o reemplaza el existente si sigue pendiente.
+    `datos` son los datos validados del serializer. Retorna (reporte, creado) o
+    lanza `ReporteYaRevisado`.
+    """
+    medio = datos.get('medio_verificacion')
+    valores = {
+        'medida_id': datos['medida'].pk,
+        'organismo_id': datos['organismo'].pk,
+        'fecha_envio': date.today(),
+        'descripcion': datos.get('descripcion'),
+        'archivo': guardar_archivo(datos.get('archivo')),
+        'medio_verificacion_id': medio.pk if medio else None,
+        'ahora': now(),
+        'usuario_id': usuario.pk,
+    }
+    try:
+        with transaction.atomic():
+            upsert = _upsert_postgres if connection.vendor == 'postgresql' else _upsert_generico
+            fila = upsert(valores)
+            if fila is None:
+                raise ReporteYaRevisado()
+            id_reporte, creado, archivo_anterior = fila
+            if valores['archivo'] and archivo_anterior and archivo_anterior != valores['archivo']:
+                almacenamiento = Reporte._meta.get_field('archivo').storage
+                transaction.on_commit(lambda: almacenamiento.delete(archivo_anterior))
+            busqueda.actualizar_vector_reporte([id_reporte])
+            # El upsert no pasa por save(), así que no llegan las señales
+            resultados.invalidar_al_confirmar(valores['organismo_id'])
+            reporte = Reporte.objects.get(pk=id_reporte)
+            salida.registrar(
+                salida.REPORTE_CREADO if creado else salida.REPORTE_REENVIADO, salida.datos_reporte(reporte)
+            )
+            if creado:
+                contadores.registrar_creacion(reporte)
+            else:
+                # Reenvío: el reporte sigue pendiente y el tiempo de revisión se reinicia
+                HistorialEstadoReporte.objects.create(
+                    reporte=reporte, estado_anterior='pendiente', estado_nuevo='pendiente', created_by=usuario
+                )
+    except Exception:
+        if valores['archivo']:
+            Reporte._meta.get_field('archivo').storage.delete(valores['archivo'])
+        raise
+    return reporte, creado
@@ -0,0 +1,110 @@
+"""
+Paquete de datos de referencia para el arranque de los frontends.
+
+Reúne en un solo documento los catálogos (regiones, ciudades, comunas, organismos,
+planes y medidas) y las opciones (`choices`) de los modelos, con el mismo formato
+de los endpoints individuales pero sin los contadores de reportes, que cambian con
+cada revisión. Se construye una vez, se guarda comprimido con gzip en la caché
+junto con el SHA-256 del JSON (que sirve de ETag y de versión) y se invalida con
+las señales de los modelos involucrados.
+
+Cada invalidación cambia la generación del paquete: una construcción que empezó
+antes de un cambio queda guardada bajo la generación anterior y no se sirve.
+"""
+import gzip
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from .contadores import CAMPOS_CONTADOR
+from .models import Ciudad, Comuna, Medida, MedioVerificacion, OrganismoResponsable, PlanPPDA, Region, Reporte
+from .serializers import (
+    CiudadSerializer, ComunaSerializer, MedidaSerializer, OrganismoResponsableSerializer, PlanPPDASerializer,
+    RegionSerializer,
+)
+
+CLAVE_GENERACION = 'referencia:generacion'
+CLAVE_PAQUETE = 'referencia:paquete:{generacion}'
+
+MODELOS = (Region, Ciudad, Comuna, OrganismoResponsable, PlanPPDA, Medida)
+
+OPCIONES = {
+    'medida': {
+        'frecuencia_reporte': Medida.FRECUENCIA_CHOICES,
+        'tipo_medida': Medida.TIPO_MEDIDA_CHOICES,
+    },
+    'medio_verificacion': {
+        'tipo': MedioVerificacion.TIPO_MEDIO_CHOICES,
+    },
+    'reporte': {
+        'estado': Reporte.ESTADOS_REPORTE,
+    },
+}
+
+
+def _sin_contadores(filas):
+    for fila in filas:
+        for campo in CAMPOS_CONTADOR.values():
+            fila.pop(campo, None)
+    return filas
+
+
+def datos():
+    """Contenido del paquete como estructura de Python."""
+    return {
+        'regiones': RegionSerializer(Region.objects.order_by('id'), many=True).data,
+        'ciudades': CiudadSerializer(Ciudad.objects.order_by('id'), many=True).data,
+        'comunas': ComunaSerializer(Comuna.objects.order_by('id'), many=True).data,
+        'organismos': _sin_contadores(
+            OrganismoResponsableSerializer(OrganismoResponsable.objects.order_by('id'), many=True).data
+        ),
+        'planes': PlanPPDASerializer(PlanPPDA.objects.prefetch_related('comunas').order_by('id'), many=True).data,
+        'medidas': _sin_contadores(
+            MedidaSerializer(Medida.objects.prefetch_related('organismos').order_by('id'), many=True).data
+        ),
+        'opciones': {
+            modelo: {
+                campo: [{'valor': valor, 'etiqueta': etiqueta} for valor, etiqueta in opciones]
+                for campo, opciones in campos.items()
+            }
+            for modelo, campos in OPCIONES.items()
+        },
+    }
+
+
+def construir():
+    """Retorna (version, json_gzip): el SHA-256 del JSON y el JSON comprimido."""
+    contenido = JSONRenderer().render(datos())
+    # mtime fijo para que el mismo contenido produzca los mismos bytes
+    return hashlib.sha256(contenido).hexdigest(), gzip.compress(contenido, compresslevel=9, mtime=0)
+
+
+def _generacion():
+    generacion = cache.get(CLAVE_GENERACION)
+    if generacion is None:
+        cache.add(CLAVE_GENERACION, uuid.uuid4().hex, None)
+        generacion = cache.get(CLAVE_GENERACION)
+    return generacion
+
+
+def obtener():
+    """Paquete vigente (version, json_gzip), construyéndolo si no está en la caché."""
+    clave = CLAVE_PAQUETE.format(generacion=_generacion())
+    paquete = cache.get(clave)
+    if paquete is None:
+        paquete = construir()
+        cache.set(clave, paquete, settings.REFERENCIA_CACHE_SEGUNDOS)
+    return paquete
+
+
+def invalidar(*args, **kwargs):
+    """Descarta el paquete vigente, ahora y al confirmar la transacción en curso."""
+    def nueva_generacion():
+        cache.set(CLAVE_GENERACION, uuid.uuid4().hex, None)
+
+    nueva_generacion()
+    transaction.on_commit(nueva_generacion)
@@ -0,0 +1,43 @@
+"""
+Utilidades de las migraciones que pasan los estados de texto a códigos enteros
+(0021 para el historial, 0023 para los reportes).
+
+Los códigos se fijan aquí y no se leen de `EstadoReporteField`, para que las
+migraciones sigan haciendo lo mismo aunque el modelo cambie.
+"""
+TAMANO_LOTE = 10000
+CODIGOS = {'aprobado': 1, 'pendiente': 2, 'rechazado': 3}
+
+
+def lotes(schema_editor, tabla):
+    """Rangos (desde, hasta] de IDs de `tabla` de a `TAMANO_LOTE`."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT MIN(id), MAX(id) FROM {tabla}")
+        minimo, maximo = cursor.fetchone()
+    if minimo is None:
+        return
+    for desde in range(minimo - 1, maximo, TAMANO_LOTE):
+        yield desde, desde + TAMANO_LOTE
+
+
+def caso(columna, pares):
+    condiciones = " ".join(f"WHEN {origen} THEN {destino}" for origen, destino in pares)
+    return f"CASE {columna} {condiciones} END"
+
+
+def validar_estados(modelo, *campos):
+    """
+    Detiene la migración si algún campo de `campos` tiene un estado sin código:
+    el CASE lo dejaría nulo y la columna no se podría hacer obligatoria después.
+    Se llama antes de modificar la tabla, para que baste corregir esas filas y
+    volver a migrar.
+    """
+    validos = list(CODIGOS)
+    invalidos = modelo.objects.exclude(**{f'{campo}__in': validos for campo in campos})
+    cantidad = invalidos.count()
+    if cantidad:
+        ejemplos = list(invalidos.order_by('id').values_list('id', *campos)[:10])
+        raise RuntimeError(
+            f"{cantidad} filas de {modelo._meta.db_table} tienen estados fuera de {validos}, por ejemplo "
+            f"(id, {', '.join(campos)}): {ejemplos}. Corríjalas antes de aplicar la migración."
+        )
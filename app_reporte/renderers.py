@@ -0,0 +1,119 @@
+"""
+Renderers de la API.
+
+- `JSONRapidoRenderer`: el JSON de DRF codificado con orjson cuando está
+  instalado. Los tipos que orjson no conoce o que DRF representa distinto
+  (fechas, Decimal, lazy strings) pasan por el mismo `default` que usa el
+  encoder de DRF, así que el resultado es idéntico byte a byte al de
+  `JSONRenderer` (salvo NaN e infinito, que orjson escribe como null). Sin
+  orjson, o con indentación pedida, usa `JSONRenderer`.
+- `MessagePackRenderer`: `application/msgpack` para clientes que lo pidan en
+  `Accept` o con `?format=msgpack`. Solo se habilita si `msgpack` está instalado.
+- `ColumnarRenderer`: listados por columnas con `?format=columnar` (ver
+  `a_columnas`).
+
+`REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']` en settings los habilita; el
+navegable de DRF solo se incluye con DEBUG.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    # Como JSONRenderer, escapa U+2028 y U+2029 para que el JSON sea JavaScript válido
+    _SEPARADORES_JS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            contenido = orjson.dumps(
+                data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            )
+        except (TypeError, orjson.JSONEncodeError):
+            # Enteros de más de 64 bits u otros casos que orjson rechaza
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80' in contenido:
+            for caracter, escape in self._SEPARADORES_JS:
+                contenido = contenido.replace(caracter, escape)
+        return contenido
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+def _codificar_diccionario(valores):
+    """
+    (diccionario, índices) si la columna es de textos con repeticiones (a lo más
+    la mitad de valores distintos), o None. Los nulos se mantienen como null.
+    """
+    posiciones = {}
+    for valor in valores:
+        if valor is not None:
+            if not isinstance(valor, str):
+                return None
+            posiciones.setdefault(valor, len(posiciones))
+    if not posiciones or len(posiciones) * 2 > len(valores):
+        return None
+    return list(posiciones), [None if valor is None else posiciones[valor] for valor in valores]
+
+
+def a_columnas(filas):
+    """
+    Lista de objetos de un mismo serializer a formato columnar:
+    `{"filas": n, "columnas": {"id": [...], "estado": [0, 1, 0]}, "diccionarios": {"estado": ["pendiente", "aprobado"]}}`.
+    Cada nombre de campo aparece una vez; las columnas de textos repetidos
+    (estado, tipo_medida, ...) llevan índices a su lista en `diccionarios`.
+    """
+    columnas, diccionarios = {}, {}
+    for clave in (filas[0] if filas else ()):
+        valores = [fila[clave] for fila in filas]
+        codificada = _codificar_diccionario(valores)
+        if codificada is not None:
+            diccionarios[clave], valores = codificada
+        columnas[clave] = valores
+    return {'filas': len(filas), 'columnas': columnas, 'diccionarios': diccionarios}
+
+
+class ColumnarRenderer(JSONRapidoRenderer):
+    """
+    JSON por columnas para consumidores masivos (`?format=columnar`). Se aplica
+    a listados, paginados (`results`) o no; cualquier otra respuesta, como los
+    errores, se entrega como JSON normal.
+    """
+    media_type = 'application/vnd.sna.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list):
+            data = a_columnas(data)
+        elif isinstance(data, dict) and isinstance(data.get('results'), list):
+            data = {**data, 'results': a_columnas(data['results'])}
+        return super().render(data, accepted_media_type, renderer_context)
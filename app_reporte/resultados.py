@@ -0,0 +1,101 @@
+"""
+Caché de resultados del listado de reportes (`GET /api/reportes/`).
+
+La respuesta completa de una página se guarda bajo una clave que resume todos
+los parámetros de la consulta y el alcance del usuario (todos los organismos
+para superusuarios, o los suyos). Los parámetros se toman como DRF arma los
+enlaces `next` y `previous` (sin importar el orden, sin valores vacíos y con
+`page=1` igual a no indicar página), de modo que una respuesta guardada solo se
+sirve a consultas que habrían recibido los mismos enlaces. Junto a la respuesta se guardan las versiones de
+los organismos que cubre. Cada alta, modificación o eliminación de un reporte
+cambia la versión de su organismo y la global (ver `invalidar_al_confirmar`), y
+una respuesta guardada con otras versiones no se sirve. La respuesta y las
+versiones se leen en una sola consulta a la caché (`get_many`).
+
+Las versiones son tokens aleatorios y no contadores: si la caché descarta una
+versión, la nueva no puede coincidir con la de una respuesta guardada antes.
+Las respuestas con relaciones expandidas (`expand`) no se guardan, porque
+incluyen medidas y organismos que cambian sin tocar los reportes.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .permisos import organismos_del_usuario
+
+CLAVE_VERSION = 'reportes:version:{organismo}'
+CLAVE_RESULTADO = 'reportes:listado:{resumen}'
+TODOS = 'todos'
+
+def _nueva_version():
+    return uuid.uuid4().hex
+
+
+def invalidar(organismo_ids):
+    """Cambia la versión de los organismos y la global."""
+    claves = [CLAVE_VERSION.format(organismo=o) for o in {*organismo_ids, TODOS}]
+    cache.set_many({clave: _nueva_version() for clave in claves}, None)
+
+
+def invalidar_al_confirmar(*organismo_ids):
+    """
+    Invalida ahora y otra vez al confirmar la transacción en curso: una lectura
+    concurrente anterior a la confirmación puede haber guardado los datos sin el
+    cambio con la versión nueva.
+    """
+    invalidar(organismo_ids)
+    transaction.on_commit(lambda: invalidar(organismo_ids))
+
+
+def parametros_consulta(request):
+    parametros = {}
+    for nombre, valores in request.GET.lists():
+        valores = [valor for valor in valores if valor]
+        if valores:
+            parametros[nombre] = valores
+    if parametros.get('page') == ['1']:
+        del parametros['page']
+    return parametros
+
+
+class Consulta:
+    """Entrada de la caché para el listado que pide `request`."""
+
+    def __init__(self, request):
+        parametros = parametros_consulta(request)
+        if request.user.is_superuser:
+            alcance = TODOS
+            organismo = request.GET.get('organismo', '')
+            cubiertos = [int(organismo)] if organismo.isdigit() else [TODOS]
+        else:
+            alcance = sorted(organismos_del_usuario(request.user).values_list('id', flat=True))
+            cubiertos = alcance
+        material = json.dumps(
+            # La URL base forma parte de la respuesta (enlaces next y previous)
+            [request.build_absolute_uri(request.path), parametros, alcance], sort_keys=True
+        )
+        self.clave = CLAVE_RESULTADO.format(resumen=hashlib.sha256(material.encode()).hexdigest())
+        self.claves_version = [CLAVE_VERSION.format(organismo=o) for o in cubiertos]
+        self.versiones = None
+
+    def obtener(self):
+        """La respuesta guardada si sigue vigente, o None."""
+        encontrados = cache.get_many([self.clave, *self.claves_version])
+        faltantes = {clave: _nueva_version() for clave in self.claves_version if clave not in encontrados}
+        for clave, version in faltantes.items():
+            # add: si otro proceso la creó antes, se usa la suya
+            if not cache.add(clave, version, None):
+                faltantes[clave] = cache.get(clave)
+        self.versiones = {clave: encontrados.get(clave) or faltantes[clave] for clave in self.claves_version}
+        guardado = encontrados.get(self.clave)
+        if guardado is not None and guardado['versiones'] == self.versiones:
+            return guardado['datos']
+        return None
+
+    def guardar(self, datos):
+        """Guarda `datos` con las versiones leídas en `obtener()` (antes de consultar la base)."""
+        cache.set(self.clave, {'versiones': self.versiones, 'datos': datos}, settings.RESULTADOS_REPORTES_SEGUNDOS)
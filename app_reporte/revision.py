@@ -0,0 +1,78 @@
+"""
+Cola de revisión de reportes pendientes.
+
+Cada administrador reclama los próximos N reportes pendientes (los más antiguos
+primero) y los retiene durante `REVISION_DURACION_RECLAMO` minutos. La selección
+usa `SELECT ... FOR UPDATE SKIP LOCKED`: dos revisores que reclaman a la vez no
+se esperan entre sí y reciben lotes disjuntos. Si el reclamo vence sin que el
+reporte cambie de estado, vuelve a la cola.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from .models import Reporte
+
+MAXIMO_RECLAMO = 50
+
+
+def vencimiento(desde=None):
+    return (desde or now()) + timedelta(minutes=settings.REVISION_DURACION_RECLAMO)
+
+
+def disponibles(usuario, ahora):
+    """
+    Pendientes sin reclamo vigente de otro revisor (los propios se renuevan). Un
+    reclamo cuyo revisor fue eliminado (`reclamado_por` nulo) no cuenta.
+    """
+    return Reporte.objects.filter(estado='pendiente').filter(
+        Q(reclamado_hasta__isnull=True) | Q(reclamado_hasta__lte=ahora)
+        | Q(reclamado_por__isnull=True) | Q(reclamado_por=usuario)
+    )
+
+
+def reclamo_ajeno(reporte, usuario, ahora=None):
+    """True si otro usuario (que aún existe) tiene un reclamo vigente sobre el reporte."""
+    return (
+        reporte.reclamado_hasta is not None
+        and reporte.reclamado_hasta > (ahora or now())
+        and reporte.reclamado_por_id is not None
+        and reporte.reclamado_por_id != usuario.pk
+    )
+
+
+def reclamar_reportes(usuario, cantidad, organismo_id=None):
+    """
+    Reclama hasta `cantidad` reportes pendientes para `usuario` y retorna sus ids
+    en orden de revisión. Las filas bloqueadas por otro reclamo en curso se omiten
+    en lugar de esperar.
+    """
+    ahora = now()
+    with transaction.atomic():
+        queryset = disponibles(usuario, ahora)
+        if organismo_id is not None:
+            queryset = queryset.filter(organismo_id=organismo_id)
+        ids = list(
+            queryset.select_for_update(skip_locked=True)
+            .order_by('fecha_envio', 'id')
+            .values_list('id', flat=True)[:cantidad]
+        )
+        if ids:
+            Reporte.objects.filter(pk__in=ids).update(
+                reclamado_por=usuario, reclamado_hasta=vencimiento(ahora)
+            )
+    return ids
+
+
+def liberar_reportes(usuario, ids=None):
+    """
+    Devuelve a la cola los reportes reclamados por `usuario` (todos, o solo los de
+    `ids`). Retorna la cantidad liberada.
+    """
+    queryset = Reporte.objects.filter(reclamado_por=usuario)
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return queryset.update(reclamado_por=None, reclamado_hasta=None)
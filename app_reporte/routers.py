@@ -0,0 +1,105 @@
+"""
+Enrutamiento de lecturas hacia réplicas de solo lectura.
+
+Las escrituras siempre van a `default`. Las lecturas van a una réplica salvo que:
+- la petición esté fijada a la base principal (el cliente escribió hace poco, ver
+  `PrimariaTrasEscrituraMiddleware`, o se usa `usar_primaria()`),
+- haya una transacción abierta en `default` (para leer lo que se acaba de escribir), o
+- ninguna réplica tenga un retraso menor a `REPLICA_RETRASO_MAXIMO`.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+_primaria_fijada = ContextVar('primaria_fijada', default=False)
+
+_retrasos = {}
+_candado = threading.Lock()
+
+SQL_RETRASO_POSTGRES = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def primaria_fijada():
+    return _primaria_fijada.get()
+
+
+def fijar_primaria(valor=True):
+    """Fija (o libera) la base principal para el contexto actual. Retorna el token para restaurar."""
+    return _primaria_fijada.set(valor)
+
+
+def restaurar(token):
+    _primaria_fijada.reset(token)
+
+
+@contextmanager
+def usar_primaria():
+    """Lee desde la base principal dentro del bloque."""
+    token = fijar_primaria()
+    try:
+        yield
+    finally:
+        restaurar(token)
+
+
+def medir_retraso(alias):
+    """Segundos de retraso de la réplica respecto a la principal; infinito si no responde."""
+    conexion = connections[alias]
+    if conexion.vendor != 'postgresql':
+        return 0.0
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute(SQL_RETRASO_POSTGRES)
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        return float('inf')
+
+
+def retraso_replica(alias):
+    """Retraso de la réplica, medido como máximo una vez por `REPLICA_INTERVALO_VERIFICACION` segundos."""
+    ahora = time.monotonic()
+    medicion = _retrasos.get(alias)
+    if medicion is None or ahora - medicion[1] >= settings.REPLICA_INTERVALO_VERIFICACION:
+        with _candado:
+            medicion = _retrasos.get(alias)
+            if medicion is None or ahora - medicion[1] >= settings.REPLICA_INTERVALO_VERIFICACION:
+                medicion = (medir_retraso(alias), ahora)
+                _retrasos[alias] = medicion
+    return medicion[0]
+
+
+def replicas_disponibles():
+    return [
+        alias for alias in settings.REPLICAS_LECTURA
+        if retraso_replica(alias) <= settings.REPLICA_RETRASO_MAXIMO
+    ]
+
+
+class RouterReplicas:
+    def db_for_read(self, model, **hints):
+        if not settings.REPLICAS_LECTURA or primaria_fijada():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        disponibles = replicas_disponibles()
+        return random.choice(disponibles) if disponibles else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas contienen los mismos datos que la principal
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICAS_LECTURA
@@ -0,0 +1,166 @@
+"""
+Bandeja de salida (outbox) de eventos de reportes.
+
+Las vistas registran los eventos con `registrar` dentro de la misma transacción
+que el cambio del reporte: si la transacción se revierte, el evento no existe, y
+si se confirma, el evento se entregará aunque el proceso termine justo después.
+Las vistas no hacen llamadas de red.
+
+El comando `despachar_eventos` toma lotes de eventos pendientes con
+`FOR UPDATE SKIP LOCKED` (varios workers se reparten la bandeja sin esperarse) y
+los entrega por canal:
+- `webhook`: un POST JSON por lote a `SALIDA_WEBHOOK_URL`, firmado con HMAC-SHA256
+  si hay `SALIDA_WEBHOOK_SECRETO`.
+- `email`: un correo por evento a `SALIDA_EMAIL_DESTINATARIOS`, usando una sola
+  conexión SMTP por lote. Solo para cambios de estado.
+
+Los fallos se reintentan con espera exponencial y, tras `SALIDA_MAXIMO_INTENTOS`,
+el evento queda `fallido`. La entrega es "al menos una vez": el receptor debe
+ignorar ids repetidos.
+"""
+import hashlib
+import hmac
+import json
+import random
+import urllib.request
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from .models import EventoSalida
+
+REPORTE_CREADO = 'reporte.creado'
+REPORTE_REENVIADO = 'reporte.reenviado'
+REPORTE_ESTADO_CAMBIADO = 'reporte.estado_cambiado'
+
+TIPOS_EMAIL = (REPORTE_ESTADO_CAMBIADO,)
+
+
+def canales_para(tipo):
+    canales = []
+    if settings.SALIDA_WEBHOOK_URL:
+        canales.append('webhook')
+    if settings.SALIDA_EMAIL_DESTINATARIOS and tipo in TIPOS_EMAIL:
+        canales.append('email')
+    return canales
+
+
+def registrar(tipo, datos):
+    """Agrega el evento a la bandeja, una fila por canal configurado. Llamar dentro de la transacción del cambio."""
+    canales = canales_para(tipo)
+    if canales:
+        EventoSalida.objects.bulk_create([EventoSalida(tipo=tipo, canal=canal, datos=datos) for canal in canales])
+
+
+def datos_reporte(reporte):
+    return {
+        'reporte': reporte.id,
+        'organismo': reporte.organismo_id,
+        'medida': reporte.medida_id,
+        'fecha_envio': reporte.fecha_envio,
+        'estado': reporte.estado,
+    }
+
+
+def espera(intentos):
+    """Segundos antes del próximo intento, con ±10 % de variación para no sincronizar reintentos."""
+    base = min(settings.SALIDA_ESPERA_BASE * 2 ** (intentos - 1), settings.SALIDA_ESPERA_MAXIMA)
+    return base * random.uniform(0.9, 1.1)
+
+
+def _cuerpo_evento(evento):
+    return {'id': evento.id, 'tipo': evento.tipo, 'creado_en': evento.creado_en, 'datos': evento.datos}
+
+
+def enviar_webhook(eventos):
+    cuerpo = json.dumps({'eventos': [_cuerpo_evento(e) for e in eventos]}, cls=DjangoJSONEncoder).encode()
+    solicitud = urllib.request.Request(
+        settings.SALIDA_WEBHOOK_URL, data=cuerpo, method='POST', headers={'Content-Type': 'application/json'}
+    )
+    if settings.SALIDA_WEBHOOK_SECRETO:
+        firma = hmac.new(settings.SALIDA_WEBHOOK_SECRETO.encode(), cuerpo, hashlib.sha256).hexdigest()
+        solicitud.add_header('X-SNA-Firma', f'sha256={firma}')
+    # urlopen lanza HTTPError para respuestas 4xx y 5xx
+    with urllib.request.urlopen(solicitud, timeout=settings.SALIDA_WEBHOOK_TIMEOUT):
+        pass
+
+
+def enviar_email(eventos):
+    mensajes = []
+    for evento in eventos:
+        datos = evento.datos
+        mensajes.append(mail.EmailMessage(
+            subject=f"Reporte {datos['reporte']}: {datos['estado_anterior']} → {datos['estado_nuevo']}",
+            body=(
+                f"El reporte {datos['reporte']} (medida {datos['medida']}, organismo {datos['organismo']}) "
+                f"cambió de estado de {datos['estado_anterior']} a {datos['estado_nuevo']} el {datos['fecha']}."
+            ),
+            to=settings.SALIDA_EMAIL_DESTINATARIOS,
+        ))
+    with mail.get_connection(fail_silently=False) as conexion:
+        conexion.send_messages(mensajes)
+
+
+ENVIOS = {
+    'webhook': enviar_webhook,
+    'email': enviar_email,
+}
+
+
+def despachar_lote(canal, tamano=100):
+    """
+    Entrega hasta `tamano` eventos pendientes del `canal`. Retorna
+    (enviados, fallidos). El lote completo se reintenta si el envío falla.
+    """
+    ahora = now()
+    with transaction.atomic():
+        eventos = list(
+            EventoSalida.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente', canal=canal, proximo_intento__lte=ahora)
+            .order_by('proximo_intento', 'id')[:tamano]
+        )
+        if not eventos:
+            return 0, 0
+        try:
+            ENVIOS[canal](eventos)
+        except Exception as error:
+            for evento in eventos:
+                evento.intentos += 1
+                evento.ultimo_error = f"{type(error).__name__}: {error}"[:2000]
+                if evento.intentos >= settings.SALIDA_MAXIMO_INTENTOS:
+                    evento.estado = 'fallido'
+                else:
+                    evento.proximo_intento = now() + timedelta(seconds=espera(evento.intentos))
+            EventoSalida.objects.bulk_update(eventos, ['intentos', 'ultimo_error', 'estado', 'proximo_intento'])
+            return 0, len(eventos)
+
+        EventoSalida.objects.filter(pk__in=[e.pk for e in eventos]).update(
+            estado='enviado', enviado_en=now(), intentos=F('intentos') + 1
+        )
+        return len(eventos), 0
+
+
+def despachar(tamano=100, maximo_lotes=None):
+    """Despacha lotes de todos los canales hasta vaciar lo pendiente. Retorna (enviados, fallidos)."""
+    enviados = fallidos = 0
+    for canal in ENVIOS:
+        lotes = 0
+        while maximo_lotes is None or lotes < maximo_lotes:
+            ok, error = despachar_lote(canal, tamano)
+            enviados, fallidos, lotes = enviados + ok, fallidos + error, lotes + 1
+            # Un lote incompleto o con error indica que no queda nada listo para este canal
+            if error or ok < tamano:
+                break
+    return enviados, fallidos
+
+
+def purgar_enviados():
+    """Elimina los eventos enviados anteriores a la retención. Retorna la cantidad eliminada."""
+    limite = now() - timedelta(days=settings.SALIDA_RETENCION_DIAS)
+    eliminados, _ = EventoSalida.objects.filter(estado='enviado', enviado_en__lt=limite).delete()
+    return eliminados
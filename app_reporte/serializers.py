@@ -1,16 +1,42 @@
 from rest_framework import serializers
 from .models import (
     PlanPPDA, Comuna, Region, Ciudad, OrganismoResponsable,
-    Medida, MedioVerificacion, Entidad, Reporte,
+    Medida, MedioVerificacion, Entidad, Reporte, HistorialEstadoReporte, MetricaRevision, ReporteArchivado,
+    Tarea, TareaProgramada,
 )
 from datetime import datetime
+from django.core.files.storage import default_storage
 
-class ComunaSerializer(serializers.ModelSerializer):
+
+class ProyeccionMixin:
+    """
+    Serializer que acepta `proyeccion` (ver proyeccion.py): omite los campos no
+    pedidos y reemplaza por el objeto serializado las relaciones expandidas, que
+    se declaran en `Meta.expandibles` como {campo: nombre del serializer}.
+    """
+    def __init__(self, *args, proyeccion=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if proyeccion is None:
+            return
+        modelo = self.Meta.model
+        for nombre, sub in proyeccion.expandir.items():
+            many = modelo._meta.get_field(self.fields[nombre].source).many_to_many
+            self.fields[nombre] = self.expandibles()[nombre](many=many, read_only=True, proyeccion=sub)
+        for nombre in list(self.fields):
+            if not proyeccion.incluye(nombre):
+                self.fields.pop(nombre)
+
+    @classmethod
+    def expandibles(cls):
+        return {campo: globals()[serializer] for campo, serializer in getattr(cls.Meta, 'expandibles', {}).items()}
+
+class ComunaSerializer(ProyeccionMixin, serializers.ModelSerializer):
     class Meta:
         model = Comuna
-        fields = '__all__'
+        exclude = ('created_at', 'updated_at')
+        expandibles = {'ciudad': 'CiudadSerializer'}
 
-class PlanPPDASerializer(serializers.ModelSerializer):
+class PlanPPDASerializer(ProyeccionMixin, serializers.ModelSerializer):
     mes_reporte = serializers.IntegerField(
         min_value=1,
         max_value=12,
@@ -29,7 +55,8 @@ class PlanPPDASerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PlanPPDA
-        fields = '__all__'
+        exclude = ('created_at', 'updated_at')
+        expandibles = {'comunas': 'ComunaSerializer'}
         extra_kwargs = {'id': {'read_only': True}}
 
     def validate_comunas(self, value):
@@ -46,25 +73,27 @@ class PlanPPDASerializer(serializers.ModelSerializer):
             instance.comunas.set(comunas_data)
         return instance
 
-class RegionSerializer(serializers.ModelSerializer):
+class RegionSerializer(ProyeccionMixin, serializers.ModelSerializer):
     class Meta:
         model = Region
-        fields = '__all__'
+        exclude = ('created_at', 'updated_at')
 
-class CiudadSerializer(serializers.ModelSerializer):
+class CiudadSerializer(ProyeccionMixin, serializers.ModelSerializer):
     class Meta:
         model = Ciudad
-        fields = '__all__'
+        exclude = ('created_at', 'updated_at')
+        expandibles = {'region': 'RegionSerializer'}
 
-class OrganismoResponsableSerializer(serializers.ModelSerializer):
+class OrganismoResponsableSerializer(ProyeccionMixin, serializers.ModelSerializer):
     class Meta:
         model = OrganismoResponsable
-        fields = '__all__'
+        exclude = ('created_at', 'updated_at')
 
-class MedidaSerializer(serializers.ModelSerializer):
+class MedidaSerializer(ProyeccionMixin, serializers.ModelSerializer):
     class Meta:
         model = Medida
-        fields = '__all__'
+        exclude = ('busqueda', 'created_at', 'updated_at')
+        expandibles = {'plan': 'PlanPPDASerializer', 'organismos': 'OrganismoResponsableSerializer'}
         extra_kwargs = {'id': {'read_only': True}}
 
     def validate_plan(self, value):
@@ -73,20 +102,25 @@ class MedidaSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Debe especificar un plan PPDA")
         return value
 
-class MedioVerificacionSerializer(serializers.ModelSerializer):
+class MedioVerificacionSerializer(ProyeccionMixin, serializers.ModelSerializer):
     class Meta:
         model = MedioVerificacion
         fields = '__all__'
 
-class EntidadSerializer(serializers.ModelSerializer):
+class EntidadSerializer(ProyeccionMixin, serializers.ModelSerializer):
     class Meta:
         model = Entidad
         fields = '__all__'
 
-class ReporteSerializer(serializers.ModelSerializer):
+class ReporteSerializer(ProyeccionMixin, serializers.ModelSerializer):
     class Meta:
         model = Reporte
-        fields = '__all__'
+        exclude = ('busqueda', 'reclamado_por', 'reclamado_hasta')
+        expandibles = {
+            'medida': 'MedidaSerializer',
+            'organismo': 'OrganismoResponsableSerializer',
+            'medio_verificacion': 'MedioVerificacionSerializer',
+        }
         read_only_fields = (
             'id', 'created_at', 'updated_at',
             'created_by', 'updated_by',
@@ -103,3 +137,69 @@ class ReporteSerializer(serializers.ModelSerializer):
             updated_by=usuario,
             **validated_data
         )
+
+class ReporteReenvioSerializer(ReporteSerializer):
+    """
+    Valida un reenvío (ver reenvio.py). Sin el validador de unicidad: el conflicto
+    lo resuelve la base de datos en la misma sentencia que inserta o actualiza.
+    """
+    class Meta(ReporteSerializer.Meta):
+        validators = []
+
+
+class HistorialEstadoReporteSerializer(serializers.ModelSerializer):
+    actualizado_por = serializers.SerializerMethodField()
+
+    class Meta:
+        model = HistorialEstadoReporte
+        fields = ('id', 'reporte', 'estado_anterior', 'estado_nuevo', 'actualizado_por', 'fecha')
+        read_only_fields = fields
+
+    def get_actualizado_por(self, obj):
+        return obj.created_by.username if obj.created_by_id else HistorialEstadoReporte.USUARIO_DESCONOCIDO
+
+class ReporteArchivadoSerializer(serializers.ModelSerializer):
+    """
+    Reporte archivado con los mismos campos que `ReporteSerializer`, más `archivado`
+    y `archivado_en`, para que el detalle de un reporte no cambie al archivarse.
+    """
+    archivo = serializers.SerializerMethodField()
+    archivado = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReporteArchivado
+        fields = (
+            'id', 'created_at', 'updated_at', 'fecha_envio', 'descripcion', 'archivo', 'estado',
+            'created_by', 'updated_by', 'medida', 'organismo', 'medio_verificacion',
+            'archivado', 'archivado_en',
+        )
+        read_only_fields = fields
+
+    def get_archivo(self, obj):
+        if not obj.archivo:
+            return None
+        url = default_storage.url(obj.archivo)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_archivado(self, obj):
+        return True
+
+class MetricaRevisionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MetricaRevision
+        exclude = ('id',)
+
+
+class TareaSerializer(serializers.ModelSerializer):
+    creada_por = serializers.StringRelatedField()
+
+    class Meta:
+        model = Tarea
+        fields = '__all__'
+
+
+class TareaProgramadaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TareaProgramada
+        fields = '__all__'
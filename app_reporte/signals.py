@@ -0,0 +1,93 @@
+"""
+Señales del modelo para mantener estructuras derivadas al escribir.
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from . import busqueda, referencia, resultados, similitud, sincronizacion
+from .models import Ciudad, Comuna, Medida, OrganismoResponsable, PlanPPDA, Region, Reporte
+
+MODELOS_CATALOGO_NOMBRES = (Region, Ciudad, Comuna, OrganismoResponsable)
+
+
+def _cambia_texto(update_fields, campos):
+    return update_fields is None or any(campo in update_fields for campo, _ in campos)
+
+
+@receiver(post_save, sender=Medida)
+def actualizar_busqueda_medida(sender, instance, update_fields=None, **kwargs):
+    if _cambia_texto(update_fields, busqueda.CAMPOS_MEDIDA):
+        busqueda.actualizar_vector_medida([instance.pk])
+
+
+@receiver(post_save, sender=Reporte)
+def actualizar_busqueda_reporte(sender, instance, update_fields=None, **kwargs):
+    if _cambia_texto(update_fields, busqueda.CAMPOS_REPORTE):
+        busqueda.actualizar_vector_reporte([instance.pk])
+
+
+@receiver(pre_save, sender=Reporte)
+def reporte_cambia_de_organismo(sender, instance, update_fields=None, **kwargs):
+    # Para el organismo anterior el reporte desaparece: cambian sus listados y sus
+    # clientes de sincronización deben recibirlo como eliminado
+    if instance.pk is None or (update_fields is not None and 'organismo' not in update_fields):
+        return
+    anterior = Reporte.objects.filter(pk=instance.pk).values_list('organismo_id', flat=True).first()
+    if anterior is not None and anterior != instance.organismo_id:
+        resultados.invalidar_al_confirmar(anterior)
+        sincronizacion.registrar_eliminacion(instance, organismo_id=anterior)
+
+
+@receiver(post_save, sender=Reporte)
+@receiver(post_delete, sender=Reporte)
+def invalidar_resultados(sender, instance, **kwargs):
+    resultados.invalidar_al_confirmar(instance.organismo_id)
+
+
+def invalidar_indices_nombres(sender, **kwargs):
+    # Vale para todos los procesos (ver similitud.py). Se invalida también al confirmar,
+    # por si otro hilo o proceso reconstruyó el índice antes de que la transacción fuera visible.
+    similitud.invalidar(sender)
+    transaction.on_commit(lambda: similitud.invalidar(sender))
+
+
+for modelo in MODELOS_CATALOGO_NOMBRES:
+    post_save.connect(invalidar_indices_nombres, sender=modelo, dispatch_uid=f'indices_nombres_save_{modelo.__name__}')
+    post_delete.connect(invalidar_indices_nombres, sender=modelo, dispatch_uid=f'indices_nombres_delete_{modelo.__name__}')
+
+for modelo in referencia.MODELOS:
+    post_save.connect(referencia.invalidar, sender=modelo, dispatch_uid=f'referencia_save_{modelo.__name__}')
+    post_delete.connect(referencia.invalidar, sender=modelo, dispatch_uid=f'referencia_delete_{modelo.__name__}')
+for relacion in (PlanPPDA.comunas.through, Medida.organismos.through):
+    m2m_changed.connect(referencia.invalidar, sender=relacion, dispatch_uid=f'referencia_m2m_{relacion.__name__}')
+
+
+def registrar_eliminacion(sender, instance, **kwargs):
+    sincronizacion.registrar_eliminacion(instance)
+
+
+# Relación muchos a muchos -> (modelo cuyo payload la incluye, campo)
+RELACIONES_SINCRONIZADAS = {
+    PlanPPDA.comunas.through: (PlanPPDA, 'comunas'),
+    Medida.organismos.through: (Medida, 'organismos'),
+}
+
+
+def marcar_modificados_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """Actualiza `updated_at` de planes y medidas cuando cambian sus comunas u organismos."""
+    modelo, campo = RELACIONES_SINCRONIZADAS[sender]
+    if not reverse:
+        if action.startswith('post_'):
+            modelo.objects.filter(pk=instance.pk).update(updated_at=now())
+    elif action == 'pre_clear':
+        modelo.objects.filter(**{campo: instance}).update(updated_at=now())
+    elif action in ('post_add', 'post_remove'):
+        modelo.objects.filter(pk__in=pk_set).update(updated_at=now())
+
+
+for modelo in sincronizacion.COLECCION_POR_MODELO:
+    post_delete.connect(registrar_eliminacion, sender=modelo, dispatch_uid=f'sincronizacion_delete_{modelo.__name__}')
+for relacion in RELACIONES_SINCRONIZADAS:
+    m2m_changed.connect(marcar_modificados_m2m, sender=relacion, dispatch_uid=f'sincronizacion_m2m_{relacion.__name__}')
@@ -0,0 +1,161 @@
+"""
+Búsqueda aproximada de nombres por similitud de trigramas.
+
+Permite encontrar "ConCón" escribiendo "Concon" o "Con Con" y tolera errores de
+tipeo en nombres de organismos. La similitud es la de pg_trgm: trigramas
+compartidos / trigramas totales, sobre el texto en minúsculas y sin tildes.
+
+- En PostgreSQL con la extensión pg_trgm se usa el operador `%` sobre la función
+  `sna_normalizar(nombre)`, cubierta por un índice GIN de trigramas.
+- En otro caso se usa un índice invertido de trigramas en memoria por proceso,
+  construido al primer uso. Solo se evalúan las filas que comparten algún
+  trigrama con la consulta.
+
+Los índices en memoria (estos y los de autocompletar.py) se guardan con la
+generación de su modelo, un token en la caché compartida que las señales cambian
+al crear, modificar o eliminar un registro (`invalidar`). Cada proceso compara
+la generación antes de usar su índice y lo reconstruye si cambió, de modo que
+con varios workers ninguno sirve nombres viejos. La generación se lee antes de
+consultar la base, así que un índice construido durante un cambio queda con la
+generación anterior y se reconstruye en el siguiente uso.
+"""
+import re
+import threading
+import unicodedata
+import uuid
+from collections import Counter
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import CharField, F, Func
+
+UMBRAL_SIMILITUD = 0.3
+CLAVE_GENERACION = 'indices_nombres:generacion:{modelo}'
+
+_indices = {}
+_candado = threading.Lock()
+_extension_trgm = {}
+
+
+def normalizar_texto(texto):
+    """
+    Normaliza el texto eliminando acentos y convirtiendo a minúsculas.
+    """
+    if not texto:
+        return ""
+    texto_normalizado = ''.join(c for c in unicodedata.normalize('NFD', texto)
+                              if unicodedata.category(c) != 'Mn')
+    return texto_normalizado.lower()
+
+
+def trigramas(texto):
+    """Trigramas al estilo pg_trgm: cada palabra se rellena con dos espacios al inicio y uno al final."""
+    resultado = set()
+    for palabra in re.findall(r'[a-z0-9ñ]+', normalizar_texto(texto)):
+        relleno = f"  {palabra} "
+        resultado.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return resultado
+
+
+class IndiceTrigramas:
+    """Índice invertido trigrama -> ids para un conjunto de nombres."""
+
+    def __init__(self, filas):
+        self.tamanos = {}
+        self.postings = {}
+        for pk, nombre in filas:
+            tri = trigramas(nombre)
+            self.tamanos[pk] = len(tri)
+            for t in tri:
+                self.postings.setdefault(t, []).append(pk)
+
+    def buscar(self, texto, umbral=UMBRAL_SIMILITUD):
+        """Retorna [(id, similitud)] ordenado de mayor a menor similitud."""
+        consulta = trigramas(texto)
+        if not consulta:
+            return []
+        compartidos = Counter()
+        for t in consulta:
+            compartidos.update(self.postings.get(t, ()))
+        resultados = []
+        for pk, comunes in compartidos.items():
+            similitud = comunes / (len(consulta) + self.tamanos[pk] - comunes)
+            if similitud >= umbral:
+                resultados.append((pk, similitud))
+        resultados.sort(key=lambda par: (-par[1], par[0]))
+        return resultados
+
+
+def generacion(modelo):
+    """Generación vigente de los índices en memoria de `modelo`, compartida por todos los procesos."""
+    clave = CLAVE_GENERACION.format(modelo=modelo._meta.label)
+    valor = cache.get(clave)
+    if valor is None:
+        # add: si otro proceso la creó antes, se usa la suya
+        valor = uuid.uuid4().hex
+        if not cache.add(clave, valor, None):
+            valor = cache.get(clave, valor)
+    return valor
+
+
+def invalidar(modelo):
+    """Cambia la generación del modelo: todos los procesos reconstruyen sus índices en el próximo uso."""
+    cache.set(CLAVE_GENERACION.format(modelo=modelo._meta.label), uuid.uuid4().hex, None)
+
+
+def indice_para(modelo, campo='nombre'):
+    clave = (modelo._meta.label, campo)
+    vigente = generacion(modelo)
+    guardado = _indices.get(clave)
+    if guardado is None or guardado[0] != vigente:
+        with _candado:
+            guardado = _indices.get(clave)
+            if guardado is None or guardado[0] != vigente:
+                guardado = (vigente, IndiceTrigramas(modelo.objects.values_list('pk', campo)))
+                _indices[clave] = guardado
+    return guardado[1]
+
+
+def pg_trgm_disponible():
+    """Indica si la base de datos tiene instalada la extensión pg_trgm (se consulta una vez)."""
+    if connection.vendor != 'postgresql':
+        return False
+    alias = connection.alias
+    if alias not in _extension_trgm:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _extension_trgm[alias] = cursor.fetchone() is not None
+    return _extension_trgm[alias]
+
+
+def buscar_similares(queryset, texto, campo='nombre', umbral=UMBRAL_SIMILITUD):
+    """
+    Filtra `queryset` a los objetos cuyo `campo` se parece a `texto` y los retorna
+    como lista ordenada por similitud, con el atributo `similitud` en cada objeto.
+    """
+    if pg_trgm_disponible():
+        normalizado = Func(F(campo), function='sna_normalizar', output_field=CharField())
+        consulta = normalizar_texto(texto)
+        return list(
+            queryset
+            .annotate(nombre_normalizado=normalizado)
+            .filter(nombre_normalizado__trigram_similar=consulta)
+            .annotate(similitud=TrigramSimilarity('nombre_normalizado', consulta))
+            .filter(similitud__gte=umbral)
+            .order_by('-similitud', 'pk')
+        )
+
+    coincidencias = indice_para(queryset.model, campo).buscar(texto, umbral)
+    objetos = queryset.in_bulk([pk for pk, _ in coincidencias])
+    resultado = []
+    for pk, similitud in coincidencias:
+        if pk in objetos:
+            objetos[pk].similitud = similitud
+            resultado.append(objetos[pk])
+    return resultado
+
+
+def agregar_similitud(datos, objetos):
+    """Agrega la similitud calculada a cada elemento serializado."""
+    return [{**dato, 'similitud': round(obj.similitud, 4)} for dato, obj in zip(datos, objetos)]
@@ -0,0 +1,116 @@
+"""
+Sincronización incremental de catálogos y reportes.
+
+El cliente guarda el `token` de la última respuesta y lo envía en la siguiente;
+recibe solo los registros creados o modificados desde entonces (por `updated_at`)
+y los ids eliminados (por `RegistroEliminacion`), en lugar de volver a descargar
+las listas completas. Sin token, o con uno anterior a la retención de las
+lápidas, la respuesta es completa (`completo: true`) y el cliente debe reemplazar
+sus datos locales.
+
+El token es el instante en que empezó la consulta. Como `updated_at` se fija al
+guardar y no al confirmar la transacción, la siguiente consulta retrocede
+`SINCRONIZACION_MARGEN_SEGUNDOS` para no perder escrituras que confirmaron tarde;
+un registro puede llegar repetido, por lo que el cliente debe aplicar los cambios
+como reemplazos por id.
+
+Los cambios hechos con `QuerySet.update()` (por ejemplo, los contadores de
+reportes) no modifican `updated_at` y no se informan. Un reporte que cambia de
+organismo se informa como eliminado a los clientes del organismo anterior.
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.utils.timezone import now
+
+from .models import Ciudad, Comuna, Medida, OrganismoResponsable, PlanPPDA, Region, RegistroEliminacion, Reporte
+from .serializers import (
+    CiudadSerializer, ComunaSerializer, MedidaSerializer, OrganismoResponsableSerializer, PlanPPDASerializer,
+    RegionSerializer, ReporteSerializer,
+)
+
+# Colección -> (modelo, serializer, relaciones a precargar)
+COLECCIONES = {
+    'regiones': (Region, RegionSerializer, ()),
+    'ciudades': (Ciudad, CiudadSerializer, ()),
+    'comunas': (Comuna, ComunaSerializer, ()),
+    'organismos': (OrganismoResponsable, OrganismoResponsableSerializer, ()),
+    'planes': (PlanPPDA, PlanPPDASerializer, ('comunas',)),
+    'medidas': (Medida, MedidaSerializer, ('organismos',)),
+    'reportes': (Reporte, ReporteSerializer, ()),
+}
+COLECCION_POR_MODELO = {modelo: coleccion for coleccion, (modelo, _, _) in COLECCIONES.items()}
+
+
+def token_de(fecha):
+    """Token opaco para el cliente: microsegundos desde la época Unix."""
+    return str(int(fecha.timestamp() * 1_000_000))
+
+
+def fecha_de(token):
+    """Instante que representa el token. Lanza ValueError si no es válido."""
+    return datetime.fromtimestamp(int(token) / 1_000_000, tz=timezone.utc)
+
+
+def registrar_eliminacion(instancia, organismo_id=None):
+    """
+    Lápida de `instancia`. `organismo_id` indica, para un reporte que cambió de
+    organismo, el organismo para el que deja de existir (por defecto, el suyo).
+    """
+    coleccion = COLECCION_POR_MODELO.get(type(instancia))
+    if coleccion:
+        RegistroEliminacion.objects.create(
+            coleccion=coleccion, objeto_id=instancia.pk,
+            organismo_id=organismo_id or getattr(instancia, 'organismo_id', None),
+        )
+
+
+def purgar_eliminaciones():
+    """Elimina las lápidas anteriores a la retención. Retorna la cantidad eliminada."""
+    limite = now() - timedelta(days=settings.SINCRONIZACION_RETENCION_DIAS)
+    eliminadas, _ = RegistroEliminacion.objects.filter(eliminado_en__lt=limite).delete()
+    return eliminadas
+
+
+def cambios(desde, colecciones, organismos=None):
+    """
+    Cambios de las `colecciones` desde el instante `desde` (None para una copia
+    completa). `organismos` limita los reportes a esos ids (None: sin límite).
+    """
+    ahora = now()
+    completo = desde is None or desde < ahora - timedelta(days=settings.SINCRONIZACION_RETENCION_DIAS)
+    limite = None if completo else desde - timedelta(seconds=settings.SINCRONIZACION_MARGEN_SEGUNDOS)
+
+    resultado = {}
+    for coleccion in colecciones:
+        modelo, serializer, relaciones = COLECCIONES[coleccion]
+        queryset = modelo.objects.prefetch_related(*relaciones).order_by('id')
+        eliminados = RegistroEliminacion.objects.filter(coleccion=coleccion)
+        if modelo is Reporte and organismos is not None:
+            queryset = queryset.filter(organismo_id__in=organismos)
+            eliminados = eliminados.filter(organismo_id__in=organismos)
+
+        if completo:
+            resultado[coleccion] = {
+                'creados': serializer(queryset, many=True).data, 'actualizados': [], 'eliminados': [],
+            }
+            continue
+
+        creados, actualizados = [], []
+        for instancia in queryset.filter(updated_at__gte=limite):
+            datos = serializer(instancia).data
+            if instancia.created_at is not None and instancia.created_at >= limite:
+                creados.append(datos)
+            else:
+                actualizados.append(datos)
+        # Un reporte que cambió de organismo deja una lápida para el anterior; quien
+        # ve ambos organismos lo recibe como actualizado y no como eliminado
+        vigentes = {datos['id'] for datos in creados + actualizados}
+        resultado[coleccion] = {
+            'creados': creados,
+            'actualizados': actualizados,
+            'eliminados': sorted(
+                set(eliminados.filter(eliminado_en__gte=limite).values_list('objeto_id', flat=True)) - vigentes
+            ),
+        }
+    return {'token': token_de(ahora), 'completo': completo, 'cambios': resultado}
@@ -0,0 +1,358 @@
+"""
+Cola de tareas en segundo plano sobre la base de datos, sin broker externo.
+
+Las funciones se registran con el decorador `tarea` y se encolan con `encolar`;
+el comando `procesar_tareas` las ejecuta fuera del ciclo de las solicitudes.
+
+- Las tareas pendientes se toman por prioridad (mayor primero) y antigüedad con
+  `FOR UPDATE SKIP LOCKED`, de modo que varios trabajadores, en uno o más nodos,
+  nunca toman la misma.
+- `TAREAS_LIMITES_COLA` limita las tareas en curso por cola en todos los nodos.
+  En PostgreSQL la verificación del cupo se serializa con un advisory lock de
+  transacción por cola.
+- Un fallo se reintenta con espera exponencial hasta `maximo_intentos`. Una tarea
+  en curso cuyo trabajador cayó se recupera al vencer `TAREAS_TIEMPO_MAXIMO_SEGUNDOS`.
+- Las tareas recurrentes (`TareaProgramada`) las encola el planificador de
+  cualquier trabajador: la fila se bloquea y su próxima ejecución avanza en la
+  misma transacción, por lo que cada periodo se encola una sola vez, y no se
+  encola otra mientras la anterior siga pendiente o en curso.
+
+La ejecución es "al menos una vez": las tareas deben poder repetirse sin efectos
+indeseados.
+"""
+import inspect
+import json
+import logging
+import random
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection, transaction
+from django.utils.timezone import now
+
+from .models import Medida, OrganismoResponsable, Reporte, Tarea, TareaProgramada
+
+logger = logging.getLogger(__name__)
+
+# Primera clave de los advisory locks de cupo por cola (la segunda es el hash del nombre de la cola)
+CLAVE_BLOQUEO_COLA = 5240
+# Pendientes que se examinan por intento al buscar una tarea con cupo
+CANDIDATAS = 20
+
+_registro = {}
+
+
+class TareaDesconocida(ValueError):
+    """El nombre no corresponde a una tarea registrada."""
+
+
+class ArgumentosInvalidos(ValueError):
+    """Los argumentos no coinciden con la firma de la tarea."""
+
+
+class DefinicionTarea:
+    def __init__(self, nombre, funcion, cola, maximo_intentos):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.cola = cola
+        self.maximo_intentos = maximo_intentos
+
+    def validar(self, argumentos):
+        try:
+            inspect.signature(self.funcion).bind(**argumentos)
+        except TypeError as error:
+            raise ArgumentosInvalidos(f"Argumentos inválidos para '{self.nombre}': {error}")
+
+
+def tarea(nombre=None, cola='default', maximo_intentos=3):
+    """Registra una función como tarea. Sus argumentos deben ser serializables a JSON."""
+    def registrar(funcion):
+        definicion = DefinicionTarea(nombre or funcion.__name__, funcion, cola, maximo_intentos)
+        _registro[definicion.nombre] = definicion
+        return funcion
+    return registrar
+
+
+def registradas():
+    return dict(_registro)
+
+
+def definicion(nombre):
+    try:
+        return _registro[nombre]
+    except KeyError:
+        raise TareaDesconocida(f"No existe la tarea '{nombre}'.")
+
+
+def encolar(nombre, argumentos=None, prioridad=0, ejecutar_desde=None, usuario=None, programada=None):
+    """
+    Agrega una tarea a la cola y la retorna. Dentro de una transacción, la tarea
+    solo es visible para los trabajadores cuando esta se confirma.
+    """
+    argumentos = argumentos or {}
+    tipo = definicion(nombre)
+    tipo.validar(argumentos)
+    return Tarea.objects.create(
+        nombre=nombre, argumentos=argumentos, cola=tipo.cola, prioridad=prioridad,
+        maximo_intentos=tipo.maximo_intentos, ejecutar_desde=ejecutar_desde or now(),
+        creada_por=usuario, programada=programada,
+    )
+
+
+def cancelar(tarea_id):
+    """Cancela una tarea pendiente. Retorna False si ya no estaba pendiente."""
+    return bool(
+        Tarea.objects.filter(pk=tarea_id, estado='pendiente').update(estado='cancelada', terminada_en=now())
+    )
+
+
+def espera(intentos):
+    """Segundos antes del próximo intento, con ±10 % de variación para no sincronizar reintentos."""
+    base = min(settings.TAREAS_ESPERA_BASE * 2 ** (intentos - 1), settings.TAREAS_ESPERA_MAXIMA)
+    return base * random.uniform(0.9, 1.1)
+
+
+def _hay_cupo(cola):
+    limite = settings.TAREAS_LIMITES_COLA.get(cola)
+    if limite is None:
+        return True
+    if connection.vendor == 'postgresql':
+        # Hasta el fin de la transacción, ningún otro trabajador cuenta ni toma tareas de esta cola
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", [CLAVE_BLOQUEO_COLA, cola])
+    return Tarea.objects.filter(estado='en_curso', cola=cola).count() < limite
+
+
+def tomar_tarea(trabajador, colas=None):
+    """Marca como en curso la próxima tarea ejecutable y la retorna, o None si no hay."""
+    ahora = now()
+    with transaction.atomic():
+        candidatas = (
+            Tarea.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente', ejecutar_desde__lte=ahora)
+            .order_by('-prioridad', 'ejecutar_desde', 'id')
+        )
+        if colas:
+            candidatas = candidatas.filter(cola__in=colas)
+        sin_cupo = set()
+        for tarea in candidatas[:CANDIDATAS]:
+            if tarea.cola in sin_cupo:
+                continue
+            if not _hay_cupo(tarea.cola):
+                sin_cupo.add(tarea.cola)
+                continue
+            tarea.estado = 'en_curso'
+            tarea.intentos += 1
+            tarea.trabajador = trabajador
+            tarea.iniciada_en = ahora
+            tarea.vence_en = ahora + timedelta(seconds=settings.TAREAS_TIEMPO_MAXIMO_SEGUNDOS)
+            tarea.save(update_fields=['estado', 'intentos', 'trabajador', 'iniciada_en', 'vence_en'])
+            return tarea
+    return None
+
+
+def _serializable(resultado):
+    try:
+        json.dumps(resultado, cls=DjangoJSONEncoder)
+        return resultado
+    except (TypeError, ValueError):
+        return str(resultado)
+
+
+def _registrar_fallo(tarea, error):
+    campos = {'ultimo_error': error[:2000], 'vence_en': None}
+    if tarea.intentos >= tarea.maximo_intentos:
+        campos.update(estado='fallida', terminada_en=now())
+    else:
+        campos.update(estado='pendiente', ejecutar_desde=now() + timedelta(seconds=espera(tarea.intentos)))
+    # Solo si sigue siendo del trabajador: una tarea recuperada por vencimiento pudo volver a tomarse
+    Tarea.objects.filter(pk=tarea.pk, estado='en_curso', intentos=tarea.intentos).update(**campos)
+
+
+def ejecutar(tarea):
+    """Ejecuta una tarea tomada con `tomar_tarea` y registra su resultado. Retorna True si terminó bien."""
+    try:
+        resultado = definicion(tarea.nombre).funcion(**tarea.argumentos)
+    except Exception as error:
+        logger.exception("Falló la tarea %s #%s (intento %s)", tarea.nombre, tarea.id, tarea.intentos)
+        _registrar_fallo(tarea, f"{type(error).__name__}: {error}")
+        return False
+    Tarea.objects.filter(pk=tarea.pk, estado='en_curso', intentos=tarea.intentos).update(
+        estado='completada', resultado=_serializable(resultado), ultimo_error='', vence_en=None, terminada_en=now()
+    )
+    return True
+
+
+def recuperar_vencidas():
+    """Devuelve a la cola (o da por fallidas) las tareas en curso de trabajadores caídos."""
+    with transaction.atomic():
+        vencidas = list(
+            Tarea.objects.select_for_update(skip_locked=True).filter(estado='en_curso', vence_en__lt=now())
+        )
+        for tarea in vencidas:
+            _registrar_fallo(tarea, f"Sin respuesta del trabajador {tarea.trabajador} antes de {tarea.vence_en:%Y-%m-%d %H:%M:%S}")
+    return len(vencidas)
+
+
+def sincronizar_programadas():
+    """Crea o actualiza las tareas recurrentes definidas en `TAREAS_PROGRAMADAS`, sin alterar `activa`."""
+    for nombre, config in settings.TAREAS_PROGRAMADAS.items():
+        argumentos = config.get('argumentos', {})
+        definicion(config['tarea']).validar(argumentos)
+        TareaProgramada.objects.update_or_create(
+            nombre=nombre,
+            defaults={'tarea': config['tarea'], 'argumentos': argumentos, 'intervalo_segundos': config['intervalo']},
+        )
+
+
+def programar_recurrentes():
+    """Encola las tareas recurrentes vencidas. Retorna la cantidad encolada."""
+    ahora = now()
+    encoladas = 0
+    with transaction.atomic():
+        vencidas = TareaProgramada.objects.select_for_update(skip_locked=True).filter(
+            activa=True, proxima_ejecucion__lte=ahora
+        )
+        for programada in vencidas:
+            if not programada.tareas.filter(estado__in=('pendiente', 'en_curso')).exists():
+                encolar(programada.tarea, programada.argumentos, programada=programada)
+                encoladas += 1
+            programada.ultima_ejecucion = ahora
+            programada.proxima_ejecucion = ahora + timedelta(seconds=programada.intervalo_segundos)
+            programada.save(update_fields=['ultima_ejecucion', 'proxima_ejecucion'])
+    return encoladas
+
+
+def procesar_pendientes(trabajador, colas=None, maximo=None):
+    """Ejecuta tareas hasta que no queden ejecutables (o hasta `maximo`). Retorna (completadas, fallidas)."""
+    completadas = fallidas = 0
+    while maximo is None or completadas + fallidas < maximo:
+        tarea = tomar_tarea(trabajador, colas)
+        if tarea is None:
+            break
+        if ejecutar(tarea):
+            completadas += 1
+        else:
+            fallidas += 1
+    return completadas, fallidas
+
+
+def trabajar(trabajador, colas, detener, intervalo):
+    """
+    Bucle de un hilo trabajador; termina cuando se activa el evento `detener`.
+    Un error de la base (caída, reinicio, red) no lo termina: se registra, se
+    descarta la conexión y se reintenta con la espera de `espera`.
+    """
+    fallos = 0
+    try:
+        while not detener.is_set():
+            try:
+                close_old_connections()
+                tarea = tomar_tarea(trabajador, colas)
+                if tarea is not None:
+                    ejecutar(tarea)
+            except Exception:
+                fallos += 1
+                logger.exception("Error en el trabajador %s (%s seguidos)", trabajador, fallos)
+                connection.close()
+                detener.wait(espera(fallos))
+                continue
+            fallos = 0
+            if tarea is None:
+                detener.wait(intervalo)
+    finally:
+        connection.close()
+
+
+def purgar_terminadas():
+    """Elimina las tareas terminadas anteriores a la retención. Retorna la cantidad eliminada."""
+    limite = now() - timedelta(days=settings.TAREAS_RETENCION_DIAS)
+    eliminadas, _ = Tarea.objects.filter(
+        estado__in=('completada', 'fallida', 'cancelada'), terminada_en__lt=limite
+    ).delete()
+    return eliminadas
+
+
+# Tareas del proyecto
+
+@tarea(cola='salida')
+def despachar_eventos(tamano=100):
+    from . import salida
+    enviados, fallidos = salida.despachar(tamano)
+    return {'enviados': enviados, 'fallidos': fallidos}
+
+
+@tarea()
+def purgar_eventos_enviados():
+    from . import salida
+    return salida.purgar_enviados()
+
+
+@tarea()
+def purgar_claves_idempotencia():
+    from .idempotencia import purgar_vencidas
+    return purgar_vencidas()
+
+
+@tarea()
+def purgar_eliminaciones():
+    from .sincronizacion import purgar_eliminaciones
+    return purgar_eliminaciones()
+
+
+@tarea()
+def purgar_tareas():
+    return purgar_terminadas()
+
+
+@tarea(cola='pesadas')
+def refrescar_metricas_revision():
+    from .analitica import refrescar_metricas_revision
+    return refrescar_metricas_revision()
+
+
+@tarea(cola='pesadas')
+def recalcular_contadores():
+    from .contadores import recalcular_contadores
+    medidas, organismos = recalcular_contadores()
+    return {'medidas': medidas, 'organismos': organismos}
+
+
+@tarea(cola='pesadas')
+def reindexar_busqueda():
+    from .busqueda import reindexar
+    medidas, reportes = reindexar()
+    return {'medidas': medidas, 'reportes': reportes}
+
+
+@tarea(cola='pesadas', maximo_intentos=1)
+def archivar_reportes(horizonte_dias=None, lote=500, maximo=None):
+    from .archivo import archivar_reportes
+    return archivar_reportes(horizonte_dias, lote=lote, maximo=maximo)
+
+
+@tarea(cola='pesadas', maximo_intentos=1)
+def cargar_reportes_demo(cantidad=20):
+    """Crea `cantidad` reportes de prueba con medidas, organismos y estados al azar."""
+    from . import contadores
+    organismos = list(OrganismoResponsable.objects.all())
+    medidas = list(Medida.objects.all())
+    if not organismos or not medidas:
+        return {'creados': 0, 'error': "No hay organismos o medidas en la base de datos."}
+    creados = 0
+    for i in range(1, cantidad + 1):
+        try:
+            with transaction.atomic():
+                reporte = Reporte.objects.create(
+                    medida=random.choice(medidas),
+                    organismo=random.choice(organismos),
+                    descripcion=f'Reporte de prueba {i}',
+                    estado=random.choice(['pendiente', 'aprobado', 'rechazado']),
+                    fecha_envio=date(2025, 4, 1) + timedelta(days=i)
+                )
+                contadores.registrar_creacion(reporte)
+            creados += 1
+        except Exception as error:
+            logger.warning("Error en reporte demo %s: %s", i, error)
+    return {'creados': creados}
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from app_reporte.analitica import refrescar_metricas_revision, _metricas_genericas, calcular_metricas_revision
+from app_reporte.models import (
+    PlanPPDA, Medida, OrganismoResponsable, Reporte, HistorialEstadoReporte, MetricaRevision
+)
+
+
+def _fecha(dia, hora=0):
+    return datetime(2025, 4, dia, hora, tzinfo=dt_timezone.utc)
+
+
+class MetricasRevisionTest(TestCase):
+    def setUp(self):
+        self.plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.medida = Medida.objects.create(
+            referencia_pda='R1',
+            nombre_corto='NC1',
+            indicador='I1',
+            formula_calculo='F1',
+            frecuencia_reporte='anual',
+            tipo_medida='regulatoria',
+            plan=self.plan
+        )
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+
+        # Reporte 1: pendiente 1 día, rechazado, reenviado y aprobado 3 días después del reenvío
+        self.r1 = self._reporte(_fecha(1), [
+            ('pendiente', 'rechazado', 'ana', _fecha(2)),
+            ('rechazado', 'pendiente', 'rep', _fecha(3)),
+            ('pendiente', 'aprobado', 'ana', _fecha(6)),
+        ])
+        # Reporte 2: pendiente 2 días antes de ser aprobado
+        self.r2 = self._reporte(_fecha(2), [
+            ('pendiente', 'aprobado', 'beto', _fecha(4)),
+        ], medida=Medida.objects.create(
+            referencia_pda='R2', nombre_corto='NC2', indicador='I2', formula_calculo='F2',
+            frecuencia_reporte='anual', tipo_medida='regulatoria', plan=self.plan
+        ))
+
+    def _reporte(self, creado, cambios, medida=None):
+        reporte = Reporte.objects.create(medida=medida or self.medida, organismo=self.org)
+        Reporte.objects.filter(pk=reporte.pk).update(created_at=creado)
+        for anterior, nuevo, revisor, fecha in cambios:
+            usuario, _ = User.objects.get_or_create(username=revisor)
+            historial = HistorialEstadoReporte.objects.create(
+                reporte=reporte, estado_anterior=anterior, estado_nuevo=nuevo, created_by=usuario
+            )
+            HistorialEstadoReporte.objects.filter(pk=historial.pk).update(fecha=fecha)
+        return reporte
+
+    def test_tiempos_en_pendiente_por_dimension(self):
+        """Los intervalos se calculan desde el cambio previo (o la creación) hasta la revisión."""
+        refrescar_metricas_revision()
+        dia = 86400
+
+        total = MetricaRevision.objects.get(dimension='total')
+        self.assertEqual(total.revisiones, 3)
+        self.assertAlmostEqual(total.p50_segundos, 2 * dia)
+        self.assertAlmostEqual(total.promedio_segundos, 2 * dia)
+
+        ana = MetricaRevision.objects.get(dimension='revisor', clave='ana')
+        self.assertEqual(ana.revisiones, 2)
+        self.assertAlmostEqual(ana.p90_segundos, 2.8 * dia)
+
+        organismo = MetricaRevision.objects.get(dimension='organismo')
+        self.assertEqual(organismo.clave, str(self.org.id))
+        self.assertEqual(organismo.etiqueta, 'OrgTest')
+        self.assertEqual(str(organismo.mes), '2025-04-01')
+
+    def test_alternativa_generica_coincide(self):
+        """El cálculo sin funciones específicas del motor produce los mismos valores."""
+        def normalizar(filas):
+            return sorted(
+                (d, str(c), m, n, round(p, 3), round(a, 3), round(b, 3), round(c95, 3))
+                for d, c, m, n, p, a, b, c95 in filas
+            )
+        self.assertEqual(normalizar(calcular_metricas_revision()), normalizar(_metricas_genericas()))
+
+    def test_endpoint_restringido_a_administradores(self):
+        refrescar_metricas_revision()
+        User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        User.objects.create_user('usuario', 'usuario@example.com', 'pw')
+        cliente = APIClient()
+
+        token = cliente.post('/api/token/', {'username': 'usuario', 'password': 'pw'}).data['access']
+        cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(cliente.get('/api/analitica/revision/').status_code, status.HTTP_403_FORBIDDEN)
+
+        token = cliente.post('/api/token/', {'username': 'admin', 'password': 'admin'}).data['access']
+        cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        resp = cliente.get('/api/analitica/revision/', {'dimension': 'plan', 'desde': '2025-04'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data), 1)
+        self.assertEqual(resp.data[0]['revisiones'], 3)
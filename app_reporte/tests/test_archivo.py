@@ -0,0 +1,87 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User, Group
+from django.core.management import call_command
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from app_reporte import archivo, contadores
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte, ReporteArchivado, HistorialEstadoReporte
+from app_reporte.serializers import ReporteSerializer
+
+
+class ArchivoReportesTest(APITestCase):
+    def setUp(self):
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2022)
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        self.medidas = [
+            Medida.objects.create(
+                referencia_pda=f'Art. {n}', nombre_corto=f'Medida {n}', indicador='Indicador',
+                formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+            )
+            for n in range(3)
+        ]
+        antiguo = now().date() - timedelta(days=1000)
+        self.cerrado = self.crear_reporte(self.medidas[0], 'aprobado', antiguo)
+        for anterior, nuevo in (('pendiente', 'rechazado'), ('rechazado', 'aprobado')):
+            HistorialEstadoReporte.objects.create(
+                reporte=self.cerrado, estado_anterior=anterior, estado_nuevo=nuevo
+            )
+        self.pendiente = self.crear_reporte(self.medidas[1], 'pendiente', antiguo)
+        self.reciente = self.crear_reporte(self.medidas[2], 'aprobado', now().date())
+        contadores.recalcular_contadores()
+        self.detalle = ReporteSerializer(Reporte.objects.get(pk=self.cerrado.pk)).data
+
+        usuario = User.objects.create_user('usuario', 'usuario@example.com', 'pw')
+        usuario.groups.add(Group.objects.create(name=self.org.nombre))
+        usuario.groups.add(Group.objects.create(name='Representante Organismo Responsable'))
+        self.client_usuario = APIClient()
+        self.client_usuario.force_authenticate(usuario)
+        self.client_otro = APIClient()
+        self.client_otro.force_authenticate(User.objects.create_user('otro', 'otro@example.com', 'pw'))
+
+    def crear_reporte(self, medida, estado, fecha):
+        reporte = Reporte.objects.create(medida=medida, organismo=self.org, estado=estado, descripcion='Avance')
+        Reporte.objects.filter(pk=reporte.pk).update(fecha_envio=fecha)
+        return reporte
+
+    def test_archiva_solo_reportes_cerrados_anteriores_al_horizonte(self):
+        self.assertEqual(archivo.archivar_reportes(horizonte_dias=365, lote=1), 1)
+        self.assertFalse(Reporte.objects.filter(pk=self.cerrado.pk).exists())
+        self.assertFalse(HistorialEstadoReporte.objects.filter(reporte_id=self.cerrado.pk).exists())
+        self.assertEqual(set(Reporte.objects.values_list('pk', flat=True)), {self.pendiente.pk, self.reciente.pk})
+        archivado = ReporteArchivado.objects.get(pk=self.cerrado.pk)
+        self.assertEqual([e['estado_nuevo'] for e in archivado.historial], ['rechazado', 'aprobado'])
+        self.assertEqual(archivo.archivar_reportes(horizonte_dias=365), 0)
+
+    def test_detalle_e_historial_transparentes(self):
+        archivo.archivar_reportes(horizonte_dias=365)
+        resp = self.client_usuario.get(f'/api/reporte/{self.cerrado.pk}')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual({k: v for k, v in resp.data.items() if k in self.detalle}, dict(self.detalle))
+        self.assertTrue(resp.data['archivado'])
+
+        resp = self.client_usuario.get(f'/api/reportes/{self.cerrado.pk}/historial/')
+        self.assertEqual([e['estado_nuevo'] for e in resp.data['results']], ['rechazado', 'aprobado'])
+        resp = self.client_usuario.get('/api/reportes/historial/', {'reportes': f'{self.cerrado.pk},{self.pendiente.pk}'})
+        self.assertEqual(len(resp.data[str(self.cerrado.pk)]), 2)
+        resp = self.client_otro.get(f'/api/reportes/{self.cerrado.pk}/historial/')
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+        resp = self.client_usuario.put(f'/api/reporte/{self.cerrado.pk}', {'descripcion': 'x'}, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_409_CONFLICT)
+
+    def test_contadores_incluyen_archivados(self):
+        archivo.archivar_reportes(horizonte_dias=365)
+        contadores.recalcular_contadores()
+        self.org.refresh_from_db()
+        self.assertEqual((self.org.reportes_pendientes, self.org.reportes_aprobados), (1, 2))
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command('archivar_reportes', dias=365, simular=True, stdout=salida)
+        self.assertIn("Se archivarían 1 reportes", salida.getvalue())
+        call_command('archivar_reportes', dias=365, stdout=salida)
+        self.assertIn("1 reportes enviados antes del", salida.getvalue())
+        self.assertTrue(ReporteArchivado.objects.filter(pk=self.cerrado.pk).exists())
@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from app_reporte.models import Region, Ciudad, Comuna, OrganismoResponsable
+from app_reporte import similitud
+from app_reporte.autocompletar import IndicePrefijos
+
+
+class AutocompletarTest(TestCase):
+    def setUp(self):
+        self.region = Region.objects.create(nombre="Región de Valparaíso")
+        self.ciudad = Ciudad.objects.create(nombre="Valparaíso", region=self.region)
+        self.concon = Comuna.objects.create(nombre="Concón", ciudad=self.ciudad)
+        self.vina = Comuna.objects.create(nombre="Viña del Mar", ciudad=self.ciudad)
+        Comuna.objects.create(nombre="Quintero", ciudad=self.ciudad)
+        OrganismoResponsable.objects.create(nombre="Ministerio del Medio Ambiente")
+
+    def test_prefijos_por_nombre_y_por_palabra(self):
+        indice = IndicePrefijos([(1, "Concón", None), (2, "Viña del Mar", 9), (3, "Mariquina", None)])
+        self.assertEqual(indice.buscar("CONCO"), [(1, "Concón", None)])
+        self.assertEqual([pk for pk, _, _ in indice.buscar("mar")], [3, 2])
+        self.assertEqual(indice.buscar("vina del m"), [(2, "Viña del Mar", 9)])
+        self.assertEqual(indice.buscar("mar", limite=1), [(3, "Mariquina", None)])
+
+    def test_endpoint_sin_consultas_a_la_base(self):
+        resp = self.client.get('/api/autocompletar/', {'q': 'con', 'tipo': 'comuna'})
+        self.assertEqual(resp.json(), [
+            {'tipo': 'comuna', 'id': self.concon.id, 'nombre': 'Concón', 'padre': self.ciudad.id}
+        ])
+        self.client.get('/api/autocompletar/', {'q': 'min', 'tipo': 'organismo'})
+        with CaptureQueriesContext(connection) as consultas:
+            resp = self.client.get('/api/autocompletar/', {'q': 'del', 'tipo': 'comuna,organismo'})
+        self.assertEqual(len(consultas), 0)
+        self.assertEqual([d['tipo'] for d in resp.json()], ['comuna', 'organismo'])
+
+    def test_indice_se_invalida_al_modificar(self):
+        self.client.get('/api/autocompletar/', {'q': 'qui', 'tipo': 'comuna'})
+        Comuna.objects.create(nombre="Quilpué", ciudad=self.ciudad)
+        self.vina.delete()
+        resp = self.client.get('/api/autocompletar/', {'q': 'qui', 'tipo': 'comuna'})
+        self.assertEqual([d['nombre'] for d in resp.json()], ['Quilpué', 'Quintero'])
+        resp = self.client.get('/api/autocompletar/', {'q': 'viña', 'tipo': 'comuna'})
+        self.assertEqual(resp.json(), [])
+
+    def test_cambio_en_otro_proceso_invalida_el_indice(self):
+        self.client.get('/api/autocompletar/', {'q': 'qui', 'tipo': 'comuna'})
+        # bulk_create no envía señales: como si el registro lo hubiera creado otro worker,
+        # que solo cambia la generación en la caché compartida
+        Comuna.objects.bulk_create([Comuna(nombre="Quillota", ciudad=self.ciudad)])
+        resp = self.client.get('/api/autocompletar/', {'q': 'qui', 'tipo': 'comuna'})
+        self.assertEqual([d['nombre'] for d in resp.json()], ['Quintero'])
+
+        cache.set(similitud.CLAVE_GENERACION.format(modelo=Comuna._meta.label), 'otro-worker', None)
+        resp = self.client.get('/api/autocompletar/', {'q': 'qui', 'tipo': 'comuna'})
+        self.assertEqual([d['nombre'] for d in resp.json()], ['Quillota', 'Quintero'])
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get('/api/autocompletar/', {'tipo': 'comuna'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/autocompletar/', {'q': 'a', 'tipo': 'pais'}).status_code, 400)
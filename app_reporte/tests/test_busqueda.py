@@ -0,0 +1,87 @@
+from django.contrib.auth.models import User, Group
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte
+
+
+class BusquedaTextoCompletoTest(APITestCase):
+    def setUp(self):
+        self.plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.medida_lenia = Medida.objects.create(
+            referencia_pda='Art. 10',
+            nombre_corto='Recambio de calefactores',
+            descripcion='Programa de recambio de calefactores a leña por sistemas de calefacción eficientes',
+            indicador='Número de calefactores recambiados',
+            formula_calculo='Suma de calefactores',
+            frecuencia_reporte='anual',
+            tipo_medida='no_regulatoria',
+            plan=self.plan
+        )
+        self.medida_emisiones = Medida.objects.create(
+            referencia_pda='Art. 20',
+            nombre_corto='Control industrial',
+            descripcion='Fiscalización de emisiones de material particulado en fuentes fijas',
+            indicador='Porcentaje de fuentes fiscalizadas',
+            formula_calculo='(Fuentes fiscalizadas / total de fuentes) * 100',
+            frecuencia_reporte='anual',
+            tipo_medida='regulatoria',
+            plan=self.plan
+        )
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        self.otro_org = OrganismoResponsable.objects.create(nombre="OtroOrg")
+        self.reporte = Reporte.objects.create(
+            medida=self.medida_lenia, organismo=self.org,
+            descripcion='Se recambiaron 300 calefactores durante el invierno'
+        )
+        Reporte.objects.create(
+            medida=self.medida_lenia, organismo=self.otro_org,
+            descripcion='Se recambiaron 120 calefactores en la comuna'
+        )
+
+        self.usuario = User.objects.create_user('usuario', 'usuario@example.com', 'pw')
+        self.usuario.groups.add(Group.objects.create(name=self.org.nombre))
+        self.client_usuario = APIClient()
+        token = self.client_usuario.post('/api/token/', {'username': 'usuario', 'password': 'pw'}).data['access']
+        self.client_usuario.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_busqueda_por_raiz_y_sin_tildes(self):
+        """Las palabras se comparan por su raíz en español y sin considerar tildes."""
+        resp = self.client.get('/api/busqueda/', {'q': 'emision particulada', 'tipo': 'medidas'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([m['id'] for m in resp.data['medidas']], [self.medida_emisiones.id])
+        self.assertNotIn('busqueda', resp.data['medidas'][0])
+        self.assertGreater(resp.data['medidas'][0]['rango'], 0)
+
+    def test_resultados_ordenados_por_relevancia(self):
+        """Una coincidencia en el nombre pesa más que en el indicador."""
+        Medida.objects.create(
+            referencia_pda='Art. 30', nombre_corto='Educación ambiental',
+            indicador='Talleres sobre calefactores', formula_calculo='Suma',
+            frecuencia_reporte='anual', tipo_medida='no_regulatoria', plan=self.plan
+        )
+        resp = self.client.get('/api/busqueda/', {'q': 'calefactores', 'tipo': 'medidas'})
+        self.assertEqual(resp.data['medidas'][0]['id'], self.medida_lenia.id)
+        self.assertEqual(len(resp.data['medidas']), 2)
+
+    def test_vector_se_actualiza_al_guardar(self):
+        self.medida_emisiones.descripcion = 'Fiscalización de quemas agrícolas'
+        self.medida_emisiones.save()
+        resp = self.client.get('/api/busqueda/', {'q': 'quema', 'tipo': 'medidas'})
+        self.assertEqual([m['id'] for m in resp.data['medidas']], [self.medida_emisiones.id])
+
+    def test_reportes_limitados_al_organismo_del_usuario(self):
+        resp = self.client_usuario.get('/api/busqueda/', {'q': 'recambio calefactores'})
+        self.assertEqual([r['id'] for r in resp.data['reportes']], [self.reporte.id])
+
+        resp = self.client.get('/api/busqueda/', {'q': 'calefactores'})
+        self.assertEqual(resp.data['reportes'], [])
+
+    def test_busqueda_requiere_texto(self):
+        resp = self.client.get('/api/busqueda/')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_limite_se_acota_entre_1_y_100(self):
+        for limite in ('-1', '0'):
+            resp = self.client.get('/api/busqueda/', {'q': 'calefactores', 'tipo': 'medidas', 'limite': limite})
+            self.assertEqual(resp.status_code, status.HTTP_200_OK, limite)
+            self.assertEqual(len(resp.data['medidas']), 1, limite)
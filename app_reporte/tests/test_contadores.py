@@ -0,0 +1,94 @@
+from django.contrib.auth.models import User, Group
+from django.core.management import call_command
+from io import StringIO
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from app_reporte import contadores
+from app_reporte.contadores import recalcular_contadores
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte
+
+
+class ContadoresReportesTest(APITestCase):
+    def setUp(self):
+        self.plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.medida = Medida.objects.create(
+            referencia_pda='R1',
+            nombre_corto='NC1',
+            indicador='I1',
+            formula_calculo='F1',
+            frecuencia_reporte='anual',
+            tipo_medida='regulatoria',
+            plan=self.plan
+        )
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+
+        # Representante que crea reportes
+        self.representante = User.objects.create_user('rep', 'rep@example.com', 'pw')
+        org_group = Group.objects.create(name=self.org.nombre)
+        rep_group = Group.objects.create(name='Representante Organismo Responsable')
+        self.representante.groups.add(org_group, rep_group)
+
+        # Administrador que cambia estados
+        self.admin = User.objects.create_user('revisor', 'revisor@example.com', 'pw')
+        self.admin.groups.add(Group.objects.create(name='Administrador'))
+
+        self.client_rep = self._cliente('rep')
+        self.client_admin = self._cliente('revisor')
+
+    def _cliente(self, username):
+        cliente = APIClient()
+        resp = cliente.post('/api/token/', {'username': username, 'password': 'pw'})
+        cliente.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        return cliente
+
+    def _contadores(self, obj):
+        obj.refresh_from_db()
+        return obj.reportes_pendientes, obj.reportes_aprobados, obj.reportes_rechazados
+
+    def test_contadores_se_mantienen_en_escrituras(self):
+        """Crear, cambiar estado y eliminar reportes ajusta los contadores."""
+        resp = self.client_rep.post('/api/reporte/', {
+            'medida': self.medida.id, 'organismo': self.org.id
+        }, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        reporte_id = resp.data['id']
+        self.assertEqual(self._contadores(self.medida), (1, 0, 0))
+        self.assertEqual(self._contadores(self.org), (1, 0, 0))
+
+        resp = self.client_admin.put(f'/api/reportes/{reporte_id}/estado/', {'estado': 'rechazado'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._contadores(self.medida), (0, 0, 1))
+        self.assertEqual(self._contadores(self.org), (0, 0, 1))
+
+        resp = self.client_rep.delete(f'/api/reporte/{reporte_id}')
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._contadores(self.medida), (0, 0, 0))
+        self.assertEqual(self._contadores(self.org), (0, 0, 0))
+
+    def test_contadores_expuestos_y_solo_lectura(self):
+        """Los contadores aparecen en la API pero no se pueden escribir."""
+        resp = self.client_admin.get(f'/api/medidas/{self.medida.id}/')
+        self.assertEqual(resp.data['reportes_pendientes'], 0)
+        resp = self.client_admin.get(f'/api/organismo-responsable/{self.org.id}/')
+        self.assertIn('reportes_aprobados', resp.data)
+
+    def test_recalcular_contadores_repara_desvios(self):
+        """El comando de reconciliación recalcula los contadores desde los reportes."""
+        Reporte.objects.create(medida=self.medida, organismo=self.org, estado='aprobado')
+        Medida.objects.filter(pk=self.medida.pk).update(reportes_pendientes=7)
+
+        call_command('recalcular_contadores', stdout=StringIO())
+
+        self.assertEqual(self._contadores(self.medida), (0, 1, 0))
+        self.assertEqual(self._contadores(self.org), (0, 1, 0))
+
+    def test_eliminacion_repetida_descuenta_una_vez(self):
+        """Dos instancias leídas antes de eliminar (como dos solicitudes concurrentes) descuentan una sola vez."""
+        Reporte.objects.create(medida=self.medida, organismo=self.org)
+        recalcular_contadores()
+        primera, segunda = Reporte.objects.get(), Reporte.objects.get()
+
+        self.assertTrue(contadores.eliminar_reporte(primera))
+        self.assertFalse(contadores.eliminar_reporte(segunda))
+        self.assertEqual(self._contadores(self.medida), (0, 0, 0))
+        self.assertEqual(self._contadores(self.org), (0, 0, 0))
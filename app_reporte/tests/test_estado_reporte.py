@@ -0,0 +1,48 @@
+import unittest
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte
+
+
+class EstadoReporteCompactoTest(TestCase):
+    def setUp(self):
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        for numero, (estado, fecha) in enumerate([
+            ('rechazado', date(2024, 1, 1)), ('pendiente', date(2024, 3, 1)),
+            ('aprobado', date(2024, 2, 1)), ('pendiente', date(2024, 1, 15)),
+        ]):
+            medida = Medida.objects.create(
+                referencia_pda=f'Art. {numero}', nombre_corto=f'Medida {numero}', indicador='Indicador',
+                formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+            )
+            reporte = Reporte.objects.create(medida=medida, organismo=self.org, estado=estado)
+            Reporte.objects.filter(pk=reporte.pk).update(fecha_envio=fecha)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def test_estado_se_guarda_como_entero_y_se_expone_como_texto(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT DISTINCT estado FROM {Reporte._meta.db_table} ORDER BY estado")
+            self.assertEqual([fila[0] for fila in cursor.fetchall()], [1, 2, 3])
+        self.assertEqual(Reporte.objects.filter(estado='pendiente').count(), 2)
+
+        resp = self.cliente.get('/api/reportes/', {'ordering': 'estado'})
+        self.assertEqual(
+            [r['estado'] for r in resp.data['results']], ['aprobado', 'pendiente', 'pendiente', 'rechazado']
+        )
+
+    def test_cola_de_pendientes_por_fecha(self):
+        resp = self.cliente.get('/api/reportes/', {'organismo': self.org.id, 'estado': 'pendiente', 'ordering': 'fecha_envio'})
+        self.assertEqual([r['fecha_envio'] for r in resp.data['results']], ['2024-01-15', '2024-03-01'])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', "Índices parciales verificados en PostgreSQL")
+    def test_cola_de_pendientes_usa_indice_parcial(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = Reporte.objects.filter(organismo=self.org, estado='pendiente').order_by('fecha_envio').explain()
+        self.assertIn('reporte_pendientes_idx', plan)
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import threading
+import unittest
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User, Group
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from app_reporte import eventos
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte, HistorialEstadoReporte
+
+
+class BusLocalTest(SimpleTestCase):
+    async def test_entrega_a_suscriptores_del_canal_desde_otro_hilo(self):
+        bus = eventos.BusLocal()
+        suscripcion = bus.suscribir(['organismo:1'])
+        otra = bus.suscribir(['organismo:2'])
+
+        hilo = threading.Thread(target=bus.publicar, args=('organismo:1', {'id': 1}))
+        hilo.start()
+        hilo.join()
+        self.assertEqual(await suscripcion.siguiente(timeout=1), {'id': 1})
+        self.assertIsNone(await otra.siguiente(timeout=0.01))
+
+        suscripcion.cerrar()
+        otra.cerrar()
+        self.assertEqual(bus._suscripciones, {})
+
+    async def test_cola_llena_descarta_lo_mas_antiguo(self):
+        bus = eventos.BusLocal()
+        suscripcion = bus.suscribir(['todos'])
+        for numero in range(eventos.TAMANO_COLA + 5):
+            bus.publicar('todos', {'id': numero})
+        await asyncio.sleep(0)
+        self.assertEqual((await suscripcion.siguiente(timeout=1))['id'], 5)
+        suscripcion.cerrar()
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "LISTEN/NOTIFY requiere PostgreSQL")
+class BusPostgresTest(TransactionTestCase):
+    async def test_entrega_entre_conexiones_con_notify(self):
+        bus = eventos.BusPostgres()
+        suscripcion = bus.suscribir(['organismo:1'])
+        self.assertTrue(await sync_to_async(bus.escuchando.wait)(5))
+
+        await sync_to_async(bus.publicar)('organismo:1', {'id': 7})
+        self.assertEqual(await suscripcion.siguiente(timeout=5), {'id': 7})
+        suscripcion.cerrar()
+        await sync_to_async(bus.detener)()
+
+
+class FlujoEventosTest(TestCase):
+    def setUp(self):
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        otro_org = OrganismoResponsable.objects.create(nombre="OtroOrg")
+        medida = Medida.objects.create(
+            referencia_pda='Art. 1', nombre_corto='Medida 1', indicador='Indicador',
+            formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+        )
+        self.reporte = Reporte.objects.create(medida=medida, organismo=self.org, estado='rechazado')
+        ajeno = Reporte.objects.create(medida=medida, organismo=otro_org, estado='aprobado')
+        self.entrada = HistorialEstadoReporte.objects.create(
+            reporte=self.reporte, estado_anterior='pendiente', estado_nuevo='rechazado'
+        )
+        HistorialEstadoReporte.objects.create(reporte=ajeno, estado_anterior='pendiente', estado_nuevo='aprobado')
+
+        usuario = User.objects.create_user('usuario', 'usuario@example.com', 'pw')
+        usuario.groups.add(Group.objects.create(name=self.org.nombre))
+        self.token = str(AccessToken.for_user(usuario))
+
+    async def test_flujo_recupera_pendientes_y_recibe_cambios_del_organismo(self):
+        resp = await self.async_client.get(
+            '/api/reportes/eventos/', {'token': self.token}, headers={'Last-Event-ID': '0'}
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        contenido = resp.streaming_content.__aiter__()
+
+        async def siguiente():
+            return (await asyncio.wait_for(anext(contenido), 2)).decode()
+
+        try:
+            self.assertTrue((await siguiente()).startswith('retry:'))
+            # Solo el cambio del organismo del usuario
+            pendiente = await siguiente()
+            self.assertIn(f"id: {self.entrada.id}\n", pendiente)
+            self.assertEqual(json.loads(pendiente.split('data: ')[1])['estado_nuevo'], 'rechazado')
+
+            nuevo = dict(eventos.evento_cambio_estado(self.entrada, self.reporte), id=self.entrada.id + 100)
+            await sync_to_async(eventos.obtener_bus().publicar)(eventos.canal_organismo(self.org.id), nuevo)
+            en_vivo = await siguiente()
+            self.assertIn(f"id: {self.entrada.id + 100}\n", en_vivo)
+        finally:
+            await contenido.aclose()
+
+    async def test_recupera_todo_lo_perdido_por_paginas(self):
+        entradas = [self.entrada]
+        for estado in ('pendiente', 'aprobado', 'rechazado'):
+            entradas.append(await HistorialEstadoReporte.objects.acreate(
+                reporte=self.reporte, estado_anterior=entradas[-1].estado_nuevo, estado_nuevo=estado
+            ))
+        with mock.patch.object(eventos, 'PAGINA_PENDIENTES', 2):
+            resp = await self.async_client.get(
+                '/api/reportes/eventos/', {'token': self.token}, headers={'Last-Event-ID': '0'}
+            )
+            contenido = resp.streaming_content.__aiter__()
+            try:
+                await asyncio.wait_for(anext(contenido), 2)
+                recibidos = [(await asyncio.wait_for(anext(contenido), 2)).decode() for _ in entradas]
+            finally:
+                await contenido.aclose()
+        for entrada, evento in zip(entradas, recibidos):
+            self.assertIn(f"id: {entrada.id}\n", evento)
+
+    async def test_requiere_autenticacion(self):
+        resp = await self.async_client.get('/api/reportes/eventos/')
+        self.assertEqual(resp.status_code, 401)
+        resp = await self.async_client.get('/api/reportes/eventos/', {'token': 'invalido'})
+        self.assertEqual(resp.status_code, 401)
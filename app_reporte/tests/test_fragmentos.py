@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APIClient
+from app_reporte import fragmentos
+from app_reporte.contadores import recalcular_contadores
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte
+from app_reporte.serializers import ReporteSerializer
+
+
+class FragmentosTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        medida = Medida.objects.create(
+            referencia_pda='Art. 1', nombre_corto='Medida 1', indicador='Indicador',
+            formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+        )
+        self.reportes = [
+            Reporte.objects.create(
+                medida=medida, organismo=OrganismoResponsable.objects.create(nombre=f"Org {n}"),
+                descripcion=f"Avance {n}"
+            )
+            for n in range(3)
+        ]
+        recalcular_contadores()
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def consultas_de_filas(self, consultas):
+        # Las consultas que leen las filas completas incluyen la descripción
+        return [c['sql'] for c in consultas.captured_queries if 'descripcion' in c['sql']]
+
+    def test_segunda_lectura_desde_la_cache(self):
+        with CaptureQueriesContext(connection) as primera:
+            resp = self.cliente.get('/api/reportes/', {'ordering': 'fecha_envio'})
+        self.assertEqual(len(self.consultas_de_filas(primera)), 1)
+        esperado = ReporteSerializer(Reporte.objects.all(), many=True).data
+        self.assertEqual(sorted(resp.data['results'], key=lambda r: r['id']), esperado)
+
+        with CaptureQueriesContext(connection) as segunda:
+            repetida = self.cliente.get('/api/reportes/', {'ordering': 'fecha_envio'})
+        self.assertEqual(self.consultas_de_filas(segunda), [])
+        self.assertEqual(repetida.data, resp.data)
+
+        detalle = self.cliente.get(f'/api/reporte/{self.reportes[0].id}', {'fields': 'id,descripcion'})
+        self.assertEqual(detalle.data, {'id': self.reportes[0].id, 'descripcion': "Avance 0"})
+
+    def test_modificacion_cambia_la_clave(self):
+        self.cliente.get('/api/reportes/')
+        reporte = self.reportes[1]
+        reporte.estado = 'aprobado'
+        reporte.save()
+        with CaptureQueriesContext(connection) as consultas:
+            resp = self.cliente.get('/api/reportes/')
+        # Solo el reporte modificado se vuelve a serializar
+        self.assertEqual(len(self.consultas_de_filas(consultas)), 1)
+        estados = {r['id']: r['estado'] for r in resp.data['results']}
+        self.assertEqual(estados[self.reportes[1].id], 'aprobado')
+
+    def test_sin_updated_at_y_eliminados(self):
+        Reporte.objects.filter(pk=self.reportes[2].pk).update(updated_at=None)
+        # Un reporte sin updated_at se serializa siempre y uno que ya no existe se omite
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as consultas:
+                resultado = fragmentos.obtener([(self.reportes[2].id, None), (0, None)])
+            self.assertEqual([r['id'] for r in resultado], [self.reportes[2].id])
+            self.assertEqual(len(self.consultas_de_filas(consultas)), 1)
@@ -0,0 +1,98 @@
+from django.contrib.auth.models import User, Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte, HistorialEstadoReporte
+
+
+class HistorialEstadoReporteAPITest(APITestCase):
+    def setUp(self):
+        self.plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.medida = Medida.objects.create(
+            referencia_pda='R1',
+            nombre_corto='NC1',
+            indicador='I1',
+            formula_calculo='F1',
+            frecuencia_reporte='anual',
+            tipo_medida='regulatoria',
+            plan=self.plan
+        )
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        self.otro_org = OrganismoResponsable.objects.create(nombre="OtroOrg")
+
+        self.reporte = Reporte.objects.create(medida=self.medida, organismo=self.org)
+        self.reporte_ajeno = Reporte.objects.create(medida=self.medida, organismo=self.otro_org)
+        self.superadmin = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        for reporte in (self.reporte, self.reporte_ajeno):
+            HistorialEstadoReporte.objects.create(
+                reporte=reporte, estado_anterior='pendiente', estado_nuevo='rechazado', created_by=self.superadmin
+            )
+            HistorialEstadoReporte.objects.create(
+                reporte=reporte, estado_anterior='rechazado', estado_nuevo='pendiente', created_by=self.superadmin
+            )
+
+        self.usuario = User.objects.create_user('usuario', 'usuario@example.com', 'pw')
+        self.usuario.groups.add(Group.objects.create(name=self.org.nombre))
+
+        self.client_admin = self._cliente('admin', 'admin')
+        self.client_usuario = self._cliente('usuario', 'pw')
+
+    def _cliente(self, username, password):
+        cliente = APIClient()
+        resp = cliente.post('/api/token/', {'username': username, 'password': password})
+        cliente.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        return cliente
+
+    def test_historial_de_un_reporte_paginado(self):
+        """La línea de tiempo se entrega en orden cronológico con paginación por cursor."""
+        resp = self.client_admin.get(f'/api/reportes/{self.reporte.id}/historial/', {'page_size': 1})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data['results']), 1)
+        self.assertEqual(resp.data['results'][0]['estado_nuevo'], 'rechazado')
+        self.assertIsNotNone(resp.data['next'])
+
+        resp = self.client_admin.get(resp.data['next'])
+        self.assertEqual(resp.data['results'][0]['estado_nuevo'], 'pendiente')
+
+    def test_historial_de_reporte_ajeno_no_visible(self):
+        resp = self.client_usuario.get(f'/api/reportes/{self.reporte_ajeno.id}/historial/')
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_historial_de_varios_reportes_en_una_consulta(self):
+        """Las líneas de tiempo de varios reportes se agrupan por ID con una sola consulta al historial."""
+        url = f'/api/reportes/historial/?reportes={self.reporte.id},{self.reporte_ajeno.id}'
+        self.client_admin.get(url)  # calienta la autenticación
+        with CaptureQueriesContext(connection) as consultas:
+            resp = self.client_admin.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data[str(self.reporte.id)]), 2)
+        self.assertEqual(len(resp.data[str(self.reporte_ajeno.id)]), 2)
+        consultas_historial = [q for q in consultas.captured_queries if 'historialestadoreporte' in q['sql']]
+        self.assertEqual(len(consultas_historial), 1)
+
+    def test_historial_de_varios_reportes_filtra_por_organismo(self):
+        resp = self.client_usuario.get(f'/api/reportes/historial/?reportes={self.reporte.id},{self.reporte_ajeno.id}')
+        self.assertEqual(len(resp.data[str(self.reporte.id)]), 2)
+        self.assertEqual(resp.data[str(self.reporte_ajeno.id)], [])
+
+    def test_historial_de_varios_reportes_valida_ids(self):
+        resp = self.client_admin.get('/api/reportes/historial/?reportes=1,abc')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_estados_como_enteros_y_usuario_desde_created_by(self):
+        """Los estados se guardan como códigos enteros y la API sigue entregando nombres."""
+        HistorialEstadoReporte.objects.create(reporte=self.reporte, estado_anterior='pendiente', estado_nuevo='aprobado')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT estado_anterior, estado_nuevo FROM {HistorialEstadoReporte._meta.db_table} "
+                "WHERE reporte_id = %s ORDER BY id", [self.reporte.id]
+            )
+            self.assertEqual(cursor.fetchall(), [(2, 3), (3, 2), (2, 1)])
+
+        resp = self.client_admin.get(f'/api/reportes/{self.reporte.id}/historial/')
+        self.assertEqual(
+            [(e['estado_anterior'], e['estado_nuevo'], e['actualizado_por']) for e in resp.data['results']],
+            [('pendiente', 'rechazado', 'admin'), ('rechazado', 'pendiente', 'admin'), ('pendiente', 'aprobado', 'Desconocido')]
+        )
+        self.assertEqual(HistorialEstadoReporte.objects.filter(estado_nuevo__in=['aprobado', 'rechazado']).count(), 3)
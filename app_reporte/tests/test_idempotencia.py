@@ -0,0 +1,68 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User, Group
+from django.utils.timezone import now
+from rest_framework.test import APITestCase, APIClient
+from app_reporte import idempotencia
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte, ClaveIdempotencia
+
+
+class IdempotenciaTest(APITestCase):
+    def setUp(self):
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        self.medida = Medida.objects.create(
+            referencia_pda='Art. 1', nombre_corto='Medida 1', indicador='Indicador',
+            formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+        )
+        self.usuario = User.objects.create_user('usuario', 'usuario@example.com', 'pw')
+        self.usuario.groups.add(Group.objects.create(name='Representante Organismo Responsable'))
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.usuario)
+        self.datos = {'medida': self.medida.id, 'organismo': self.org.id, 'descripcion': 'Avance'}
+
+    def crear(self, clave):
+        return self.cliente.post('/api/reporte/', self.datos, format='multipart', HTTP_IDEMPOTENCY_KEY=clave)
+
+    def test_reintento_reproduce_la_primera_respuesta(self):
+        primera = self.crear('clave-1')
+        self.assertEqual(primera.status_code, 201)
+
+        with mock.patch('app_reporte.views.ReporteSerializer') as serializer:
+            repetida = self.crear('clave-1')
+        serializer.assert_not_called()
+        self.assertEqual(repetida.status_code, 201)
+        self.assertEqual(repetida.json(), primera.json())
+        self.assertEqual(repetida[idempotencia.CABECERA_REPRODUCIDA], 'true')
+        self.assertEqual(Reporte.objects.count(), 1)
+
+        # Otra clave ejecuta la vista: el duplicado del día se rechaza
+        self.assertEqual(self.crear('clave-2').status_code, 400)
+
+    def test_solicitud_en_curso_y_clave_reutilizada(self):
+        ClaveIdempotencia.objects.create(
+            usuario=self.usuario, clave='en-curso', metodo='POST', ruta='/api/reporte/',
+            expira_en=now() + timedelta(minutes=5)
+        )
+        self.assertEqual(self.crear('en-curso').status_code, 409)
+        self.assertFalse(Reporte.objects.exists())
+
+        id_reporte = self.crear('clave-1').data['id']
+        self.usuario.groups.add(Group.objects.create(name='Administrador'))
+        resp = self.cliente.put(
+            f'/api/reportes/{id_reporte}/estado/', {'estado': 'aprobado'}, format='json',
+            HTTP_IDEMPOTENCY_KEY='clave-1'
+        )
+        self.assertEqual(resp.status_code, 422)
+
+    def test_clave_vencida_se_reutiliza(self):
+        self.crear('clave-1')
+        ClaveIdempotencia.objects.update(expira_en=now() - timedelta(seconds=1))
+        resp = self.crear('clave-1')
+        self.assertEqual(resp.status_code, 400)
+        self.assertNotIn(idempotencia.CABECERA_REPRODUCIDA, resp)
+        self.assertEqual(ClaveIdempotencia.objects.get().codigo_respuesta, 400)
+
+        ClaveIdempotencia.objects.update(expira_en=now() - timedelta(seconds=1))
+        self.assertEqual(idempotencia.purgar_vencidas(), 1)
@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+from app_reporte import lectura
+from app_reporte.contadores import recalcular_contadores
+from app_reporte.models import PlanPPDA, Region, Ciudad, Comuna, Medida, OrganismoResponsable, Reporte, \
+    MedioVerificacion
+from app_reporte.proyeccion import Proyeccion
+from app_reporte.serializers import ReporteSerializer, MedidaSerializer, PlanPPDASerializer, ComunaSerializer
+
+
+class LecturaTest(APITestCase):
+    def setUp(self):
+        region = Region.objects.create(nombre="Región Test")
+        ciudad = Ciudad.objects.create(nombre="Ciudad Test", region=region)
+        self.comunas = [Comuna.objects.create(nombre=f"Comuna {n}", ciudad=ciudad) for n in range(2)]
+        self.plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.plan.comunas.set(self.comunas)
+        PlanPPDA.objects.create(nombre="Plan sin comunas", mes_reporte=2, anio=2025)
+        self.orgs = [OrganismoResponsable.objects.create(nombre=f"Org {n}") for n in range(2)]
+        self.medidas = []
+        for n in range(2):
+            medida = Medida.objects.create(
+                referencia_pda=f'Art. {n}', nombre_corto=f'Medida {n}', indicador='Indicador',
+                formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=self.plan
+            )
+            self.medidas.append(medida)
+        self.medidas[0].organismos.set(self.orgs)
+        medio = MedioVerificacion.objects.create(descripcion="Informe técnico", tipo="informe_anual", medida=self.medidas[0])
+        Reporte.objects.create(
+            medida=self.medidas[0], organismo=self.orgs[0], descripcion="Con archivo y medio",
+            medio_verificacion=medio, archivo=SimpleUploadedFile("informe.pdf", b"%PDF-1.4 prueba")
+        )
+        Reporte.objects.create(medida=self.medidas[1], organismo=self.orgs[1], estado='aprobado')
+        recalcular_contadores()
+
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def assertMismoJSON(self, serializer_class, queryset, proyeccion=None):
+        proyeccion = proyeccion or Proyeccion()
+        esperado = serializer_class(
+            proyeccion.optimizar(queryset, serializer_class), many=True, proyeccion=proyeccion
+        ).data
+        lector = lectura.lector(serializer_class, proyeccion)
+        self.assertIsNotNone(lector)
+        self.assertEqual(JSONRenderer().render(lector.filas(queryset)), JSONRenderer().render(esperado))
+
+    def test_json_identico_al_serializer(self):
+        self.assertMismoJSON(ReporteSerializer, Reporte.objects.order_by('pk'))
+        self.assertMismoJSON(MedidaSerializer, Medida.objects.order_by('pk'))
+        self.assertMismoJSON(PlanPPDASerializer, PlanPPDA.objects.order_by('pk'))
+        self.assertMismoJSON(ComunaSerializer, Comuna.objects.order_by('pk'))
+
+    def test_json_identico_con_campos(self):
+        self.assertMismoJSON(
+            ReporteSerializer, Reporte.objects.order_by('pk'), Proyeccion(campos={'estado', 'archivo', 'created_at'})
+        )
+        self.assertMismoJSON(MedidaSerializer, Medida.objects.order_by('pk'), Proyeccion(campos={'organismos'}))
+
+    def test_expansion_usa_el_serializer(self):
+        self.assertIsNone(lectura.lector(MedidaSerializer, Proyeccion(expandir={'plan': Proyeccion()})))
+
+    def test_endpoint_responde_igual_que_el_serializer(self):
+        resp = self.cliente.get('/api/reportes/')
+        self.assertEqual(resp.status_code, 200)
+        esperado = ReporteSerializer(Reporte.objects.order_by('pk'), many=True).data
+        obtenido = sorted(resp.data['results'], key=lambda r: r['id'])
+        self.assertEqual(JSONRenderer().render(obtenido), JSONRenderer().render(esperado))
+
+        resp = self.cliente.get('/api/planes/')
+        self.assertEqual(sorted(p['comunas'] for p in resp.data), [[], [c.id for c in self.comunas]])
+
+    def test_comando_comparar_serializacion(self):
+        call_command('comparar_serializacion', 'reportes', 'planes', filas=10, repeticiones=1)
@@ -0,0 +1,103 @@
+import unittest
+from datetime import date, datetime, timezone
+from io import StringIO
+
+from django.contrib.auth.models import User, Group
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from app_reporte import particiones
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte, HistorialEstadoReporte
+
+
+class DatosReportesMixin:
+    def crear_datos(self):
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        otro_org = OrganismoResponsable.objects.create(nombre="OtroOrg")
+        self.reportes = {}
+        for numero, (organismo, fecha) in enumerate([
+            (self.org, date(2023, 5, 10)), (self.org, date(2024, 3, 1)), (otro_org, date(2024, 7, 1)),
+        ]):
+            medida = Medida.objects.create(
+                referencia_pda=f'Art. {numero}', nombre_corto=f'Medida {numero}', indicador='Indicador',
+                formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+            )
+            reporte = Reporte.objects.create(medida=medida, organismo=organismo)
+            Reporte.objects.filter(pk=reporte.pk).update(fecha_envio=fecha)
+            self.reportes[(organismo.nombre, fecha.year)] = reporte
+
+
+class FiltrosPeriodoReportesTest(DatosReportesMixin, TestCase):
+    def setUp(self):
+        self.crear_datos()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.usuario = User.objects.create_user('usuario', 'usuario@example.com', 'pw')
+        self.usuario.groups.add(Group.objects.create(name=self.org.nombre))
+
+    def listar(self, usuario, **params):
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        return cliente.get('/api/reportes/', params)
+
+    def test_filtro_por_anio_y_rango(self):
+        resp = self.listar(self.admin, anio=2024)
+        self.assertEqual(resp.data['count'], 2)
+        resp = self.listar(self.admin, desde='2024-01-01', hasta='2024-03-01')
+        self.assertEqual([r['id'] for r in resp.data['results']], [self.reportes[('OrgTest', 2024)].id])
+        self.assertEqual(self.listar(self.admin, desde='01-01-2024').status_code, 400)
+        self.assertEqual(self.listar(self.admin, anio='x').status_code, 400)
+        for anio in ('0', '9999', '-5', '²', '9' * 40):
+            self.assertEqual(self.listar(self.admin, anio=anio).status_code, 400)
+
+    def test_usuario_ve_solo_reportes_de_su_organismo(self):
+        resp = self.listar(self.usuario, anio=2024)
+        self.assertEqual([r['id'] for r in resp.data['results']], [self.reportes[('OrgTest', 2024)].id])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Particionamiento solo en PostgreSQL")
+class ParticionesHistorialTest(DatosReportesMixin, TestCase):
+    def setUp(self):
+        self.crear_datos()
+        self.reporte = self.reportes[('OrgTest', 2024)]
+
+    def registrar(self, fecha):
+        entrada = HistorialEstadoReporte.objects.create(
+            reporte=self.reporte, estado_anterior='pendiente', estado_nuevo='aprobado'
+        )
+        HistorialEstadoReporte.objects.filter(pk=entrada.pk).update(fecha=fecha)
+        return entrada
+
+    def filas_en(self, tabla):
+        with connection.cursor() as cursor:
+            # Las FK son diferidas: se validan antes de modificar la estructura de la tabla
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute(f"SELECT id FROM {tabla}")
+            return [fila[0] for fila in cursor.fetchall()]
+
+    def test_tabla_particionada_por_anio(self):
+        self.assertTrue(particiones.tabla_particionada())
+        self.assertIn(datetime.now().year + 1, particiones.anios_particionados())
+        entrada = self.registrar(datetime(2090, 6, 1, tzinfo=timezone.utc))
+        self.assertEqual(self.filas_en(f'{particiones.TABLA_HISTORIAL}_default'), [entrada.id])
+        self.assertEqual(HistorialEstadoReporte.objects.get(pk=entrada.pk).reporte, self.reporte)
+
+    def test_crear_particion_mueve_filas_de_la_particion_por_defecto(self):
+        entrada = self.registrar(datetime(2090, 6, 1, tzinfo=timezone.utc))
+        self.filas_en(particiones.TABLA_HISTORIAL)
+        self.assertTrue(particiones.crear_particion(2090))
+        self.assertFalse(particiones.crear_particion(2090))
+        self.assertEqual(self.filas_en(f'{particiones.TABLA_HISTORIAL}_2090'), [entrada.id])
+        self.assertEqual(self.filas_en(f'{particiones.TABLA_HISTORIAL}_default'), [])
+
+        particiones.desvincular_particion(2090, eliminar=True)
+        self.assertNotIn(2090, particiones.anios_particionados())
+        self.assertFalse(HistorialEstadoReporte.objects.filter(pk=entrada.pk).exists())
+
+    def test_comando_crea_particiones_futuras(self):
+        salida = StringIO()
+        call_command('gestionar_particiones', anios_futuros=3, stdout=salida)
+        anio = datetime.now().year
+        self.assertTrue({anio, anio + 1, anio + 2, anio + 3} <= set(particiones.anios_particionados()))
+        self.assertIn(f"Partición {anio + 3} creada.", salida.getvalue())
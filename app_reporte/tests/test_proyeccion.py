@@ -0,0 +1,87 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APIClient
+from app_reporte.contadores import recalcular_contadores
+from app_reporte.models import PlanPPDA, Region, Ciudad, Comuna, Medida, OrganismoResponsable, Reporte
+
+
+class ProyeccionTest(APITestCase):
+    def setUp(self):
+        region = Region.objects.create(nombre="Región Test")
+        ciudad = Ciudad.objects.create(nombre="Ciudad Test", region=region)
+        self.comuna = Comuna.objects.create(nombre="Comuna Test", ciudad=ciudad)
+        self.plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.plan.comunas.add(self.comuna)
+        self.orgs = [OrganismoResponsable.objects.create(nombre=f"Org {n}") for n in range(3)]
+        self.medidas = []
+        for n in range(3):
+            medida = Medida.objects.create(
+                referencia_pda=f'Art. {n}', nombre_corto=f'Medida {n}', indicador='Indicador',
+                formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=self.plan
+            )
+            medida.organismos.set(self.orgs)
+            self.medidas.append(medida)
+        recalcular_contadores()
+
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def crear_reportes(self, desde, hasta):
+        # Una combinación distinta de medida y organismo por reporte (uno por día)
+        for n in range(desde, hasta):
+            Reporte.objects.create(medida=self.medidas[n % 3], organismo=self.orgs[n // 3], descripcion=f"R{n}")
+
+    def test_campos_limitan_respuesta_y_columnas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            resp = self.client.get('/api/medidas/', {'fields': 'id,nombre_corto'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data[0], {'id': self.medidas[0].id, 'nombre_corto': 'Medida 0'})
+        sql = consultas.captured_queries[0]['sql']
+        self.assertNotIn('formula_calculo', sql)
+        self.assertNotIn('descripcion', sql)
+
+    def test_expansion_con_cantidad_fija_de_consultas(self):
+        parametros = {'expand': 'plan,organismos', 'fields': 'id,plan,organismos'}
+        with CaptureQueriesContext(connection) as pocas:
+            resp = self.client.get('/api/medidas/', parametros)
+        self.assertEqual(resp.data[0]['plan']['nombre'], "Plan Test")
+        self.assertEqual(resp.data[0]['plan']['comunas'], [self.comuna.id])
+        self.assertEqual([o['nombre'] for o in resp.data[0]['organismos']], ["Org 0", "Org 1", "Org 2"])
+
+        for n in range(3, 10):
+            medida = Medida.objects.create(
+                referencia_pda=f'Art. {n}', nombre_corto=f'Medida {n}', indicador='Indicador',
+                formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=self.plan
+            )
+            medida.organismos.set(self.orgs)
+        with CaptureQueriesContext(connection) as muchas:
+            self.client.get('/api/medidas/', parametros)
+        self.assertEqual(len(muchas), len(pocas))
+
+    def test_expansion_anidada_en_reportes(self):
+        self.crear_reportes(0, 3)
+        parametros = {'expand': 'organismo,medida.plan', 'fields': 'id,estado,organismo.nombre,medida.nombre_corto,medida.plan'}
+        with CaptureQueriesContext(connection) as pocas:
+            resp = self.cliente.get('/api/reportes/', parametros)
+        fila = resp.data['results'][0]
+        self.assertEqual(set(fila), {'id', 'estado', 'organismo', 'medida'})
+        self.assertEqual(set(fila['organismo']), {'nombre'})
+        self.assertEqual(fila['medida']['plan']['nombre'], "Plan Test")
+
+        self.crear_reportes(3, 9)
+        with CaptureQueriesContext(connection) as muchas:
+            self.cliente.get('/api/reportes/', parametros)
+        self.assertEqual(len(muchas), len(pocas))
+
+        detalle = self.cliente.get(f"/api/reporte/{fila['id']}", {'fields': 'id,descripcion'})
+        self.assertEqual(set(detalle.data), {'id', 'descripcion'})
+
+    def test_parametros_invalidos(self):
+        resp = self.client.get('/api/medidas/', {'fields': 'id,inexistente'})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('inexistente', resp.data['error'])
+        self.assertEqual(self.client.get('/api/regiones/', {'expand': 'ciudades'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/medidas/', {'fields': 'plan.nombre'}).status_code, 400)
+        self.assertEqual(self.client.get(f'/api/comunas/{self.comuna.id}/', {'expand': 'ciudad.region'}).data['ciudad']['region']['nombre'],
+                         "Región Test")
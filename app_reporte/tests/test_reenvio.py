@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User, Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework.test import APITestCase, APIClient
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte, HistorialEstadoReporte
+
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL)
+class ReenvioReporteTest(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+
+    def setUp(self):
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        self.medida = Medida.objects.create(
+            referencia_pda='Art. 1', nombre_corto='Medida 1', indicador='Indicador',
+            formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+        )
+        usuario = User.objects.create_user('usuario', 'usuario@example.com', 'pw')
+        usuario.groups.add(Group.objects.create(name='Representante Organismo Responsable'))
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(usuario)
+
+    def enviar(self, descripcion, reenvio=True, archivo=True):
+        datos = {'medida': self.medida.id, 'organismo': self.org.id, 'descripcion': descripcion}
+        if archivo:
+            datos['archivo'] = SimpleUploadedFile(f'{descripcion}.txt', descripcion.encode())
+        url = '/api/reporte/?reenvio=true' if reenvio else '/api/reporte/'
+        return self.cliente.post(url, datos, format='multipart')
+
+    def test_reenvio_reemplaza_reporte_pendiente(self):
+        resp = self.enviar('primero')
+        self.assertEqual(resp.status_code, 201)
+        id_reporte = resp.data['id']
+        self.assertEqual(OrganismoResponsable.objects.get(pk=self.org.pk).reportes_pendientes, 1)
+
+        resp = self.enviar('segundo')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['id'], id_reporte)
+        self.assertEqual(resp.data['descripcion'], 'segundo')
+        self.assertIn('segundo', resp.data['archivo'])
+
+        reporte = Reporte.objects.get(pk=id_reporte)
+        self.assertEqual(reporte.archivo.read(), b'segundo')
+        self.assertEqual(Reporte.objects.count(), 1)
+        self.assertEqual(OrganismoResponsable.objects.get(pk=self.org.pk).reportes_pendientes, 1)
+        historial = HistorialEstadoReporte.objects.get(reporte_id=id_reporte)
+        self.assertEqual((historial.estado_anterior, historial.estado_nuevo), ('pendiente', 'pendiente'))
+        self.assertEqual(historial.created_by.username, 'usuario')
+
+        # Sin modo reenvío el duplicado sigue rechazándose
+        self.assertEqual(self.enviar('tercero', reenvio=False).status_code, 400)
+
+    def test_reenvio_de_reporte_revisado_es_conflicto(self):
+        id_reporte = self.enviar('primero').data['id']
+        Reporte.objects.filter(pk=id_reporte).update(estado='aprobado')
+
+        resp = self.enviar('segundo')
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(Reporte.objects.get(pk=id_reporte).descripcion, 'primero')
+
+    def test_reenvio_conserva_o_reemplaza_el_archivo(self):
+        id_reporte = self.enviar('primero').data['id']
+        primero = Reporte.objects.get(pk=id_reporte).archivo.name
+
+        # Sin archivo se conserva el anterior
+        self.assertEqual(self.enviar('segundo', archivo=False).status_code, 200)
+        reporte = Reporte.objects.get(pk=id_reporte)
+        self.assertEqual((reporte.descripcion, reporte.archivo.name), ('segundo', primero))
+
+        # Con archivo nuevo, el reemplazado se elimina al confirmar
+        almacenamiento = reporte.archivo.storage
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.enviar('tercero').status_code, 200)
+        reporte = Reporte.objects.get(pk=id_reporte)
+        self.assertEqual(reporte.archivo.read(), b'tercero')
+        self.assertFalse(almacenamiento.exists(primero))
@@ -0,0 +1,80 @@
+import gzip
+import json
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from app_reporte.models import PlanPPDA, Region, Ciudad, Comuna, OrganismoResponsable, Medida
+
+
+class PaqueteReferenciaTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        region = Region.objects.create(nombre="Región de Prueba")
+        ciudad = Ciudad.objects.create(nombre="Ciudad de Prueba", region=region)
+        comuna = Comuna.objects.create(nombre="Comuna de Prueba", ciudad=ciudad)
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        plan.comunas.add(comuna)
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        medida = Medida.objects.create(
+            referencia_pda='Art. 1', nombre_corto='Medida 1', indicador='Indicador',
+            formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+        )
+        medida.organismos.add(self.org)
+
+    def test_paquete_comprimido_con_catalogos_y_opciones(self):
+        resp = self.client.get('/api/referencia/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertEqual(resp['Cache-Control'], 'no-cache')
+        datos = json.loads(gzip.decompress(resp.content))
+
+        self.assertEqual(
+            set(datos), {'regiones', 'ciudades', 'comunas', 'organismos', 'planes', 'medidas', 'opciones'}
+        )
+        self.assertEqual(datos['medidas'][0]['organismos'], [self.org.id])
+        self.assertNotIn('reportes_pendientes', datos['medidas'][0])
+        self.assertNotIn('reportes_pendientes', datos['organismos'][0])
+        self.assertIn({'valor': 'pendiente', 'etiqueta': 'Pendiente'}, datos['opciones']['reporte']['estado'])
+
+        # Sin gzip se entrega el mismo JSON sin comprimir
+        plano = self.client.get('/api/referencia/')
+        self.assertNotIn('Content-Encoding', plano)
+        self.assertEqual(json.loads(plano.content), datos)
+
+        # gzip con q=0 es un rechazo explícito
+        rechazado = self.client.get('/api/referencia/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', rechazado)
+        self.assertEqual(json.loads(rechazado.content), datos)
+
+    def test_etag_version_y_cache(self):
+        resp = self.client.get('/api/referencia/')
+        version = resp['X-Referencia-Version']
+        self.assertEqual(resp['ETag'], f'"{version}"')
+
+        with self.assertNumQueries(0):
+            resp = self.client.get('/api/referencia/', {'v': version}, HTTP_IF_NONE_MATCH=f'"{version}"')
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_etag_distinto_por_codificacion(self):
+        plano = self.client.get('/api/referencia/')
+        version = plano['X-Referencia-Version']
+        comprimido = self.client.get('/api/referencia/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(comprimido['ETag'], f'"{version}-gz"')
+        self.assertNotEqual(comprimido['ETag'], plano['ETag'])
+
+        # Cada ETag solo revalida su propia representación
+        resp = self.client.get('/api/referencia/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=comprimido['ETag'])
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], comprimido['ETag'])
+        resp = self.client.get('/api/referencia/', HTTP_IF_NONE_MATCH=comprimido['ETag'])
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('Content-Encoding', resp)
+
+    def test_cambio_en_catalogo_invalida_el_paquete(self):
+        version = self.client.get('/api/referencia/')['X-Referencia-Version']
+        Region.objects.create(nombre="Otra Región")
+
+        resp = self.client.get('/api/referencia/')
+        self.assertNotEqual(resp['X-Referencia-Version'], version)
+        self.assertIn("Otra Región", [r['nombre'] for r in json.loads(resp.content)['regiones']])
@@ -0,0 +1,133 @@
+import gzip
+import json
+import unittest
+from datetime import datetime, date, timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+from app_reporte import middleware, renderers
+from app_reporte.contadores import recalcular_contadores
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte
+
+
+class JSONRapidoRendererTest(unittest.TestCase):
+    def test_mismo_json_que_drf(self):
+        datos = {
+            'fecha': datetime(2025, 4, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            'dia': date(2025, 4, 1),
+            'monto': Decimal('1.50'),
+            'texto': 'Ñuñoa\u2028línea\u2029',
+            'traducido': gettext_lazy('Pendiente'),
+            'lista': [1, None, True, 2.5, (3, 4)],
+            5: 'clave numérica',
+        }
+        self.assertEqual(renderers.JSONRapidoRenderer().render(datos), JSONRenderer().render(datos))
+
+    def test_indentacion_usa_json_de_drf(self):
+        datos = {'a': [1, 2]}
+        tipo = 'application/json; indent=4'
+        self.assertEqual(
+            renderers.JSONRapidoRenderer().render(datos, tipo), JSONRenderer().render(datos, tipo)
+        )
+
+    def test_codificaciones_aceptadas(self):
+        self.assertEqual(middleware.codificaciones_aceptadas('gzip, deflate, br;q=0.9'), {'gzip', 'deflate', 'br'})
+        self.assertEqual(middleware.codificaciones_aceptadas('br;q=0, GZIP'), {'gzip'})
+
+
+class RespuestasTest(APITestCase):
+    def setUp(self):
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        medida = Medida.objects.create(
+            referencia_pda='Art. 1', nombre_corto='Medida 1', indicador='Indicador',
+            formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+        )
+        for n in range(30):
+            organismo = OrganismoResponsable.objects.create(nombre=f"Org {n}")
+            Reporte.objects.create(medida=medida, organismo=organismo, descripcion=f"Avance del reporte {n}")
+        recalcular_contadores()
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def test_gzip_sobre_el_umbral(self):
+        sin_comprimir = self.cliente.get('/api/reportes/', {'page_size': 30})
+        self.assertNotIn('Content-Encoding', sin_comprimir)
+        resp = self.cliente.get('/api/reportes/', {'page_size': 30}, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resp['Vary'])
+        self.assertEqual(gzip.decompress(resp.content), sin_comprimir.content)
+        self.assertLess(len(resp.content), len(sin_comprimir.content))
+
+    def test_gzip_rechazado_con_q_cero(self):
+        resp = self.cliente.get('/api/reportes/', {'page_size': 30}, HTTP_ACCEPT_ENCODING='gzip;q=0, deflate')
+        self.assertNotIn('Content-Encoding', resp)
+
+    @unittest.skipIf(middleware.brotli is None, "brotli no está instalado")
+    def test_brotli_solo_sin_cookies(self):
+        resp = self.cliente.get('/api/reportes/', {'page_size': 30}, HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(resp['Content-Encoding'], 'br')
+        self.cliente.cookies['sessionid'] = 'x'
+        resp = self.cliente.get('/api/reportes/', {'page_size': 30}, HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+
+    @override_settings(COMPRESION_MINIMO_BYTES=10 ** 6)
+    def test_bajo_el_umbral_no_se_comprime(self):
+        resp = self.cliente.get('/api/reportes/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', resp)
+
+    def test_formato_columnar(self):
+        json_normal = self.cliente.get('/api/reportes/', {'page_size': 30})
+        resp = self.cliente.get('/api/reportes/', {'page_size': 30, 'format': 'columnar'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'application/vnd.sna.columnar+json')
+        self.assertLess(len(resp.content), len(json_normal.content))
+
+        datos = json.loads(resp.content)
+        self.assertEqual(datos['count'], 30)
+        columnar = datos['results']
+        self.assertEqual(columnar['diccionarios']['estado'], ['pendiente'])
+        self.assertEqual(set(columnar['columnas']['estado']), {0})
+        # Reconstruir las filas a partir de las columnas da el JSON normal
+        filas = [
+            {
+                clave: columnar['diccionarios'][clave][valores[n]] if clave in columnar['diccionarios'] else valores[n]
+                for clave, valores in columnar['columnas'].items()
+            }
+            for n in range(columnar['filas'])
+        ]
+        self.assertEqual(filas, json.loads(json_normal.content)['results'])
+
+    def test_formato_columnar_sin_paginar(self):
+        resp = self.cliente.get('/api/medidas/', {'format': 'columnar', 'fields': 'id,tipo_medida'})
+        self.assertEqual(json.loads(resp.content), {
+            'filas': 1,
+            'columnas': {'id': [Medida.objects.get().id], 'tipo_medida': ['regulatoria']},
+            'diccionarios': {},
+        })
+        resp = self.cliente.get('/api/medidas/999/', {'format': 'columnar'})
+        self.assertEqual(json.loads(resp.content), {'detail': 'Medida no encontrada'})
+
+    def test_a_columnas(self):
+        filas = [
+            {'id': 1, 'estado': 'pendiente', 'archivo': None},
+            {'id': 2, 'estado': 'aprobado', 'archivo': None},
+            {'id': 3, 'estado': 'pendiente', 'archivo': '/media/a.pdf'},
+            {'id': 4, 'estado': None, 'archivo': '/media/b.pdf'},
+        ]
+        self.assertEqual(renderers.a_columnas(filas), {
+            'filas': 4,
+            'columnas': {'id': [1, 2, 3, 4], 'estado': [0, 1, 0, None], 'archivo': [None, None, 0, 1]},
+            'diccionarios': {'estado': ['pendiente', 'aprobado'], 'archivo': ['/media/a.pdf', '/media/b.pdf']},
+        })
+        self.assertEqual(renderers.a_columnas([]), {'filas': 0, 'columnas': {}, 'diccionarios': {}})
+
+    @unittest.skipIf(renderers.msgpack is None, "msgpack no está instalado")
+    def test_messagepack(self):
+        resp = self.cliente.get('/api/reportes/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(resp['Content-Type'], 'application/msgpack')
+        datos = renderers.msgpack.unpackb(resp.content)
+        self.assertEqual(datos['count'], 30)
@@ -0,0 +1,146 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from app_reporte import routers
+from app_reporte.middleware import PrimariaTrasEscrituraMiddleware, COOKIE_PRIMARIA, CABECERA_PRIMARIA
+from app_reporte.models import Reporte, Region
+
+REPLICA = 'replica_prueba'
+
+
+@override_settings(REPLICAS_LECTURA=['replica_1', 'replica_2'], REPLICA_RETRASO_MAXIMO=10)
+class RouterReplicasTest(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.RouterReplicas()
+
+    def retrasos(self, **valores):
+        return mock.patch.object(routers, 'retraso_replica', side_effect=lambda alias: valores[alias])
+
+    def test_lecturas_a_replicas_y_escrituras_a_principal(self):
+        with self.retrasos(replica_1=0, replica_2=0):
+            self.assertIn(self.router.db_for_read(Reporte), ('replica_1', 'replica_2'))
+        self.assertEqual(self.router.db_for_write(Reporte), 'default')
+        self.assertFalse(self.router.allow_migrate('replica_1', 'app_reporte'))
+        self.assertTrue(self.router.allow_migrate('default', 'app_reporte'))
+
+    def test_replica_con_retraso_se_descarta(self):
+        with self.retrasos(replica_1=60, replica_2=1):
+            self.assertEqual(self.router.db_for_read(Reporte), 'replica_2')
+        with self.retrasos(replica_1=60, replica_2=float('inf')):
+            self.assertEqual(self.router.db_for_read(Reporte), 'default')
+
+    def test_primaria_fijada(self):
+        with self.retrasos(replica_1=0, replica_2=0), routers.usar_primaria():
+            self.assertEqual(self.router.db_for_read(Reporte), 'default')
+
+
+@override_settings(REPLICAS_LECTURA=['replica_1'], REPLICA_VENTANA_PRIMARIA=5)
+class PrimariaTrasEscrituraTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.fijada = None
+
+        def vista(request):
+            self.fijada = routers.primaria_fijada()
+            return HttpResponse()
+        self.middleware = PrimariaTrasEscrituraMiddleware(vista)
+
+    def test_escritura_fija_primaria_y_marca_al_cliente(self):
+        response = self.middleware(self.factory.post('/api/reporte/'))
+        self.assertTrue(self.fijada)
+        self.assertFalse(routers.primaria_fijada())
+        hasta = int(response[CABECERA_PRIMARIA])
+        self.assertAlmostEqual(hasta, time.time() + 5, delta=2)
+        self.assertEqual(response.cookies[COOKIE_PRIMARIA].value, str(hasta))
+
+    def test_lectura_dentro_de_la_ventana(self):
+        hasta = str(int(time.time()) + 3)
+        self.middleware(self.factory.get('/api/reportes/', HTTP_X_PRIMARIA_HASTA=hasta))
+        self.assertTrue(self.fijada)
+
+        request = self.factory.get('/api/reportes/')
+        request.COOKIES[COOKIE_PRIMARIA] = hasta
+        self.middleware(request)
+        self.assertTrue(self.fijada)
+
+    def test_lectura_fuera_de_la_ventana(self):
+        for valor in (str(int(time.time()) - 1), str(int(time.time()) + 3600), 'x'):
+            response = self.middleware(self.factory.get('/api/reportes/', HTTP_X_PRIMARIA_HASTA=valor))
+            self.assertFalse(self.fijada, valor)
+            self.assertNotIn(CABECERA_PRIMARIA, response)
+
+
+@override_settings(REPLICAS_LECTURA=[REPLICA], REPLICA_VENTANA_PRIMARIA=5)
+class ReplicaEspejoTest(TransactionTestCase):
+    """
+    Con una réplica real: un segundo alias que apunta a la base de pruebas como
+    `TEST: {'MIRROR': 'default'}`, igual que los alias de DB_REPLICA_HOSTS. Es otra
+    conexión, así que solo ve lo confirmado (de ahí TransactionTestCase).
+    """
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        principal = connections[DEFAULT_DB_ALIAS].settings_dict
+        connections.settings[REPLICA] = {**principal, 'TEST': {**principal['TEST'], 'MIRROR': DEFAULT_DB_ALIAS}}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self):
+        routers._retrasos.clear()
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def consultas(self):
+        """Captura las consultas de la principal y de la réplica."""
+        return CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]), CaptureQueriesContext(connections[REPLICA])
+
+    def test_lecturas_en_la_replica_y_escrituras_en_la_principal(self):
+        principal, replica = self.consultas()
+        with principal, replica:
+            region = Region.objects.create(nombre="Región de Prueba")
+            self.assertEqual(Region.objects.get(pk=region.pk).nombre, "Región de Prueba")
+        self.assertTrue(any(c['sql'].startswith('INSERT') for c in principal.captured_queries))
+        self.assertFalse(any('SELECT' in c['sql'] and 'app_reporte_region' in c['sql'] for c in principal.captured_queries))
+        self.assertTrue(any('app_reporte_region' in c['sql'] for c in replica.captured_queries))
+        self.assertFalse(any(c['sql'].startswith('INSERT') for c in replica.captured_queries))
+
+    def test_lectura_tras_escritura_en_la_principal(self):
+        # Dentro de la transacción que escribió
+        principal, replica = self.consultas()
+        with principal, replica, transaction.atomic():
+            region = Region.objects.create(nombre="Región de Prueba")
+            Region.objects.get(pk=region.pk)
+        self.assertEqual(sum('app_reporte_region' in c['sql'] for c in principal.captured_queries), 2)
+        self.assertFalse(any('app_reporte_region' in c['sql'] for c in replica.captured_queries))
+
+        # En la API: tras un POST el cliente lee de la principal durante la ventana
+        resp = self.cliente.post('/api/regiones/', {'nombre': "Otra Región"}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertIn(COOKIE_PRIMARIA, resp.cookies)
+        url = f"/api/regiones/{resp.data['id']}/"
+        principal, replica = self.consultas()
+        with principal, replica:
+            self.assertEqual(self.cliente.get(url).status_code, 200)
+        self.assertTrue(any('app_reporte_region' in c['sql'] for c in principal.captured_queries))
+        self.assertFalse(any('app_reporte_region' in c['sql'] for c in replica.captured_queries))
+
+        # Sin la marca de la ventana vuelve a la réplica
+        self.cliente.cookies.clear()
+        principal, replica = self.consultas()
+        with principal, replica:
+            self.assertEqual(self.cliente.get(url).status_code, 200)
+        self.assertFalse(any('app_reporte_region' in c['sql'] for c in principal.captured_queries))
+        self.assertTrue(any('app_reporte_region' in c['sql'] for c in replica.captured_queries))
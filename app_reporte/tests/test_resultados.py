@@ -0,0 +1,97 @@
+from django.contrib.auth.models import User, Group
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APIClient
+from app_reporte.contadores import recalcular_contadores
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte
+
+
+class ResultadosTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.medidas = [
+            Medida.objects.create(
+                referencia_pda=f'Art. {n}', nombre_corto=f'Medida {n}', indicador='Indicador',
+                formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+            )
+            for n in range(3)
+        ]
+        self.org_a = OrganismoResponsable.objects.create(nombre="Org A")
+        self.org_b = OrganismoResponsable.objects.create(nombre="Org B")
+        self.reporte_a = Reporte.objects.create(medida=self.medidas[0], organismo=self.org_a)
+        Reporte.objects.create(medida=self.medidas[0], organismo=self.org_b)
+        recalcular_contadores()
+
+        self.admin = APIClient()
+        self.admin.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        usuario_b = User.objects.create_user('usuario_b', password='pw')
+        usuario_b.groups.add(Group.objects.create(name="Org B"))
+        self.cliente_b = APIClient()
+        self.cliente_b.force_authenticate(usuario_b)
+
+    def listar(self, cliente, **parametros):
+        """(ids del resultado, consultas a la tabla de reportes)."""
+        with CaptureQueriesContext(connection) as consultas:
+            resp = cliente.get('/api/reportes/', parametros)
+        self.assertEqual(resp.status_code, 200)
+        tabla = Reporte._meta.db_table
+        return sorted(r['id'] for r in resp.data['results']), [c for c in consultas.captured_queries if tabla in c['sql']]
+
+    def test_repetida_no_consulta_la_base(self):
+        ids, consultas = self.listar(self.admin, estado='pendiente')
+        self.assertEqual(len(ids), 2)
+        self.assertTrue(consultas)
+        # Mismos filtros en otro orden y con la página por defecto explícita
+        ids_repetida, consultas = self.listar(self.admin, page=1, estado='pendiente')
+        self.assertEqual((ids_repetida, consultas), (ids, []))
+        _, consultas = self.listar(self.admin, estado='aprobado')
+        self.assertTrue(consultas)
+
+    def test_enlaces_de_la_respuesta_guardada_corresponden_a_la_consulta(self):
+        con_extra = self.admin.get('/api/reportes/', {'page_size': 1, 'origen': 'panel'})
+        self.assertIn('origen=panel', con_extra.data['next'])
+        resp = self.admin.get('/api/reportes/', {'page_size': 1})
+        self.assertNotIn('origen', resp.data['next'])
+        # Un valor que sin caché es inválido no se sirve desde la entrada del válido
+        self.admin.get('/api/reportes/', {'estado': 'pendiente'})
+        self.assertEqual(self.admin.get('/api/reportes/', {'estado': 'pendiente '}).status_code, 400)
+
+    def test_cambios_invalidan_solo_los_organismos_afectados(self):
+        self.listar(self.cliente_b)
+        self.listar(self.admin, organismo=self.org_b.id)
+
+        Reporte.objects.create(medida=self.medidas[1], organismo=self.org_a)
+        _, consultas = self.listar(self.cliente_b)
+        self.assertEqual(consultas, [])
+        _, consultas = self.listar(self.admin, organismo=self.org_b.id)
+        self.assertEqual(consultas, [])
+
+        nuevo = Reporte.objects.create(medida=self.medidas[1], organismo=self.org_b)
+        ids, consultas = self.listar(self.cliente_b)
+        self.assertTrue(consultas)
+        self.assertIn(nuevo.id, ids)
+
+        nuevo.delete()
+        ids, _ = self.listar(self.cliente_b)
+        self.assertNotIn(nuevo.id, ids)
+
+    def test_cambio_de_organismo_invalida_el_anterior(self):
+        ids, _ = self.listar(self.admin, organismo=self.org_a.id)
+        self.assertEqual(ids, [self.reporte_a.id])
+        self.reporte_a.organismo = self.org_b
+        self.reporte_a.medida = self.medidas[2]
+        self.reporte_a.save()
+        ids, _ = self.listar(self.admin, organismo=self.org_a.id)
+        self.assertEqual(ids, [])
+
+    def test_estado_actualizado_en_listado_de_superusuario(self):
+        ids, _ = self.listar(self.admin)
+        self.reporte_a.estado = 'aprobado'
+        self.reporte_a.save()
+        resp = self.admin.get('/api/reportes/', {'estado': 'aprobado'})
+        self.assertEqual([r['id'] for r in resp.data['results']], [self.reporte_a.id])
+        ids_despues, consultas = self.listar(self.admin)
+        self.assertEqual(ids_despues, ids)
+        self.assertTrue(consultas)
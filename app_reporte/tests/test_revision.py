@@ -0,0 +1,123 @@
+import threading
+import unittest
+from datetime import date, timedelta
+
+from django.contrib.auth.models import Group, User
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from app_reporte import contadores, revision
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte
+
+
+def crear_pendientes(cantidad):
+    plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+    organismo = OrganismoResponsable.objects.create(nombre="OrgTest")
+    reportes = []
+    for numero in range(cantidad):
+        medida = Medida.objects.create(
+            referencia_pda=f'Art. {numero}', nombre_corto=f'Medida {numero}', indicador='Indicador',
+            formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+        )
+        reporte = Reporte.objects.create(medida=medida, organismo=organismo)
+        Reporte.objects.filter(pk=reporte.pk).update(fecha_envio=date(2024, 1, 1) + timedelta(days=numero))
+        reportes.append(reporte)
+    contadores.recalcular_contadores()
+    return reportes
+
+
+def crear_revisor(nombre):
+    usuario = User.objects.create_user(nombre, password='pw')
+    usuario.groups.add(Group.objects.get_or_create(name='Administrador')[0])
+    cliente = APIClient()
+    cliente.force_authenticate(usuario)
+    return usuario, cliente
+
+
+class ColaRevisionTest(TestCase):
+    def setUp(self):
+        self.reportes = crear_pendientes(3)
+        self.ana, self.cliente_ana = crear_revisor('ana')
+        self.beto, self.cliente_beto = crear_revisor('beto')
+
+    def test_revisores_reciben_lotes_disjuntos(self):
+        resp = self.cliente_ana.post('/api/reportes/reclamar/', {'cantidad': 2}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        ids_ana = [r['id'] for r in resp.data['reportes']]
+        self.assertEqual(ids_ana, [self.reportes[0].id, self.reportes[1].id])
+        self.assertIsNotNone(resp.data['reclamado_hasta'])
+
+        resp = self.cliente_beto.post('/api/reportes/reclamar/', {'cantidad': 2}, format='json')
+        self.assertEqual([r['id'] for r in resp.data['reportes']], [self.reportes[2].id])
+
+        # Reclamar de nuevo renueva los reclamos propios
+        resp = self.cliente_ana.post('/api/reportes/reclamar/', {'cantidad': 5}, format='json')
+        self.assertEqual([r['id'] for r in resp.data['reportes']], ids_ana)
+
+    def test_reclamo_vencido_vuelve_a_la_cola(self):
+        revision.reclamar_reportes(self.ana, 3)
+        Reporte.objects.update(reclamado_hasta=now() - timedelta(seconds=1))
+        self.assertEqual(len(revision.reclamar_reportes(self.beto, 3)), 3)
+
+    def test_cambio_de_estado_respeta_reclamo_ajeno(self):
+        revision.reclamar_reportes(self.ana, 1)
+        url = f'/api/reportes/{self.reportes[0].id}/estado/'
+
+        resp = self.cliente_beto.put(url, {'estado': 'aprobado'}, format='json')
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.data['reclamado_por'], 'ana')
+
+        resp = self.cliente_ana.put(url, {'estado': 'aprobado'}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        reporte = Reporte.objects.get(pk=self.reportes[0].id)
+        self.assertIsNone(reporte.reclamado_por)
+        self.assertIsNone(reporte.reclamado_hasta)
+
+    def test_reclamo_de_revisor_eliminado_no_bloquea(self):
+        revision.reclamar_reportes(self.ana, 2)
+        self.ana.delete()
+        # reclamado_por queda nulo (SET_NULL) con reclamado_hasta vigente
+        url = f'/api/reportes/{self.reportes[0].id}/estado/'
+        resp = self.cliente_beto.put(url, {'estado': 'aprobado'}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(revision.reclamar_reportes(self.beto, 3), [self.reportes[1].id, self.reportes[2].id])
+
+    def test_liberar_y_validaciones(self):
+        revision.reclamar_reportes(self.ana, 3)
+        resp = self.cliente_ana.post('/api/reportes/liberar/', {'ids': [self.reportes[0].id]}, format='json')
+        self.assertEqual(resp.data['liberados'], 1)
+        self.assertEqual(revision.reclamar_reportes(self.beto, 3), [self.reportes[0].id])
+
+        self.assertEqual(self.cliente_ana.post('/api/reportes/reclamar/', {'cantidad': 0}, format='json').status_code, 400)
+        self.assertEqual(self.cliente_ana.post('/api/reportes/liberar/', {'ids': 'x'}, format='json').status_code, 400)
+        otro = APIClient()
+        otro.force_authenticate(User.objects.create_user('lector', password='pw'))
+        self.assertEqual(otro.post('/api/reportes/reclamar/').status_code, 403)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "SKIP LOCKED verificado en PostgreSQL")
+class ReclamoConcurrenteTest(TransactionTestCase):
+    def test_reclamo_omite_filas_bloqueadas_sin_esperar(self):
+        reportes = crear_pendientes(3)
+        usuario, _ = crear_revisor('ana')
+        bloqueado, soltar = threading.Event(), threading.Event()
+
+        def otro_revisor():
+            try:
+                with transaction.atomic():
+                    list(Reporte.objects.select_for_update().filter(pk=reportes[0].pk))
+                    bloqueado.set()
+                    soltar.wait(5)
+            finally:
+                connection.close()
+
+        hilo = threading.Thread(target=otro_revisor)
+        hilo.start()
+        try:
+            self.assertTrue(bloqueado.wait(5))
+            ids = revision.reclamar_reportes(usuario, 2)
+        finally:
+            soltar.set()
+            hilo.join()
+        self.assertEqual(ids, [reportes[1].pk, reportes[2].pk])
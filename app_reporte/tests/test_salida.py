@@ -0,0 +1,93 @@
+import json
+from datetime import timedelta
+from unittest import mock
+from urllib.error import URLError
+
+from django.contrib.auth.models import User, Group
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from app_reporte import salida
+from app_reporte.contadores import recalcular_contadores
+from app_reporte.models import PlanPPDA, Medida, OrganismoResponsable, Reporte, EventoSalida
+
+
+@override_settings(
+    SALIDA_WEBHOOK_URL='http://localhost:9000/eventos/', SALIDA_WEBHOOK_SECRETO='secreto',
+    SALIDA_EMAIL_DESTINATARIOS=['revision@example.com'], SALIDA_MAXIMO_INTENTOS=2,
+)
+class BandejaSalidaTest(TestCase):
+    def setUp(self):
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        medida = Medida.objects.create(
+            referencia_pda='Art. 1', nombre_corto='Medida 1', indicador='Indicador',
+            formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+        )
+        self.reporte = Reporte.objects.create(medida=medida, organismo=org)
+        recalcular_contadores()
+
+        revisor = User.objects.create_user('revisor', password='pw')
+        revisor.groups.add(Group.objects.create(name='Administrador'))
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(revisor)
+
+    def cambiar_estado(self, estado='aprobado'):
+        return self.cliente.put(f'/api/reportes/{self.reporte.id}/estado/', {'estado': estado}, format='json')
+
+    def test_cambio_de_estado_se_registra_en_la_bandeja(self):
+        self.assertEqual(self.cambiar_estado().status_code, 200)
+        self.assertEqual(
+            sorted(EventoSalida.objects.values_list('canal', flat=True)), ['email', 'webhook']
+        )
+        evento = EventoSalida.objects.get(canal='webhook')
+        self.assertEqual(evento.tipo, salida.REPORTE_ESTADO_CAMBIADO)
+        self.assertEqual(evento.datos['estado_nuevo'], 'aprobado')
+
+        # Un cambio rechazado no deja eventos
+        EventoSalida.objects.all().delete()
+        self.assertEqual(self.cambiar_estado('inexistente').status_code, 400)
+        self.assertFalse(EventoSalida.objects.exists())
+
+    @mock.patch('app_reporte.salida.urllib.request.urlopen')
+    def test_despacho_por_lotes(self, urlopen):
+        self.cambiar_estado()
+        salida.registrar(salida.REPORTE_CREADO, salida.datos_reporte(self.reporte))
+
+        self.assertEqual(salida.despachar(tamano=10), (3, 0))
+        # Un solo POST con los dos eventos del webhook, firmado
+        self.assertEqual(urlopen.call_count, 1)
+        solicitud = urlopen.call_args.args[0]
+        cuerpo = json.loads(solicitud.data)
+        self.assertEqual(
+            [e['tipo'] for e in cuerpo['eventos']], [salida.REPORTE_ESTADO_CAMBIADO, salida.REPORTE_CREADO]
+        )
+        self.assertTrue(solicitud.get_header('X-sna-firma').startswith('sha256='))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('pendiente → aprobado', mail.outbox[0].subject)
+
+        self.assertFalse(EventoSalida.objects.filter(estado='pendiente').exists())
+        self.assertEqual(salida.despachar(), (0, 0))
+
+    @mock.patch('app_reporte.salida.urllib.request.urlopen', side_effect=URLError('sin conexión'))
+    def test_reintentos_con_espera_y_fallido(self, urlopen):
+        salida.registrar(salida.REPORTE_CREADO, salida.datos_reporte(self.reporte))
+
+        self.assertEqual(salida.despachar_lote('webhook'), (0, 1))
+        evento = EventoSalida.objects.get()
+        self.assertEqual((evento.estado, evento.intentos), ('pendiente', 1))
+        self.assertGreater(evento.proximo_intento, now())
+        self.assertIn('sin conexión', evento.ultimo_error)
+
+        # No se reintenta antes de tiempo
+        self.assertEqual(salida.despachar_lote('webhook'), (0, 0))
+
+        EventoSalida.objects.update(proximo_intento=now() - timedelta(seconds=1))
+        self.assertEqual(salida.despachar_lote('webhook'), (0, 1))
+        self.assertEqual(EventoSalida.objects.get().estado, 'fallido')
+
+    def test_sin_canales_configurados_no_registra(self):
+        with self.settings(SALIDA_WEBHOOK_URL='', SALIDA_EMAIL_DESTINATARIOS=[]):
+            self.cambiar_estado()
+        self.assertFalse(EventoSalida.objects.exists())
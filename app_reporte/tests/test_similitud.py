@@ -0,0 +1,51 @@
+from django.test import TestCase
+from app_reporte.models import Region, Ciudad, Comuna, OrganismoResponsable
+from app_reporte.similitud import IndiceTrigramas, trigramas
+
+
+class BusquedaDifusaTest(TestCase):
+    def setUp(self):
+        self.region = Region.objects.create(nombre="Región de Valparaíso")
+        self.ciudad = Ciudad.objects.create(nombre="Valparaíso", region=self.region)
+        self.concon = Comuna.objects.create(nombre="Concón", ciudad=self.ciudad)
+        Comuna.objects.create(nombre="Quintero", ciudad=self.ciudad)
+        Comuna.objects.create(nombre="Puchuncaví", ciudad=self.ciudad)
+        self.ministerio = OrganismoResponsable.objects.create(nombre="Ministerio del Medio Ambiente")
+        OrganismoResponsable.objects.create(nombre="Superintendencia de Electricidad y Combustibles")
+
+    def test_trigramas_como_pg_trgm(self):
+        self.assertEqual(trigramas("Con"), {"  c", " co", "con", "on "})
+        indice = IndiceTrigramas([(1, "Concón")])
+        self.assertAlmostEqual(indice.buscar("Con Con")[0][1], 4 / 6)
+
+    def test_variantes_de_nombre_de_comuna(self):
+        for consulta in ("Concon", "ConCón", "Con Con", "concom"):
+            resp = self.client.get('/api/comunas/', {'nombre': consulta, 'difusa': 'true'})
+            self.assertEqual(resp.status_code, 200)
+            datos = resp.json()
+            self.assertEqual(datos[0]['id'], self.concon.id, consulta)
+            self.assertIn('similitud', datos[0])
+
+    def test_busqueda_exacta_no_cambia(self):
+        resp = self.client.get('/api/comunas/', {'nombre': 'Con Con'})
+        self.assertEqual(resp.json(), [])
+
+    def test_organismo_con_errores_de_tipeo(self):
+        resp = self.client.get('/api/organismo-responsable/', {'nombre': 'Minsterio Medio Ambeinte', 'difusa': '1'})
+        datos = resp.json()
+        self.assertEqual([d['id'] for d in datos], [self.ministerio.id])
+
+    def test_resultados_ordenados_por_similitud_y_filtros_combinados(self):
+        Comuna.objects.create(nombre="Concepción", ciudad=Ciudad.objects.create(nombre="Concepción", region=self.region))
+        resp = self.client.get('/api/comunas/', {'nombre': 'concon', 'difusa': 'true'})
+        similitudes = [d['similitud'] for d in resp.json()]
+        self.assertEqual(similitudes, sorted(similitudes, reverse=True))
+
+        resp = self.client.get('/api/comunas/', {'nombre': 'concon', 'difusa': 'true', 'ciudad_id': self.ciudad.id})
+        self.assertEqual([d['id'] for d in resp.json()], [self.concon.id])
+
+    def test_indice_se_invalida_al_modificar(self):
+        self.client.get('/api/ciudades/', {'nombre': 'Viña', 'difusa': 'true'})
+        ciudad = Ciudad.objects.create(nombre="Viña del Mar", region=self.region)
+        resp = self.client.get('/api/ciudades/', {'nombre': 'Vina del mar', 'difusa': 'true'})
+        self.assertEqual(resp.json()[0]['id'], ciudad.id)
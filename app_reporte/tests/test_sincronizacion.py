@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User, Group
+from django.utils.timezone import now
+from rest_framework.test import APITestCase, APIClient
+from app_reporte import sincronizacion
+from app_reporte.models import PlanPPDA, Region, OrganismoResponsable, Medida, Reporte, RegistroEliminacion
+
+
+class SincronizacionTest(APITestCase):
+    def setUp(self):
+        self.regiones = [Region.objects.create(nombre=f"Región {n}") for n in range(3)]
+        plan = PlanPPDA.objects.create(nombre="Plan Test", mes_reporte=1, anio=2025)
+        self.org = OrganismoResponsable.objects.create(nombre="OrgTest")
+        self.otro_org = OrganismoResponsable.objects.create(nombre="OtroOrg")
+        self.medida = Medida.objects.create(
+            referencia_pda='Art. 1', nombre_corto='Medida 1', indicador='Indicador',
+            formula_calculo='Fórmula', frecuencia_reporte='anual', tipo_medida='regulatoria', plan=plan
+        )
+        self.reporte = Reporte.objects.create(medida=self.medida, organismo=self.org)
+        self.reporte_ajeno = Reporte.objects.create(medida=self.medida, organismo=self.otro_org)
+
+        # Todo lo anterior queda fuera de la ventana de la próxima sincronización
+        hace_una_hora = now() - timedelta(hours=1)
+        for modelo in (Region, PlanPPDA, OrganismoResponsable, Medida, Reporte):
+            modelo.objects.update(created_at=hace_una_hora, updated_at=hace_una_hora)
+        self.token = sincronizacion.token_de(now() - timedelta(minutes=10))
+
+        usuario = User.objects.create_user('usuario', 'usuario@example.com', 'pw')
+        usuario.groups.add(Group.objects.create(name=self.org.nombre))
+        self.cliente_usuario = APIClient()
+        self.cliente_usuario.force_authenticate(usuario)
+
+    def test_copia_completa_sin_token(self):
+        resp = self.client.get('/api/cambios/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.data['completo'])
+        self.assertNotIn('reportes', resp.data['cambios'])
+        self.assertEqual(len(resp.data['cambios']['regiones']['creados']), 3)
+        self.assertNotIn('updated_at', resp.data['cambios']['regiones']['creados'][0])
+
+        # Un token anterior a la retención de lápidas también recibe la copia completa
+        antiguo = sincronizacion.token_de(now() - timedelta(days=365))
+        self.assertTrue(self.client.get('/api/cambios/', {'desde': antiguo}).data['completo'])
+
+    def test_cambios_incrementales_de_catalogos(self):
+        nueva = Region.objects.create(nombre="Región nueva")
+        modificada = Region.objects.get(pk=self.regiones[0].pk)
+        modificada.nombre = "Región renombrada"
+        modificada.save()
+        eliminada_id = self.regiones[1].id
+        self.regiones[1].delete()
+        self.medida.organismos.add(self.org)
+
+        resp = self.client.get('/api/cambios/', {'desde': self.token, 'colecciones': 'regiones,medidas,planes'})
+        self.assertFalse(resp.data['completo'])
+        regiones = resp.data['cambios']['regiones']
+        self.assertEqual([r['id'] for r in regiones['creados']], [nueva.id])
+        self.assertEqual([r['nombre'] for r in regiones['actualizados']], ["Región renombrada"])
+        self.assertEqual(regiones['eliminados'], [eliminada_id])
+        self.assertEqual(resp.data['cambios']['medidas']['actualizados'][0]['organismos'], [self.org.id])
+        self.assertEqual(resp.data['cambios']['planes'], {'creados': [], 'actualizados': [], 'eliminados': []})
+
+        siguiente = self.client.get('/api/cambios/', {'desde': resp.data['token'], 'colecciones': 'regiones'})
+        # El margen de seguridad puede repetir cambios, nunca omitirlos
+        self.assertIn(nueva.id, [r['id'] for r in siguiente.data['cambios']['regiones']['creados']])
+
+    def test_reportes_limitados_al_organismo(self):
+        reporte = Reporte.objects.get(pk=self.reporte.pk)
+        reporte.descripcion = "Actualizado"
+        reporte.save()
+        ajeno_id = self.reporte_ajeno.id
+        self.reporte_ajeno.delete()
+        self.assertEqual(RegistroEliminacion.objects.get(objeto_id=ajeno_id).organismo_id, self.otro_org.id)
+
+        resp = self.cliente_usuario.get('/api/cambios/', {'desde': self.token, 'colecciones': 'reportes'})
+        reportes = resp.data['cambios']['reportes']
+        self.assertEqual([r['id'] for r in reportes['actualizados']], [self.reporte.id])
+        self.assertEqual(reportes['eliminados'], [])
+
+        self.assertEqual(self.client.get('/api/cambios/', {'colecciones': 'reportes'}).status_code, 403)
+        self.assertEqual(self.client.get('/api/cambios/', {'desde': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/cambios/', {'colecciones': 'usuarios'}).status_code, 400)
+
+    def test_reporte_que_cambia_de_organismo(self):
+        Reporte.objects.filter(pk=self.reporte_ajeno.pk).delete()
+        reporte = Reporte.objects.get(pk=self.reporte.pk)
+        reporte.organismo = self.otro_org
+        reporte.save()
+
+        # Para el organismo anterior el reporte desaparece
+        resp = self.cliente_usuario.get('/api/cambios/', {'desde': self.token, 'colecciones': 'reportes'})
+        reportes = resp.data['cambios']['reportes']
+        self.assertEqual(reportes['actualizados'], [])
+        self.assertEqual(reportes['eliminados'], [reporte.id])
+
+        # Quien ve ambos organismos lo recibe solo como actualizado
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        cliente_admin = APIClient()
+        cliente_admin.force_authenticate(admin)
+        resp = cliente_admin.get('/api/cambios/', {'desde': self.token, 'colecciones': 'reportes'})
+        reportes = resp.data['cambios']['reportes']
+        self.assertEqual([r['id'] for r in reportes['actualizados']], [reporte.id])
+        self.assertNotIn(reporte.id, reportes['eliminados'])
@@ -0,0 +1,167 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from app_reporte import tareas
+from app_reporte.models import Tarea, TareaProgramada
+
+ejecuciones = []
+
+
+@tareas.tarea(nombre='prueba_registrar')
+def registrar(valor):
+    ejecuciones.append(valor)
+    return {'valor': valor}
+
+
+@tareas.tarea(nombre='prueba_fallar', maximo_intentos=2)
+def fallar():
+    raise RuntimeError("falla de prueba")
+
+
+@tareas.tarea(nombre='prueba_pesada', cola='pesadas')
+def pesada():
+    return 'ok'
+
+
+@override_settings(TAREAS_LIMITES_COLA={'pesadas': 1}, TAREAS_PROGRAMADAS={})
+class ColaTareasTest(TestCase):
+    def setUp(self):
+        ejecuciones.clear()
+
+    def test_ejecuta_por_prioridad_y_guarda_resultado(self):
+        baja = tareas.encolar('prueba_registrar', {'valor': 'baja'})
+        tareas.encolar('prueba_registrar', {'valor': 'alta'}, prioridad=5)
+        tareas.encolar('prueba_registrar', {'valor': 'futura'}, ejecutar_desde=now() + timedelta(hours=1))
+
+        self.assertEqual(tareas.procesar_pendientes('prueba'), (2, 0))
+        self.assertEqual(ejecuciones, ['alta', 'baja'])
+        baja.refresh_from_db()
+        self.assertEqual((baja.estado, baja.resultado, baja.intentos), ('completada', {'valor': 'baja'}, 1))
+
+        with self.assertRaises(tareas.TareaDesconocida):
+            tareas.encolar('inexistente')
+        with self.assertRaises(tareas.ArgumentosInvalidos):
+            tareas.encolar('prueba_registrar', {'otro': 1})
+
+    def test_reintentos_con_espera_y_fallida(self):
+        tarea = tareas.encolar('prueba_fallar')
+        self.assertEqual(tareas.procesar_pendientes('prueba'), (0, 1))
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('pendiente', 1))
+        self.assertGreater(tarea.ejecutar_desde, now())
+        self.assertIn('falla de prueba', tarea.ultimo_error)
+
+        Tarea.objects.update(ejecutar_desde=now())
+        tareas.procesar_pendientes('prueba')
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('fallida', 2))
+
+    def test_limite_de_concurrencia_por_cola(self):
+        tareas.encolar('prueba_pesada')
+        en_curso = tareas.tomar_tarea('nodo-1')
+        tareas.encolar('prueba_pesada')
+        comun = tareas.encolar('prueba_registrar', {'valor': 'x'}, prioridad=-1)
+
+        # La cola "pesadas" no tiene cupo: se toma la tarea de menor prioridad de otra cola
+        self.assertEqual(tareas.tomar_tarea('nodo-2').pk, comun.pk)
+        self.assertIsNone(tareas.tomar_tarea('nodo-2'))
+
+        tareas.ejecutar(en_curso)
+        self.assertEqual(tareas.tomar_tarea('nodo-2').nombre, 'prueba_pesada')
+
+    def test_recupera_tareas_de_trabajadores_caidos(self):
+        tarea = tareas.encolar('prueba_registrar', {'valor': 'x'})
+        tareas.tomar_tarea('nodo-caido')
+        Tarea.objects.update(vence_en=now() - timedelta(seconds=1))
+
+        self.assertEqual(tareas.recuperar_vencidas(), 1)
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'pendiente')
+        self.assertIn('nodo-caido', tarea.ultimo_error)
+
+    def test_programadas_se_encolan_una_vez_por_periodo(self):
+        with self.settings(TAREAS_PROGRAMADAS={'registro': {'tarea': 'prueba_registrar', 'argumentos': {'valor': 'p'}, 'intervalo': 60}}):
+            tareas.sincronizar_programadas()
+        self.assertEqual(tareas.programar_recurrentes(), 1)
+        self.assertEqual(tareas.programar_recurrentes(), 0)
+
+        # Vencido otro periodo, no se encola mientras la anterior siga pendiente
+        TareaProgramada.objects.update(proxima_ejecucion=now())
+        self.assertEqual(tareas.programar_recurrentes(), 0)
+
+        tareas.procesar_pendientes('prueba')
+        TareaProgramada.objects.update(proxima_ejecucion=now())
+        self.assertEqual(tareas.programar_recurrentes(), 1)
+        self.assertEqual(Tarea.objects.filter(programada__nombre='registro').count(), 2)
+
+    def test_comando_una_vez(self):
+        tareas.encolar('prueba_registrar', {'valor': 'comando'})
+        salida = StringIO()
+        call_command('procesar_tareas', '--una-vez', stdout=salida)
+        self.assertIn('Tareas completadas: 1', salida.getvalue())
+        self.assertEqual(ejecuciones, ['comando'])
+
+
+@override_settings(TAREAS_ESPERA_BASE=0)
+class TrabajadorTest(SimpleTestCase):
+    def test_error_de_la_base_no_termina_el_trabajador(self):
+        detener = threading.Event()
+        tarea = Tarea(nombre='prueba_registrar', argumentos={'valor': 'x'})
+        llamadas = []
+
+        def tomar_tarea(trabajador, colas):
+            llamadas.append(trabajador)
+            if len(llamadas) == 1:
+                raise OperationalError("conexión perdida")
+            detener.set()
+            return tarea
+
+        with mock.patch.object(tareas, 'tomar_tarea', tomar_tarea), \
+                mock.patch.object(tareas, 'ejecutar') as ejecutar, self.assertLogs('app_reporte.tareas', 'ERROR'):
+            # En otro hilo, como en procesar_tareas, con su propia conexión
+            hilo = threading.Thread(target=tareas.trabajar, args=('nodo', None, detener, 0))
+            hilo.start()
+            hilo.join(5)
+        self.assertFalse(hilo.is_alive())
+        self.assertEqual(len(llamadas), 2)
+        ejecutar.assert_called_once_with(tarea)
+
+
+@override_settings(TAREAS_PROGRAMADAS={})
+class TareasAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def test_encolar_consultar_y_cancelar(self):
+        resp = self.client.post('/api/tareas/', {'nombre': 'prueba_registrar', 'argumentos': {'valor': 1}}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual((resp.data['estado'], resp.data['creada_por']), ('pendiente', 'admin'))
+        id_tarea = resp.data['id']
+
+        self.assertEqual(self.client.get('/api/tareas/', {'estado': 'pendiente'}).data['results'][0]['id'], id_tarea)
+        self.assertEqual(self.client.get('/api/tareas/resumen/').data['colas'], {'default': {'pendiente': 1}})
+
+        self.assertEqual(self.client.post(f'/api/tareas/{id_tarea}/cancelar/').data['estado'], 'cancelada')
+        self.assertEqual(self.client.post(f'/api/tareas/{id_tarea}/cancelar/').status_code, 409)
+        self.assertEqual(self.client.get(f'/api/tareas/{id_tarea}/').data['estado'], 'cancelada')
+
+    def test_validaciones_y_permisos(self):
+        self.assertEqual(self.client.post('/api/tareas/', {'nombre': 'inexistente'}, format='json').status_code, 400)
+        resp = self.client.post('/api/tareas/', {'nombre': 'prueba_registrar', 'argumentos': {'x': 1}}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post('/api/tareas/', {'nombre': 'prueba_registrar', 'argumentos': {'valor': 1},
+                                                 'ejecutar_desde': 'mañana'}, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+        otro = APIClient()
+        otro.force_authenticate(User.objects.create_user('lector', password='pw'))
+        self.assertEqual(otro.get('/api/tareas/').status_code, 403)
@@ -1,7 +1,10 @@
 from django.urls import path
 from .views import PlanPPDAView, ComunaView, RegionView, CiudadView, OrganismoResponsableView, RegionDetailView, \
       CiudadDetailView, ComunaDetailView, OrganismoResponsableDetailView, PlanPPDADetailView, ReporteEstadoUpdateView, ReporteListView, \
-      ReportesView, ReporteView, MedidaView, MedidaDetailView
+      ReportesView, ReporteView, MedidaView, MedidaDetailView, HistorialReporteView, HistorialReportesView, \
+      AnaliticaRevisionView, BusquedaView, AutocompletarView, ReclamarReportesView, LiberarReportesView, \
+      ReferenciaView, CambiosView, eventos_reportes, TareasView, TareaDetailView, CancelarTareaView, \
+      ResumenTareasView
 
 urlpatterns = [
     path('planes/', PlanPPDAView.as_view(http_method_names=['post', 'get']), name='planes'),
@@ -18,6 +21,20 @@ urlpatterns = [
     path('organismo-responsable/', OrganismoResponsableView.as_view(http_method_names=['post', 'get']), name='organismo-responsable'),
     path('reportes/', ReporteListView.as_view(), name='reportes'),  # ← Usamos este
     path('reportes/<int:id_reporte>/estado/', ReporteEstadoUpdateView.as_view(), name='actualizar-estado-reporte'),    
+    path('reportes/<int:id_reporte>/historial/', HistorialReporteView.as_view(), name='historial-reporte'),
+    path('reportes/historial/', HistorialReportesView.as_view(), name='historial-reportes'),
+    path('reportes/reclamar/', ReclamarReportesView.as_view(), name='reclamar-reportes'),
+    path('reportes/liberar/', LiberarReportesView.as_view(), name='liberar-reportes'),
+    path('reportes/eventos/', eventos_reportes, name='eventos-reportes'),
+    path('busqueda/', BusquedaView.as_view(), name='busqueda'),
+    path('autocompletar/', AutocompletarView.as_view(), name='autocompletar'),
+    path('referencia/', ReferenciaView.as_view(), name='referencia'),
+    path('cambios/', CambiosView.as_view(), name='cambios'),
+    path('tareas/', TareasView.as_view(), name='tareas'),
+    path('tareas/resumen/', ResumenTareasView.as_view(), name='tareas-resumen'),
+    path('tareas/<int:pk>/', TareaDetailView.as_view(), name='tarea-detail'),
+    path('tareas/<int:pk>/cancelar/', CancelarTareaView.as_view(), name='cancelar-tarea'),
+    path('analitica/revision/', AnaliticaRevisionView.as_view(), name='analitica-revision'),
     path('reporte/', ReporteView.as_view(http_method_names=['post']), name='reporte_create'),
     path('reporte/<int:id_reporte>', ReporteView.as_view(http_method_names=['get', 'put', 'delete']), name='reporte_detail'),
 ]
@@ -1,5 +1,8 @@
+import gzip
+import json
+from asgiref.sync import sync_to_async
 from django.core.exceptions import BadRequest, ValidationError
-from django.http import Http404
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -12,30 +15,64 @@ from .serializers import PlanPPDASerializer, ComunaSerializer, RegionSerializer,
 from .models import Reporte
 from .serializers import ReporteSerializer
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
-from app_reporte.permisos import EsRepOrgResOSoloLectura, EsSuperAdminOSoloLectura, EsAdminOSoloLectura, EsSuperAdmin
-from datetime import datetime
-from .models import Reporte, HistorialEstadoReporte
-from django.utils.timezone import now
-from rest_framework.pagination import PageNumberPagination
+from app_reporte.permisos import EsRepOrgResOSoloLectura, EsSuperAdminOSoloLectura, EsAdminOSoloLectura, EsSuperAdmin, \
+    EsAdmin, organismos_del_usuario
+from datetime import date, datetime
+from .models import Reporte, HistorialEstadoReporte, MetricaRevision, ReporteArchivado, Tarea, TareaProgramada
+from django.utils.timezone import now, is_naive, make_aware
+from django.utils.dateparse import parse_datetime
+from django.db.models import Count
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 from rest_framework import generics
 from app_reporte.models import Reporte
-from app_reporte.serializers import ReporteSerializer
+from app_reporte.serializers import ReporteSerializer, HistorialEstadoReporteSerializer, MetricaRevisionSerializer, \
+    ReporteArchivadoSerializer, ReporteReenvioSerializer, TareaSerializer, TareaProgramadaSerializer
 from django.contrib.auth import get_user_model
-import unicodedata
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from app_reporte import contadores, busqueda, autocompletar, revision, reenvio, referencia, sincronizacion, eventos, salida, tareas, lectura, fragmentos, \
+    resultados
+from app_reporte.idempotencia import idempotente
+from app_reporte.middleware import codificaciones_aceptadas
+from app_reporte.proyeccion import Proyeccion
+from app_reporte.similitud import normalizar_texto, buscar_similares, agregar_similitud
 
 
 User = get_user_model()
 
 
-def normalizar_texto(texto):
+PARAMETROS_PROYECCION = [
+    OpenApiParameter(name='fields', type=str, location=OpenApiParameter.QUERY,
+                     description='Campos a incluir separados por coma, por ejemplo "id,nombre". Con punto para '
+                                 'relaciones expandidas: "medida.nombre_corto"'),
+    OpenApiParameter(name='expand', type=str, location=OpenApiParameter.QUERY,
+                     description='Relaciones a incluir como objetos en lugar de IDs, separadas por coma, '
+                                 'por ejemplo "medida,organismo" o "medida.plan"'),
+]
+PARAMETRO_COLUMNAR = OpenApiParameter(
+    name='format', type=str, location=OpenApiParameter.QUERY, enum=['json', 'columnar'],
+    description='"columnar": nombres de campo una sola vez y valores por columna; los textos repetidos '
+                '(estado, tipo_medida) como índices a "diccionarios"'
+)
+
+
+def lector_rapido(request, serializer_class, proyeccion, filtros=()):
     """
-    Normaliza el texto eliminando acentos y convirtiendo a minúsculas.
+    Lector de values() para responder el listado sin instanciar modelos (ver
+    lectura.py), o None si la consulta usa `filtros` que la vista aplica en Python
+    o pide relaciones expandidas.
     """
-    if not texto:
-        return ""
-    texto_normalizado = ''.join(c for c in unicodedata.normalize('NFD', texto)
-                              if unicodedata.category(c) != 'Mn')
-    return texto_normalizado.lower()
+    if any(request.GET.get(filtro) for filtro in filtros):
+        return None
+    return lectura.lector(serializer_class, proyeccion)
+
+
+def es_busqueda_difusa(request):
+    """Indica si el cliente pidió búsqueda aproximada por nombre (?difusa=true)."""
+    return request.GET.get('difusa', '').lower() in ('1', 'true', 'si', 'sí')
 
 @extend_schema_view(
     get=extend_schema(
@@ -44,10 +81,14 @@ def normalizar_texto(texto):
         parameters=[
             OpenApiParameter(name='nombre', type=str, location=OpenApiParameter.QUERY, 
                            description='Filtrar comunas por nombre (búsqueda parcial, case-insensitive, ignora tildes)'),
+            OpenApiParameter(name='difusa', type=bool, location=OpenApiParameter.QUERY, 
+                           description='Si es true, el filtro por nombre tolera errores de tipeo y ordena por similitud'),
             OpenApiParameter(name='ciudad_id', type=int, location=OpenApiParameter.QUERY, 
                            description='Filtrar comunas por ID de ciudad'),
             OpenApiParameter(name='ciudad_nombre', type=str, location=OpenApiParameter.QUERY, 
                            description='Filtrar comunas por nombre de ciudad (búsqueda parcial, case-insensitive, ignora tildes)'),
+            *PARAMETROS_PROYECCION,
+            PARAMETRO_COLUMNAR,
         ],
     ),
     post=extend_schema(summary="Crear una nueva comuna", tags=["Comunas"], request=ComunaSerializer),
@@ -61,16 +102,24 @@ class ComunaView(APIView):
         
         Parámetros de búsqueda:
         - nombre: Filtrar comunas por nombre (búsqueda parcial, case-insensitive, ignora tildes)
+        - difusa: Si es true, el filtro por nombre tolera errores de tipeo y ordena por similitud
         - ciudad_id: Filtrar comunas por ID de ciudad
         - ciudad_nombre: Filtrar comunas por nombre de ciudad (búsqueda parcial, case-insensitive, ignora tildes)
 
         Retorna:
         - Lista de comunas en formato JSON.
         """
-        comunas = Comuna.objects.all()
+        proyeccion = Proyeccion.desde_request(request, ComunaSerializer)
+        lector = lector_rapido(request, ComunaSerializer, proyeccion, filtros=('nombre', 'ciudad_id', 'ciudad_nombre'))
+        if lector is not None:
+            return Response(lector.filas(Comuna.objects.all()), status=status.HTTP_200_OK)
+        comunas = proyeccion.optimizar(Comuna.objects.all(), ComunaSerializer, necesarios=('nombre', 'ciudad'))
         
         nombre = request.GET.get('nombre')
-        if nombre:
+        difusa = bool(nombre) and es_busqueda_difusa(request)
+        if difusa:
+            comunas = buscar_similares(comunas, nombre)
+        elif nombre:
             nombre_normalizado = normalizar_texto(nombre)
             comunas = [comuna for comuna in comunas 
                       if nombre_normalizado in normalizar_texto(comuna.nombre)]
@@ -80,13 +129,15 @@ class ComunaView(APIView):
         
         if ciudad_id:
             comunas = [comuna for comuna in comunas 
-                      if str(comuna.ciudad.id) == ciudad_id]
+                      if str(comuna.ciudad_id) == ciudad_id]
         elif ciudad_nombre:
             ciudad_nombre_normalizado = normalizar_texto(ciudad_nombre)
             comunas = [comuna for comuna in comunas 
                       if ciudad_nombre_normalizado in normalizar_texto(comuna.ciudad.nombre)]
             
-        serializer = ComunaSerializer(comunas, many=True)
+        serializer = ComunaSerializer(comunas, many=True, proyeccion=proyeccion)
+        if difusa:
+            return Response(agregar_similitud(serializer.data, comunas), status=status.HTTP_200_OK)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -130,6 +181,7 @@ class ComunaView(APIView):
         parameters=[
             OpenApiParameter(name='pk', type=int, location=OpenApiParameter.PATH, 
                            description='ID de la comuna a obtener'),
+            *PARAMETROS_PROYECCION,
         ],
     ),
     put=extend_schema(
@@ -156,8 +208,9 @@ class ComunaDetailView(APIView):
     def get(self, request, pk=None):
         if not pk:
             raise BadRequest("Se requiere un ID de comuna para esta operacion.")
-        comuna = get_object_or_404(Comuna, id=pk)
-        serializer = ComunaSerializer(comuna)
+        proyeccion = Proyeccion.desde_request(request, ComunaSerializer)
+        comuna = get_object_or_404(proyeccion.optimizar(Comuna.objects.all(), ComunaSerializer), id=pk)
+        serializer = ComunaSerializer(comuna, proyeccion=proyeccion)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request, pk=None):
@@ -197,6 +250,8 @@ class ComunaDetailView(APIView):
                            description='Filtrar planes por año'),
             OpenApiParameter(name='comuna_id', type=int, location=OpenApiParameter.QUERY, 
                            description='Filtrar planes por ID de comuna'),
+            *PARAMETROS_PROYECCION,
+            PARAMETRO_COLUMNAR,
         ],
     ),
     post=extend_schema(summary="Crear un nuevo plan PPDA", tags=["Planes PPDA"], request=PlanPPDASerializer)
@@ -217,7 +272,13 @@ class PlanPPDAView(APIView):
         Retorna:
         - Lista de planes PPDA en formato JSON.
         """
-        planes = PlanPPDA.objects.all()
+        proyeccion = Proyeccion.desde_request(request, PlanPPDASerializer)
+        lector = lector_rapido(request, PlanPPDASerializer, proyeccion, filtros=('nombre', 'mes_reporte', 'anio', 'comuna_id'))
+        if lector is not None:
+            return Response(lector.filas(PlanPPDA.objects.all()), status=status.HTTP_200_OK)
+        planes = proyeccion.optimizar(
+            PlanPPDA.objects.all(), PlanPPDASerializer, necesarios=('nombre', 'mes_reporte', 'anio', 'comunas')
+        )
         
         nombre = request.GET.get('nombre')
         if nombre:
@@ -248,7 +309,7 @@ class PlanPPDAView(APIView):
             planes = [plan for plan in planes 
                      if any(str(comuna.id) == comuna_id for comuna in plan.comunas.all())]
             
-        serializer = PlanPPDASerializer(planes, many=True)
+        serializer = PlanPPDASerializer(planes, many=True, proyeccion=proyeccion)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -297,6 +358,7 @@ class PlanPPDAView(APIView):
         parameters=[
             OpenApiParameter(name='pk', type=int, location=OpenApiParameter.PATH, 
                            description='ID del plan PPDA a obtener'),
+            *PARAMETROS_PROYECCION,
         ],
     ),
     put=extend_schema(
@@ -337,8 +399,9 @@ class PlanPPDADetailView(APIView):
     def get(self, request, pk):
         """Obtener un plan PPDA por su id"""
         try:
-            planPPDA = PlanPPDA.objects.get(pk=pk)
-            serializer = PlanPPDASerializer(planPPDA)
+            proyeccion = Proyeccion.desde_request(request, PlanPPDASerializer)
+            planPPDA = proyeccion.optimizar(PlanPPDA.objects.all(), PlanPPDASerializer).get(pk=pk)
+            serializer = PlanPPDASerializer(planPPDA, proyeccion=proyeccion)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except PlanPPDA.DoesNotExist:
             raise Http404("Plan PPDA no encontrada")
@@ -368,6 +431,10 @@ class PlanPPDADetailView(APIView):
         parameters=[
             OpenApiParameter(name='nombre', type=str, location=OpenApiParameter.QUERY, 
                            description='Filtrar regiones por nombre (búsqueda parcial, case-insensitive, ignora tildes)'),
+            OpenApiParameter(name='difusa', type=bool, location=OpenApiParameter.QUERY, 
+                           description='Si es true, el filtro por nombre tolera errores de tipeo y ordena por similitud'),
+            *PARAMETROS_PROYECCION,
+            PARAMETRO_COLUMNAR,
         ],
     ),
     post=extend_schema(summary="Crear una nueva región", tags=["Regiones"], request=RegionSerializer)
@@ -381,19 +448,29 @@ class RegionView(APIView):
         
         Parámetros de búsqueda:
         - nombre: Filtrar regiones por nombre (búsqueda parcial, case-insensitive, ignora tildes)
+        - difusa: Si es true, el filtro por nombre tolera errores de tipeo y ordena por similitud
 
         Retorna:
         - Lista de regiones en formato JSON.
         """
-        regiones = Region.objects.all()
+        proyeccion = Proyeccion.desde_request(request, RegionSerializer)
+        lector = lector_rapido(request, RegionSerializer, proyeccion, filtros=('nombre',))
+        if lector is not None:
+            return Response(lector.filas(Region.objects.all()), status=status.HTTP_200_OK)
+        regiones = proyeccion.optimizar(Region.objects.all(), RegionSerializer, necesarios=('nombre',))
 
         nombre = request.GET.get('nombre')
-        if nombre:
+        difusa = bool(nombre) and es_busqueda_difusa(request)
+        if difusa:
+            regiones = buscar_similares(regiones, nombre)
+        elif nombre:
             nombre_normalizado = normalizar_texto(nombre)
             regiones = [region for region in regiones 
                        if nombre_normalizado in normalizar_texto(region.nombre)]
             
-        serializer = RegionSerializer(regiones, many=True)
+        serializer = RegionSerializer(regiones, many=True, proyeccion=proyeccion)
+        if difusa:
+            return Response(agregar_similitud(serializer.data, regiones), status=status.HTTP_200_OK)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -435,6 +512,7 @@ class RegionView(APIView):
         parameters=[
             OpenApiParameter(name='pk', type=int, location=OpenApiParameter.PATH, 
                            description='ID de la región a obtener'),
+            *PARAMETROS_PROYECCION,
         ],
     ),
     put=extend_schema(
@@ -461,8 +539,9 @@ class RegionDetailView(APIView):
     def get(self, request, pk):
         if not pk:
             raise BadRequest("Se requiere un ID de región para esta operación.")
-        region = get_object_or_404(Region, id=pk)
-        serializer = RegionSerializer(region)
+        proyeccion = Proyeccion.desde_request(request, RegionSerializer)
+        region = get_object_or_404(proyeccion.optimizar(Region.objects.all(), RegionSerializer), id=pk)
+        serializer = RegionSerializer(region, proyeccion=proyeccion)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request, pk):
@@ -495,10 +574,14 @@ class RegionDetailView(APIView):
         parameters=[
             OpenApiParameter(name='nombre', type=str, location=OpenApiParameter.QUERY, 
                            description='Filtrar ciudades por nombre (búsqueda parcial, case-insensitive, ignora tildes)'),
+            OpenApiParameter(name='difusa', type=bool, location=OpenApiParameter.QUERY, 
+                           description='Si es true, el filtro por nombre tolera errores de tipeo y ordena por similitud'),
             OpenApiParameter(name='region_id', type=int, location=OpenApiParameter.QUERY, 
                            description='Filtrar ciudades por ID de región'),
             OpenApiParameter(name='region_nombre', type=str, location=OpenApiParameter.QUERY, 
                            description='Filtrar ciudades por nombre de región (búsqueda parcial, case-insensitive, ignora tildes)'),
+            *PARAMETROS_PROYECCION,
+            PARAMETRO_COLUMNAR,
         ],
     ),
     post=extend_schema(summary="Crear una nueva ciudad", tags=["Ciudades"], request=CiudadSerializer)
@@ -512,16 +595,24 @@ class CiudadView(APIView):
         
         Parámetros de búsqueda:
         - nombre: Filtrar ciudades por nombre (búsqueda parcial, case-insensitive, ignora tildes)
+        - difusa: Si es true, el filtro por nombre tolera errores de tipeo y ordena por similitud
         - region_id: Filtrar ciudades por ID de región
         - region_nombre: Filtrar ciudades por nombre de región (búsqueda parcial, case-insensitive, ignora tildes)
 
         Retorna:
         - Lista de ciudades en formato JSON.
         """
-        ciudades = Ciudad.objects.all()
+        proyeccion = Proyeccion.desde_request(request, CiudadSerializer)
+        lector = lector_rapido(request, CiudadSerializer, proyeccion, filtros=('nombre', 'region_id', 'region_nombre'))
+        if lector is not None:
+            return Response(lector.filas(Ciudad.objects.all()), status=status.HTTP_200_OK)
+        ciudades = proyeccion.optimizar(Ciudad.objects.all(), CiudadSerializer, necesarios=('nombre', 'region'))
         
         nombre = request.GET.get('nombre')
-        if nombre:
+        difusa = bool(nombre) and es_busqueda_difusa(request)
+        if difusa:
+            ciudades = buscar_similares(ciudades, nombre)
+        elif nombre:
             nombre_normalizado = normalizar_texto(nombre)
             ciudades = [ciudad for ciudad in ciudades 
                        if nombre_normalizado in normalizar_texto(ciudad.nombre)]
@@ -531,13 +622,15 @@ class CiudadView(APIView):
         
         if region_id:
             ciudades = [ciudad for ciudad in ciudades 
-                       if str(ciudad.region.id) == region_id]
+                       if str(ciudad.region_id) == region_id]
         elif region_nombre:
             region_nombre_normalizado = normalizar_texto(region_nombre)
             ciudades = [ciudad for ciudad in ciudades 
                        if region_nombre_normalizado in normalizar_texto(ciudad.region.nombre)]
             
-        serializer = CiudadSerializer(ciudades, many=True)
+        serializer = CiudadSerializer(ciudades, many=True, proyeccion=proyeccion)
+        if difusa:
+            return Response(agregar_similitud(serializer.data, ciudades), status=status.HTTP_200_OK)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -581,6 +674,7 @@ class CiudadView(APIView):
         parameters=[
             OpenApiParameter(name='pk', type=int, location=OpenApiParameter.PATH, 
                            description='ID de la ciudad a obtener'),
+            *PARAMETROS_PROYECCION,
         ],
     ),
     put=extend_schema(
@@ -621,8 +715,9 @@ class CiudadDetailView(APIView):
     def get(self, request, pk):
         """Obtener una ciudad por su id"""
         try:
-            ciudad = Ciudad.objects.get(pk=pk)
-            serializer = CiudadSerializer(ciudad)
+            proyeccion = Proyeccion.desde_request(request, CiudadSerializer)
+            ciudad = proyeccion.optimizar(Ciudad.objects.all(), CiudadSerializer).get(pk=pk)
+            serializer = CiudadSerializer(ciudad, proyeccion=proyeccion)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Ciudad.DoesNotExist:
             raise Http404("Ciudad no encontrada")
@@ -647,7 +742,7 @@ class CiudadDetailView(APIView):
 
 @extend_schema_view(
     get=extend_schema(summary="Obtener un organismo responsable a través de su Id",
-                      tags=["Organismos Responsables"]),
+                      tags=["Organismos Responsables"], parameters=PARAMETROS_PROYECCION),
   
     put=extend_schema(summary="Actualizar un Organismo Responsable existente",
                       tags=["Organismos Responsables"], request=OrganismoResponsableSerializer),
@@ -675,8 +770,11 @@ class OrganismoResponsableDetailView(APIView):
     def get(self, request, pk):
         """Obtener un organismo responsable por su id"""
         try:
-            org_responsable = OrganismoResponsable.objects.get(pk=pk)
-            serializer = OrganismoResponsableSerializer(org_responsable)
+            proyeccion = Proyeccion.desde_request(request, OrganismoResponsableSerializer)
+            org_responsable = proyeccion.optimizar(
+                OrganismoResponsable.objects.all(), OrganismoResponsableSerializer
+            ).get(pk=pk)
+            serializer = OrganismoResponsableSerializer(org_responsable, proyeccion=proyeccion)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except OrganismoResponsable.DoesNotExist:
             raise Http404("Organismo responsable no encontrado")
@@ -706,6 +804,10 @@ class OrganismoResponsableDetailView(APIView):
         parameters=[
             OpenApiParameter(name='nombre', type=str, location=OpenApiParameter.QUERY, 
                            description='Filtrar organismos por nombre (búsqueda parcial, case-insensitive, ignora tildes)'),
+            OpenApiParameter(name='difusa', type=bool, location=OpenApiParameter.QUERY, 
+                           description='Si es true, el filtro por nombre tolera errores de tipeo y ordena por similitud'),
+            *PARAMETROS_PROYECCION,
+            PARAMETRO_COLUMNAR,
         ],
     ),
     post=extend_schema(
@@ -728,19 +830,31 @@ class OrganismoResponsableView(APIView):
         
         Parámetros de búsqueda:
         - nombre: Filtrar organismos por nombre (búsqueda parcial, case-insensitive, ignora tildes)
+        - difusa: Si es true, el filtro por nombre tolera errores de tipeo y ordena por similitud
 
         Retorna:
         - Lista de Organismos Responsables en formato JSON.
         """
-        organismos = OrganismoResponsable.objects.all()
+        proyeccion = Proyeccion.desde_request(request, OrganismoResponsableSerializer)
+        lector = lector_rapido(request, OrganismoResponsableSerializer, proyeccion, filtros=('nombre',))
+        if lector is not None:
+            return Response(lector.filas(OrganismoResponsable.objects.all()), status=status.HTTP_200_OK)
+        organismos = proyeccion.optimizar(
+            OrganismoResponsable.objects.all(), OrganismoResponsableSerializer, necesarios=('nombre',)
+        )
         
         nombre = request.GET.get('nombre')
-        if nombre:
+        difusa = bool(nombre) and es_busqueda_difusa(request)
+        if difusa:
+            organismos = buscar_similares(organismos, nombre)
+        elif nombre:
             nombre_normalizado = normalizar_texto(nombre)
             organismos = [org for org in organismos 
                          if nombre_normalizado in normalizar_texto(org.nombre)]
             
-        serializer = OrganismoResponsableSerializer(organismos, many=True)
+        serializer = OrganismoResponsableSerializer(organismos, many=True, proyeccion=proyeccion)
+        if difusa:
+            return Response(agregar_similitud(serializer.data, organismos), status=status.HTTP_200_OK)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     def post(self, request):
@@ -786,15 +900,21 @@ class ReportePagination(PageNumberPagination):
 
 @extend_schema(
     summary="Listar reportes con filtros",
-    description="Permite listar reportes filtrando por organismo, estado y fecha de envío, y ordenarlos por estado o fecha.",
+    description="Permite listar reportes filtrando por organismo, estado y fecha o período de envío, y ordenarlos por estado o fecha. "
+                "Los filtros por período (anio, desde, hasta) usan el índice BRIN de fecha de envío.",
     tags=["Reportes"],  
     parameters=[
         OpenApiParameter(name='organismo', type=int, location=OpenApiParameter.QUERY, description='ID del organismo responsable'),
         OpenApiParameter(name='estado', type=str, location=OpenApiParameter.QUERY, description='Estado del reporte (pendiente, aprobado, rechazado)'),
         OpenApiParameter(name='fecha_envio', type=str, location=OpenApiParameter.QUERY, description='Fecha exacta de envío (YYYY-MM-DD)'),
+        OpenApiParameter(name='anio', type=int, location=OpenApiParameter.QUERY, description='Año de envío'),
+        OpenApiParameter(name='desde', type=str, location=OpenApiParameter.QUERY, description='Fecha de envío mínima, inclusive (YYYY-MM-DD)'),
+        OpenApiParameter(name='hasta', type=str, location=OpenApiParameter.QUERY, description='Fecha de envío máxima, inclusive (YYYY-MM-DD)'),
         OpenApiParameter(name='ordering', type=str, location=OpenApiParameter.QUERY, description='Campo de ordenamiento, por ejemplo "-fecha_envio"'),
         OpenApiParameter(name='page', type=int, location=OpenApiParameter.QUERY, description='Número de página'),
         OpenApiParameter(name='page_size', type=int, location=OpenApiParameter.QUERY, description='Cantidad de elementos por página'),
+        *PARAMETROS_PROYECCION,
+        PARAMETRO_COLUMNAR,
     ]
 )
 class ReporteListView(generics.ListAPIView):
@@ -803,14 +923,29 @@ class ReporteListView(generics.ListAPIView):
     permission_classes = [EsRepOrgResOSoloLectura]
 
     def get(self, request):
+        proyeccion = Proyeccion.desde_request(request, ReporteSerializer)
+        # Los resultados sin relaciones expandidas se guardan por filtros y organismos (ver resultados.py)
+        consulta = None if proyeccion.expandir else resultados.Consulta(request)
+        if consulta is not None:
+            datos = consulta.obtener()
+            if datos is not None:
+                return Response(datos, status=status.HTTP_200_OK)
+        response = self.listar(request, proyeccion)
+        if consulta is not None and response.status_code == status.HTTP_200_OK:
+            consulta.guardar(response.data)
+        return response
+
+    def listar(self, request, proyeccion):
         queryset = Reporte.objects.all()
         #si no es superusuario, solo sus reportes
         if not request.user.is_superuser:
-            mis_orgs = request.user.groups.first().organismoresponsable_set.all()
-            queryset = queryset.filter(organismo__in=mis_orgs)
+            queryset = queryset.filter(organismo__in=organismos_del_usuario(request.user))
         organismo_id = request.GET.get('organismo')
         estado = request.GET.get('estado')
         fecha_envio = request.GET.get('fecha_envio')
+        anio = request.GET.get('anio')
+        desde = request.GET.get('desde')
+        hasta = request.GET.get('hasta')
         ordering = request.GET.get('ordering')
 
         # Filtros con validación
@@ -832,13 +967,36 @@ class ReporteListView(generics.ListAPIView):
             except ValueError:
                 return Response({"error": "Formato de fecha inválido. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Filtros por período como rangos sobre fecha_envio (no EXTRACT), para que usen el índice
+        if anio:
+            try:
+                anio = int(anio)
+                # Hasta 9998: el rango termina el 1 de enero del año siguiente
+                if not 1 <= anio <= 9998:
+                    raise ValueError
+                desde_anio, hasta_anio = date(anio, 1, 1), date(anio + 1, 1, 1)
+            except (ValueError, OverflowError):
+                return Response({"error": "El año debe ser un número entre 1 y 9998."}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(fecha_envio__gte=desde_anio, fecha_envio__lt=hasta_anio)
+        try:
+            if desde:
+                queryset = queryset.filter(fecha_envio__gte=datetime.strptime(desde, "%Y-%m-%d").date())
+            if hasta:
+                queryset = queryset.filter(fecha_envio__lte=datetime.strptime(hasta, "%Y-%m-%d").date())
+        except ValueError:
+            return Response({"error": "Formato de fecha inválido. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
         # Ordenamiento
         if ordering in ['fecha_envio', '-fecha_envio', 'estado', '-estado']:
             queryset = queryset.order_by(ordering)
 
         paginator = ReportePagination()
-        page = paginator.paginate_queryset(queryset, request)
-        serializer = ReporteSerializer(page, many=True)
+        if not proyeccion.expandir:
+            # Sin relaciones expandidas la página se arma desde la caché de fragmentos (ver fragmentos.py)
+            page = paginator.paginate_queryset(queryset.values_list('id', 'updated_at'), request)
+            return paginator.get_paginated_response(fragmentos.proyectar(fragmentos.obtener(page), proyeccion.campos))
+        page = paginator.paginate_queryset(proyeccion.optimizar(queryset, ReporteSerializer), request)
+        serializer = ReporteSerializer(page, many=True, proyeccion=proyeccion)
         return paginator.get_paginated_response(serializer.data)
 
 
@@ -857,12 +1015,23 @@ class ReporteEstadoUpdateView(APIView):
     serializer_class = ReporteSerializer
     permission_classes = [EsAdminOSoloLectura]
 
+    @idempotente
+    @transaction.atomic
     def put(self, request, id_reporte):
         try:
-            reporte = Reporte.objects.get(id=id_reporte)
+            # La fila queda bloqueada hasta el final para que el reclamo y el estado
+            # no cambien entre la verificación y el guardado
+            reporte = Reporte.objects.select_for_update().get(id=id_reporte)
         except Reporte.DoesNotExist:
             return Response({"error": "Reporte no encontrado"}, status=status.HTTP_404_NOT_FOUND)
 
+        if revision.reclamo_ajeno(reporte, request.user):
+            return Response({
+                "error": "El reporte está siendo revisado por otro administrador.",
+                "reclamado_por": reporte.reclamado_por.username,
+                "reclamado_hasta": reporte.reclamado_hasta,
+            }, status=status.HTTP_409_CONFLICT)
+
         nuevo_estado = request.data.get("estado")
         ESTADOS_VALIDOS = ["pendiente", "aprobado", "rechazado"]
 
@@ -884,15 +1053,21 @@ class ReporteEstadoUpdateView(APIView):
         estado_anterior = reporte.estado
         reporte.estado = nuevo_estado
         reporte.updated_by = request.user
+        # La revisión terminó: el reporte deja de estar reclamado
+        reporte.reclamado_por = None
+        reporte.reclamado_hasta = None
         reporte.save()
+        contadores.registrar_cambio((reporte.medida_id, reporte.organismo_id, estado_anterior), reporte)
 
         # Registro de trazabilidad
-        HistorialEstadoReporte.objects.create(
+        entrada = HistorialEstadoReporte.objects.create(
             reporte=reporte,
             estado_anterior=estado_anterior,
             estado_nuevo=nuevo_estado,
-            actualizado_por=request.user.username if request.user.is_authenticated else "Desconocido"
+            created_by=request.user if request.user.is_authenticated else None
         )
+        salida.registrar(salida.REPORTE_ESTADO_CAMBIADO, eventos.evento_cambio_estado(entrada, reporte))
+        transaction.on_commit(lambda: eventos.publicar_cambio_estado(entrada, reporte))
 
         serializer = ReporteSerializer(reporte)
         return Response({
@@ -903,10 +1078,636 @@ class ReporteEstadoUpdateView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+@extend_schema_view(
+    post=extend_schema(
+        summary="Reclamar reportes pendientes para revisión",
+        description=(
+            "Reserva para el usuario los próximos `cantidad` reportes pendientes (los más antiguos primero) "
+            "durante REVISION_DURACION_RECLAMO minutos. Revisores concurrentes reciben lotes disjuntos sin "
+            "esperarse entre sí. Volver a reclamar renueva los reclamos propios."
+        ),
+        parameters=[
+            OpenApiParameter(name='cantidad', description=f'Cantidad de reportes a reclamar (1 a {revision.MAXIMO_RECLAMO}, por defecto 10)', required=False, type=int),
+            OpenApiParameter(name='organismo', description='Limita la cola a un organismo responsable', required=False, type=int),
+        ],
+        tags=["Reportes"]
+    )
+)
+class ReclamarReportesView(APIView):
+    """
+    POST /api/reportes/reclamar/ -> Reclama un lote de reportes pendientes para revisarlos.
+    """
+    permission_classes = [EsAdmin | EsSuperAdmin]
+
+    def post(self, request):
+        try:
+            cantidad = int(request.data.get('cantidad', request.GET.get('cantidad', 10)))
+            organismo = request.data.get('organismo', request.GET.get('organismo'))
+            organismo = int(organismo) if organismo not in (None, '') else None
+        except (TypeError, ValueError):
+            return Response({"error": "Los parámetros 'cantidad' y 'organismo' deben ser enteros."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= cantidad <= revision.MAXIMO_RECLAMO:
+            return Response({"error": f"'cantidad' debe estar entre 1 y {revision.MAXIMO_RECLAMO}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = revision.reclamar_reportes(request.user, cantidad, organismo)
+        reportes = Reporte.objects.filter(pk__in=ids).order_by('fecha_envio', 'id')
+        return Response({
+            "reclamado_hasta": reportes[0].reclamado_hasta if ids else None,
+            "reportes": ReporteSerializer(reportes, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    post=extend_schema(
+        summary="Liberar reportes reclamados",
+        description="Devuelve a la cola de revisión los reportes reclamados por el usuario. Sin `ids` se liberan todos.",
+        tags=["Reportes"]
+    )
+)
+class LiberarReportesView(APIView):
+    """
+    POST /api/reportes/liberar/ -> Libera los reclamos propios (todos o los de `ids`).
+    """
+    permission_classes = [EsAdmin | EsSuperAdmin]
+
+    def post(self, request):
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list):
+                return Response({"error": "'ids' debe ser una lista de enteros."}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                ids = [int(pk) for pk in ids]
+            except (TypeError, ValueError):
+                return Response({"error": "'ids' debe ser una lista de enteros."}, status=status.HTTP_400_BAD_REQUEST)
+        liberados = revision.liberar_reportes(request.user, ids)
+        return Response({"liberados": liberados}, status=status.HTTP_200_OK)
+
+
+class HistorialPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('fecha', 'id')
+
+
+def historial_visible(request):
+    """
+    Historial de estados visible para el usuario: todo para superusuarios y,
+    para el resto, solo el de reportes de sus organismos.
+    """
+    historial = HistorialEstadoReporte.objects.select_related('created_by')
+    if not request.user.is_superuser:
+        historial = historial.filter(reporte__organismo__in=organismos_del_usuario(request.user))
+    return historial
+
+
+def archivados_visibles(request):
+    """Reportes archivados visibles para el usuario, con el mismo criterio que `historial_visible`."""
+    archivados = ReporteArchivado.objects.all()
+    if not request.user.is_superuser:
+        archivados = archivados.filter(organismo__in=organismos_del_usuario(request.user))
+    return archivados
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Historial de estados de un reporte",
+        description="Lista los cambios de estado de un reporte en orden cronológico, con paginación por cursor. "
+                    "Para reportes archivados se retorna el historial completo en una sola página.",
+        tags=["Reportes"],
+        responses=HistorialEstadoReporteSerializer(many=True),
+        parameters=[
+            OpenApiParameter(name='id_reporte', type=int, location=OpenApiParameter.PATH,
+                           description='ID del reporte'),
+            OpenApiParameter(name='cursor', type=str, location=OpenApiParameter.QUERY,
+                           description='Cursor de paginación entregado en "next" o "previous"'),
+            OpenApiParameter(name='page_size', type=int, location=OpenApiParameter.QUERY,
+                           description='Cantidad de elementos por página'),
+        ],
+    ),
+)
+class HistorialReporteView(APIView):
+    """
+    GET /api/reportes/<id>/historial/ -> Línea de tiempo de un reporte.
+    """
+    permission_classes = [EsRepOrgResOSoloLectura]
+
+    def get(self, request, id_reporte):
+        reportes = Reporte.objects.filter(id=id_reporte)
+        if not request.user.is_superuser:
+            reportes = reportes.filter(organismo__in=organismos_del_usuario(request.user))
+        if not reportes.exists():
+            archivado = archivados_visibles(request).filter(id=id_reporte).values_list('historial', flat=True).first()
+            if archivado is None:
+                return Response({"error": "Reporte no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+            # El historial archivado se entrega completo, en una sola página
+            return Response({"next": None, "previous": None, "results": archivado}, status=status.HTTP_200_OK)
+
+        historial = HistorialEstadoReporte.objects.filter(reporte_id=id_reporte).select_related('created_by')
+        paginator = HistorialPagination()
+        page = paginator.paginate_queryset(historial, request, view=self)
+        serializer = HistorialEstadoReporteSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Historial de estados de varios reportes",
+        description="Retorna las líneas de tiempo de varios reportes en una sola consulta, agrupadas por ID de reporte.",
+        tags=["Reportes"],
+        parameters=[
+            OpenApiParameter(name='reportes', type=str, location=OpenApiParameter.QUERY, required=True,
+                           description='IDs de reportes separados por coma (máximo 100), por ejemplo "1,2,3"'),
+        ],
+    ),
+)
+class HistorialReportesView(APIView):
+    """
+    GET /api/reportes/historial/?reportes=1,2,3 -> Líneas de tiempo agrupadas por reporte.
+    """
+    permission_classes = [EsRepOrgResOSoloLectura]
+    MAX_REPORTES = 100
+
+    def get(self, request):
+        valores = [v.strip() for v in request.GET.get('reportes', '').split(',') if v.strip()]
+        if not valores or not all(v.isdigit() for v in valores):
+            return Response({"error": "Debe indicar IDs de reportes numéricos separados por coma."}, status=status.HTTP_400_BAD_REQUEST)
+        ids = list(dict.fromkeys(int(v) for v in valores))
+        if len(ids) > self.MAX_REPORTES:
+            return Response({"error": f"Se permiten como máximo {self.MAX_REPORTES} reportes por consulta."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Una sola consulta ordenada por (reporte, fecha), servida por el índice compuesto
+        historial = historial_visible(request).filter(reporte_id__in=ids).order_by('reporte_id', 'fecha', 'id')
+        lineas = {str(i): [] for i in ids}
+        for entrada in HistorialEstadoReporteSerializer(historial, many=True).data:
+            lineas[str(entrada['reporte'])].append(entrada)
+        for id_reporte, entradas in archivados_visibles(request).filter(id__in=ids).values_list('id', 'historial'):
+            lineas[str(id_reporte)] = entradas
+        return Response(lineas, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Tiempos de revisión de reportes",
+        description="Percentiles del tiempo que los reportes permanecen pendientes antes de ser revisados, "
+                    "por mes y dimensión. Los datos provienen de una tabla materializada que se refresca "
+                    "periódicamente con el comando refrescar_metricas_revision.",
+        tags=["Analítica"],
+        responses=MetricaRevisionSerializer(many=True),
+        parameters=[
+            OpenApiParameter(name='dimension', type=str, location=OpenApiParameter.QUERY,
+                           description='Dimensión de agregación: total, organismo, plan o revisor (por defecto total)'),
+            OpenApiParameter(name='clave', type=str, location=OpenApiParameter.QUERY,
+                           description='ID del organismo o plan, o nombre de usuario del revisor'),
+            OpenApiParameter(name='desde', type=str, location=OpenApiParameter.QUERY,
+                           description='Mes inicial (YYYY-MM)'),
+            OpenApiParameter(name='hasta', type=str, location=OpenApiParameter.QUERY,
+                           description='Mes final (YYYY-MM)'),
+        ],
+    ),
+)
+class AnaliticaRevisionView(APIView):
+    """
+    GET /api/analitica/revision/ -> Métricas de tiempo en estado pendiente.
+    """
+    permission_classes = [EsAdmin | EsSuperAdmin]
+
+    def get(self, request):
+        dimension = request.GET.get('dimension', 'total')
+        dimensiones_validas = [valor for valor, _ in MetricaRevision.DIMENSIONES]
+        if dimension not in dimensiones_validas:
+            return Response({"error": f"Dimensión inválida. Debe ser una de: {', '.join(dimensiones_validas)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        metricas = MetricaRevision.objects.filter(dimension=dimension)
+        clave = request.GET.get('clave')
+        if clave:
+            metricas = metricas.filter(clave=clave)
+        for parametro, lookup in (('desde', 'mes__gte'), ('hasta', 'mes__lte')):
+            valor = request.GET.get(parametro)
+            if valor:
+                try:
+                    mes = datetime.strptime(valor, "%Y-%m").date()
+                except ValueError:
+                    return Response({"error": "Formato de mes inválido. Use YYYY-MM."}, status=status.HTTP_400_BAD_REQUEST)
+                metricas = metricas.filter(**{lookup: mes})
+
+        serializer = MetricaRevisionSerializer(metricas.order_by('mes', 'clave'), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Búsqueda de texto completo en medidas y reportes",
+        description="Busca palabras en la descripción, indicador y fórmula de cálculo de las medidas y en la "
+                    "descripción de los reportes. Los resultados se ordenan por relevancia (campo rango).",
+        tags=["Búsqueda"],
+        parameters=[
+            OpenApiParameter(name='q', type=str, location=OpenApiParameter.QUERY, required=True,
+                           description='Texto a buscar (admite comillas para frases y - para excluir palabras)'),
+            OpenApiParameter(name='tipo', type=str, location=OpenApiParameter.QUERY,
+                           description='medidas, reportes o ambos si se omite'),
+            OpenApiParameter(name='limite', type=int, location=OpenApiParameter.QUERY,
+                           description='Máximo de resultados por tipo (por defecto 20, entre 1 y 100)'),
+        ],
+    ),
+)
+class BusquedaView(APIView):
+    """
+    GET /api/busqueda/?q=... -> Medidas y reportes que contienen el texto, por relevancia.
+    Los reportes solo se incluyen para usuarios autenticados y limitados a sus organismos.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        texto = request.GET.get('q', '').strip()
+        if not texto:
+            return Response({"error": "Debe indicar el texto a buscar en el parámetro q."}, status=status.HTTP_400_BAD_REQUEST)
+        tipo = request.GET.get('tipo')
+        if tipo not in (None, 'medidas', 'reportes'):
+            return Response({"error": "Tipo inválido. Debe ser medidas o reportes."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limite = max(1, min(int(request.GET.get('limite', 20)), 100))
+        except ValueError:
+            return Response({"error": "El límite debe ser un número."}, status=status.HTTP_400_BAD_REQUEST)
+
+        resultado = {}
+        if tipo in (None, 'medidas'):
+            medidas = busqueda.buscar(Medida.objects.all(), texto, busqueda.CAMPOS_MEDIDA)[:limite]
+            resultado['medidas'] = [
+                {**MedidaSerializer(m).data, 'rango': m.rango} for m in medidas
+            ]
+        if tipo in (None, 'reportes'):
+            resultado['reportes'] = []
+            if request.user.is_authenticated:
+                reportes = Reporte.objects.all()
+                if not request.user.is_superuser:
+                    reportes = reportes.filter(organismo__in=organismos_del_usuario(request.user))
+                reportes = busqueda.buscar(reportes, texto, busqueda.CAMPOS_REPORTE)[:limite]
+                resultado['reportes'] = [
+                    {**ReporteSerializer(r).data, 'rango': r.rango} for r in reportes
+                ]
+        return Response(resultado, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Autocompletar nombres de regiones, ciudades, comunas y organismos",
+        description="Retorna los nombres que comienzan con el texto (o que tienen una palabra que comienza con él), "
+                    "sin considerar mayúsculas ni tildes. Se resuelve desde un índice en memoria, sin consultar "
+                    "la base de datos. El campo padre es la región de una ciudad o la ciudad de una comuna.",
+        tags=["Búsqueda"],
+        parameters=[
+            OpenApiParameter(name='q', type=str, location=OpenApiParameter.QUERY, required=True,
+                           description='Texto ingresado por el usuario'),
+            OpenApiParameter(name='tipo', type=str, location=OpenApiParameter.QUERY, required=True,
+                           description='region, ciudad, comuna u organismo; se admiten varios separados por coma'),
+            OpenApiParameter(name='limite', type=int, location=OpenApiParameter.QUERY,
+                           description='Máximo de resultados (por defecto 10, máximo 50)'),
+        ],
+    ),
+)
+class AutocompletarView(APIView):
+    """
+    GET /api/autocompletar/?q=con&tipo=comuna -> [{"tipo", "id", "nombre", "padre"}]
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        texto = request.GET.get('q', '').strip()
+        if not texto:
+            return Response({"error": "Debe indicar el texto a buscar en el parámetro q."}, status=status.HTTP_400_BAD_REQUEST)
+        tipos = [t.strip() for t in request.GET.get('tipo', '').split(',') if t.strip()]
+        if not tipos or any(t not in autocompletar.TIPOS for t in tipos):
+            return Response({"error": "Tipo inválido. Debe ser region, ciudad, comuna u organismo."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limite = max(1, min(int(request.GET.get('limite', 10)), 50))
+        except ValueError:
+            return Response({"error": "El límite debe ser un número."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(autocompletar.autocompletar(texto, tipos, limite), status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Paquete de datos de referencia",
+        description=(
+            "Regiones, ciudades, comunas, organismos, planes, medidas y las opciones de los campos con "
+            "valores fijos, en un solo documento precalculado. La cabecera ETag (y X-Referencia-Version) "
+            "identifica el contenido: con If-None-Match se responde 304, y al pedir `?v=<version>` vigente "
+            "la respuesta se puede cachear indefinidamente."
+        ),
+        tags=["Referencia"],
+        parameters=[
+            OpenApiParameter(name='v', type=str, location=OpenApiParameter.QUERY,
+                             description='Versión conocida del paquete; si es la vigente la respuesta es inmutable'),
+        ],
+    ),
+)
+class ReferenciaView(APIView):
+    """
+    GET /api/referencia/ -> Catálogos y opciones para el arranque de los frontends.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        version, comprimido = referencia.obtener()
+        # Cada codificación es una representación distinta y lleva su propio ETag
+        usar_gzip = 'gzip' in codificaciones_aceptadas(request.headers.get('Accept-Encoding', ''))
+        etag = f'"{version}-gz"' if usar_gzip else f'"{version}"'
+        if request.GET.get('v') == version:
+            cache_control = 'public, max-age=31536000, immutable'
+        else:
+            cache_control = 'no-cache'
+
+        if etag in [e.strip() for e in request.headers.get('If-None-Match', '').split(',')]:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif usar_gzip:
+            response = HttpResponse(comprimido, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(comprimido), content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        response['Vary'] = 'Accept-Encoding'
+        response['X-Referencia-Version'] = version
+        return response
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Cambios desde la última sincronización",
+        description=(
+            "Retorna, por colección, los registros creados y actualizados y los ids eliminados desde el "
+            "token de la sincronización anterior, junto con el token para la siguiente. Sin `desde`, o con "
+            "un token demasiado antiguo, la respuesta es completa (`completo: true`). Los reportes solo se "
+            "incluyen para usuarios autenticados y limitados a sus organismos."
+        ),
+        tags=["Sincronización"],
+        parameters=[
+            OpenApiParameter(name='desde', type=str, location=OpenApiParameter.QUERY,
+                             description='Token retornado por la sincronización anterior'),
+            OpenApiParameter(name='colecciones', type=str, location=OpenApiParameter.QUERY,
+                             description='Colecciones separadas por coma (por defecto todas las disponibles): '
+                                         + ', '.join(sincronizacion.COLECCIONES)),
+        ],
+    ),
+)
+class CambiosView(APIView):
+    """
+    GET /api/cambios/?desde=<token> -> {"token", "completo", "cambios": {coleccion: {creados, actualizados, eliminados}}}
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        desde = request.GET.get('desde')
+        try:
+            desde = sincronizacion.fecha_de(desde) if desde else None
+        except (ValueError, OverflowError, OSError):
+            return Response({"error": "Token de sincronización inválido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        autenticado = request.user.is_authenticated
+        colecciones = [c.strip() for c in request.GET.get('colecciones', '').split(',') if c.strip()]
+        if not colecciones:
+            colecciones = [c for c in sincronizacion.COLECCIONES if autenticado or c != 'reportes']
+        invalidas = [c for c in colecciones if c not in sincronizacion.COLECCIONES]
+        if invalidas:
+            return Response({"error": f"Colecciones inválidas: {', '.join(invalidas)}."}, status=status.HTTP_400_BAD_REQUEST)
+        if 'reportes' in colecciones and not autenticado:
+            return Response({"error": "Debe autenticarse para sincronizar reportes."}, status=status.HTTP_403_FORBIDDEN)
+
+        organismos = None
+        if autenticado and not request.user.is_superuser:
+            organismos = list(organismos_del_usuario(request.user).values_list('id', flat=True))
+        return Response(sincronizacion.cambios(desde, colecciones, organismos), status=status.HTTP_200_OK)
+
+
+class TareasPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-id',)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Listar tareas en segundo plano",
+        description="Lista las tareas de la cola, las más recientes primero, con paginación por cursor.",
+        tags=["Tareas"],
+        responses=TareaSerializer(many=True),
+        parameters=[
+            OpenApiParameter(name='estado', type=str, location=OpenApiParameter.QUERY,
+                             description='pendiente, en_curso, completada, fallida o cancelada'),
+            OpenApiParameter(name='nombre', type=str, location=OpenApiParameter.QUERY, description='Nombre de la tarea'),
+            OpenApiParameter(name='cola', type=str, location=OpenApiParameter.QUERY, description='Cola de la tarea'),
+        ],
+    ),
+    post=extend_schema(
+        summary="Encolar una tarea",
+        description='Encola una tarea registrada: {"nombre": "recalcular_contadores", "argumentos": {}, '
+                    '"prioridad": 0, "ejecutar_desde": "2025-05-01T03:00:00Z"}. Solo "nombre" es obligatorio.',
+        tags=["Tareas"],
+        responses=TareaSerializer,
+    ),
+)
+class TareasView(APIView):
+    """
+    GET /api/tareas/ -> Tareas de la cola.
+    POST /api/tareas/ -> Encola una tarea.
+    """
+    permission_classes = [EsSuperAdmin]
+
+    def get(self, request):
+        consulta = Tarea.objects.select_related('creada_por')
+        for campo in ('estado', 'nombre', 'cola'):
+            if request.GET.get(campo):
+                consulta = consulta.filter(**{campo: request.GET[campo]})
+        paginator = TareasPagination()
+        page = paginator.paginate_queryset(consulta, request, view=self)
+        return paginator.get_paginated_response(TareaSerializer(page, many=True).data)
+
+    def post(self, request):
+        argumentos = request.data.get('argumentos') or {}
+        if not isinstance(argumentos, dict):
+            return Response({"error": "'argumentos' debe ser un objeto."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            prioridad = int(request.data.get('prioridad', 0))
+        except (TypeError, ValueError):
+            return Response({"error": "'prioridad' debe ser un entero."}, status=status.HTTP_400_BAD_REQUEST)
+        ejecutar_desde = request.data.get('ejecutar_desde')
+        if ejecutar_desde:
+            try:
+                ejecutar_desde = parse_datetime(str(ejecutar_desde))
+            except ValueError:
+                ejecutar_desde = None
+            if ejecutar_desde is None:
+                return Response({"error": "'ejecutar_desde' debe ser una fecha y hora ISO 8601."}, status=status.HTTP_400_BAD_REQUEST)
+            if is_naive(ejecutar_desde):
+                ejecutar_desde = make_aware(ejecutar_desde)
+        try:
+            tarea = tareas.encolar(
+                request.data.get('nombre'), argumentos, prioridad=prioridad,
+                ejecutar_desde=ejecutar_desde, usuario=request.user,
+            )
+        except tareas.TareaDesconocida as error:
+            return Response({"error": str(error), "disponibles": sorted(tareas.registradas())}, status=status.HTTP_400_BAD_REQUEST)
+        except tareas.ArgumentosInvalidos as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(TareaSerializer(tarea).data, status=status.HTTP_201_CREATED)
+
+
+@extend_schema_view(
+    get=extend_schema(summary="Detalle de una tarea", tags=["Tareas"], responses=TareaSerializer),
+)
+class TareaDetailView(APIView):
+    """
+    GET /api/tareas/<id>/ -> Estado, intentos, resultado y último error de una tarea.
+    """
+    permission_classes = [EsSuperAdmin]
+
+    def get(self, request, pk):
+        tarea = get_object_or_404(Tarea.objects.select_related('creada_por'), pk=pk)
+        return Response(TareaSerializer(tarea).data, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    post=extend_schema(
+        summary="Cancelar una tarea",
+        description="Cancela una tarea pendiente. Las tareas en curso o terminadas no se pueden cancelar (409).",
+        tags=["Tareas"],
+        responses=TareaSerializer,
+    ),
+)
+class CancelarTareaView(APIView):
+    """
+    POST /api/tareas/<id>/cancelar/ -> Cancela una tarea pendiente.
+    """
+    permission_classes = [EsSuperAdmin]
+
+    def post(self, request, pk):
+        tarea = get_object_or_404(Tarea, pk=pk)
+        if not tareas.cancelar(tarea.pk):
+            tarea.refresh_from_db()
+            return Response({"error": f"La tarea está {tarea.estado} y no se puede cancelar."}, status=status.HTTP_409_CONFLICT)
+        tarea.refresh_from_db()
+        return Response(TareaSerializer(tarea).data, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        summary="Resumen de la cola de tareas",
+        description="Cantidad de tareas por cola y estado, límites de concurrencia, tareas registradas y tareas recurrentes.",
+        tags=["Tareas"],
+    ),
+)
+class ResumenTareasView(APIView):
+    """
+    GET /api/tareas/resumen/ -> {"colas": {cola: {estado: cantidad}}, "limites", "registradas", "programadas"}
+    """
+    permission_classes = [EsSuperAdmin]
+
+    def get(self, request):
+        colas = {}
+        for fila in Tarea.objects.values('cola', 'estado').annotate(cantidad=Count('id')).order_by():
+            colas.setdefault(fila['cola'], {})[fila['estado']] = fila['cantidad']
+        return Response({
+            "colas": colas,
+            "limites": settings.TAREAS_LIMITES_COLA,
+            "registradas": sorted(tareas.registradas()),
+            "programadas": TareaProgramadaSerializer(TareaProgramada.objects.order_by('nombre'), many=True).data,
+        }, status=status.HTTP_200_OK)
+
+def _usuario_jwt(request):
+    """Usuario del token JWT en la cabecera Authorization o en `?token=` (EventSource no envía cabeceras)."""
+    autenticador = JWTAuthentication()
+    try:
+        resultado = autenticador.authenticate(request)
+        if resultado is not None:
+            return resultado[0]
+        if request.GET.get('token'):
+            return autenticador.get_user(autenticador.get_validated_token(request.GET['token']))
+    except (InvalidToken, AuthenticationFailed):
+        pass
+    return None
+
+
+def _canales_eventos(usuario, organismo_id):
+    """Retorna (canales, organismos) visibles para el usuario; organismos None significa todos."""
+    if usuario.is_superuser:
+        if organismo_id is None:
+            return [eventos.CANAL_TODOS], None
+        return [eventos.canal_organismo(organismo_id)], [organismo_id]
+    organismos = list(organismos_del_usuario(usuario).values_list('id', flat=True))
+    if organismo_id is not None:
+        organismos = [o for o in organismos if o == organismo_id]
+    return [eventos.canal_organismo(o) for o in organismos], organismos
+
+
+def _formatear_evento(evento):
+    return f"id: {evento['id']}\nevent: estado\ndata: {json.dumps(evento)}\n\n"
+
+
+async def eventos_reportes(request):
+    """
+    GET /api/reportes/eventos/ -> Flujo SSE con los cambios de estado de los reportes
+    de los organismos del usuario (todos para superusuarios). Requiere ASGI.
+
+    Autenticación con JWT en la cabecera Authorization o en `?token=`. `?organismo=<id>`
+    limita el flujo a un organismo. Con `Last-Event-ID` (o `?ultimo=`) se envían
+    primero los cambios ocurridos mientras el cliente estuvo desconectado.
+    """
+    if request.method != 'GET':
+        return JsonResponse({"error": "Método no permitido."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    usuario = await sync_to_async(_usuario_jwt)(request)
+    if usuario is None:
+        return JsonResponse({"error": "Debe autenticarse."}, status=status.HTTP_401_UNAUTHORIZED)
+    try:
+        organismo_id = int(request.GET['organismo']) if request.GET.get('organismo') else None
+        ultimo = request.headers.get('Last-Event-ID') or request.GET.get('ultimo')
+        ultimo = int(ultimo) if ultimo else None
+    except ValueError:
+        return JsonResponse({"error": "Los parámetros organismo y Last-Event-ID deben ser enteros."}, status=status.HTTP_400_BAD_REQUEST)
+
+    canales, organismos = await sync_to_async(_canales_eventos)(usuario, organismo_id)
+    if not canales:
+        return JsonResponse({"error": "No tiene acceso a reportes de ese organismo."}, status=status.HTTP_403_FORBIDDEN)
+
+    # Se suscribe antes de leer lo pendiente para no perder eventos entre ambos pasos
+    suscripcion = eventos.obtener_bus().suscribir(canales)
+
+    async def flujo():
+        try:
+            yield f"retry: {settings.EVENTOS_REINTENTO_MS}\n\n"
+            # Un evento puede llegar por el bus y también entre los pendientes
+            enviados = set()
+            desde = ultimo
+            # Lo perdido se envía por páginas hasta agotarlo
+            while desde is not None:
+                pagina = await sync_to_async(eventos.eventos_pendientes)(desde, organismos, eventos.PAGINA_PENDIENTES)
+                for evento in pagina:
+                    enviados.add(evento['id'])
+                    yield _formatear_evento(evento)
+                desde = pagina[-1]['id'] if len(pagina) == eventos.PAGINA_PENDIENTES else None
+            while True:
+                evento = await suscripcion.siguiente(timeout=settings.EVENTOS_LATIDO_SEGUNDOS)
+                if evento is None:
+                    # Comentario SSE para mantener viva la conexión a través de proxies
+                    yield ": latido\n\n"
+                elif evento['id'] not in enviados:
+                    yield _formatear_evento(evento)
+        finally:
+            suscripcion.cerrar()
+
+    response = StreamingHttpResponse(flujo(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Evita que nginx acumule el flujo antes de enviarlo
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @extend_schema_view(
     get=extend_schema(
         summary="Listar todos los reportes",
-        tags=["Reportes"]
+        tags=["Reportes"],
+        parameters=[*PARAMETROS_PROYECCION, PARAMETRO_COLUMNAR],
     ),
 )
 class ReportesView(APIView):
@@ -916,14 +1717,27 @@ class ReportesView(APIView):
     """
     permission_classes = [permissions.AllowAny]
     def get(self, request):
-        reportes = Reporte.objects.all()
-        serializer = ReporteSerializer(reportes, many=True)
+        proyeccion = Proyeccion.desde_request(request, ReporteSerializer)
+        lector = lectura.lector(ReporteSerializer, proyeccion)
+        if lector is not None:
+            return Response(lector.filas(Reporte.objects.all()), status=status.HTTP_200_OK)
+        reportes = proyeccion.optimizar(Reporte.objects.all(), ReporteSerializer)
+        serializer = ReporteSerializer(reportes, many=True, proyeccion=proyeccion)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @extend_schema_view(
     post=extend_schema(
         summary="Crear un nuevo reporte",
+        description=(
+            "Con `reenvio=true`, un segundo envío del mismo organismo para la misma medida en el día "
+            "reemplaza descripción, archivo y medio de verificación del reporte si sigue pendiente "
+            "(200), o lo crea si no existe (201). Si el reporte ya fue revisado responde 409."
+        ),
+        parameters=[
+            OpenApiParameter(name='reenvio', type=bool, location=OpenApiParameter.QUERY, required=False,
+                             description='Reemplaza el reporte pendiente del día en lugar de fallar por duplicado'),
+        ],
         tags=["Reportes"]
     ),
     get=extend_schema(
@@ -932,6 +1746,7 @@ class ReportesView(APIView):
         parameters=[
             OpenApiParameter(name='id_reporte', type=int, location=OpenApiParameter.PATH, 
                            description='ID del reporte a obtener'),
+            *PARAMETROS_PROYECCION,
         ],
     ),
     put=extend_schema(
@@ -962,35 +1777,87 @@ class ReporteView(APIView):
     parser_classes = (MultiPartParser, FormParser)
     permission_classes = [EsRepOrgResOSoloLectura]
 
+    @idempotente
     def post(self, request):
+        if request.GET.get('reenvio', '').lower() in ('true', '1'):
+            return self.reenviar(request)
         serializer = ReporteSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save(created_by=request.user, updated_by=request.user)
+            with transaction.atomic():
+                reporte = serializer.save(created_by=request.user, updated_by=request.user)
+                contadores.registrar_creacion(reporte)
+                salida.registrar(salida.REPORTE_CREADO, salida.datos_reporte(reporte))
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def reenviar(self, request):
+        serializer = ReporteReenvioSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            reporte, creado = reenvio.reenviar_reporte(serializer.validated_data, request.user)
+        except reenvio.ReporteYaRevisado:
+            return Response({"error": "El reporte de hoy ya fue revisado y no puede reemplazarse."}, status=status.HTTP_409_CONFLICT)
+        return Response(
+            ReporteSerializer(reporte, context={'request': request}).data,
+            status=status.HTTP_201_CREATED if creado else status.HTTP_200_OK
+        )
+
     def get(self, request, id_reporte=None):
         if not id_reporte:
             raise BadRequest("Se requiere un ID de reporte para esta operacion.")
-        reporte = get_object_or_404(Reporte, id=id_reporte)
-        serializer = ReporteSerializer(reporte)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        proyeccion = Proyeccion.desde_request(request, ReporteSerializer)
+        if not proyeccion.expandir:
+            fila = Reporte.objects.filter(id=id_reporte).values_list('id', 'updated_at').first()
+            encontrados = fragmentos.obtener([fila]) if fila else []
+            if encontrados:
+                return Response(fragmentos.proyectar(encontrados, proyeccion.campos)[0], status=status.HTTP_200_OK)
+        else:
+            reporte = proyeccion.optimizar(Reporte.objects.filter(id=id_reporte), ReporteSerializer).first()
+            if reporte is not None:
+                serializer = ReporteSerializer(reporte, proyeccion=proyeccion)
+                return Response(serializer.data, status=status.HTTP_200_OK)
+        # Los reportes cerrados antiguos se consultan desde el archivo, siempre completos
+        archivado = get_object_or_404(ReporteArchivado, id=id_reporte)
+        return Response(ReporteArchivadoSerializer(archivado).data, status=status.HTTP_200_OK)
+
+    def reporte_modificable(self, id_reporte, bloquear=False):
+        """
+        Retorna el reporte, o una respuesta de error si no existe o está archivado.
+        Con `bloquear`, la fila queda bloqueada hasta el final de la transacción en curso.
+        """
+        reporte = (Reporte.objects.select_for_update() if bloquear else Reporte.objects).filter(id=id_reporte).first()
+        if reporte is not None:
+            return reporte, None
+        if ReporteArchivado.objects.filter(id=id_reporte).exists():
+            return None, Response({"error": "El reporte está archivado y no puede modificarse."}, status=status.HTTP_409_CONFLICT)
+        raise Http404
 
     def put(self, request, id_reporte=None):
         if not id_reporte:
             raise BadRequest("Se requiere un ID de reporte para esta operacion.")
-        reporte = get_object_or_404(Reporte, id=id_reporte)
-        serializer = ReporteSerializer(reporte, data=request.data, partial=True, context={'request': request})
-        if serializer.is_valid():
-            serializer.save(updated_by=request.user)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            # Bloqueada para que `anterior` siga vigente al ajustar los contadores
+            reporte, error = self.reporte_modificable(id_reporte, bloquear=True)
+            if error:
+                return error
+            anterior = (reporte.medida_id, reporte.organismo_id, reporte.estado)
+            serializer = ReporteSerializer(reporte, data=request.data, partial=True, context={'request': request})
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            reporte = serializer.save(updated_by=request.user)
+            contadores.registrar_cambio(anterior, reporte)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
     def delete(self, request, id_reporte=None):
         if not id_reporte:
             raise BadRequest("Se requiere un ID de reporte para esta operacion.")
-        reporte = get_object_or_404(Reporte, id=id_reporte)
-        reporte.delete()
+        reporte, error = self.reporte_modificable(id_reporte)
+        if error:
+            return error
+        if not contadores.eliminar_reporte(reporte):
+            # Otra solicitud lo eliminó entre la lectura y el bloqueo
+            raise Http404
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 @extend_schema_view(
@@ -1006,6 +1873,8 @@ class ReporteView(APIView):
                            description='Filtrar medidas por ID de plan PPDA'),
             OpenApiParameter(name='organismo_id', type=int, location=OpenApiParameter.QUERY, 
                            description='Filtrar medidas por ID de organismo responsable'),
+            *PARAMETROS_PROYECCION,
+            PARAMETRO_COLUMNAR,
         ],
     ),
     post=extend_schema(summary="Crear una nueva medidas", tags=["Medidas"], request=MedidaSerializer),
@@ -1026,7 +1895,13 @@ class MedidaView(APIView):
         Retorna:
         - Lista de medidas en formato JSON.
         """
-        medidas = Medida.objects.all()
+        proyeccion = Proyeccion.desde_request(request, MedidaSerializer)
+        lector = lector_rapido(request, MedidaSerializer, proyeccion, filtros=('nombre_corto', 'referencia_pda', 'plan_id', 'organismo_id'))
+        if lector is not None:
+            return Response(lector.filas(Medida.objects.all()), status=status.HTTP_200_OK)
+        medidas = proyeccion.optimizar(
+            Medida.objects.all(), MedidaSerializer, necesarios=('nombre_corto', 'referencia_pda', 'plan', 'organismos')
+        )
         
         nombre_corto = request.GET.get('nombre_corto')
         if nombre_corto:
@@ -1043,14 +1918,14 @@ class MedidaView(APIView):
         plan_id = request.GET.get('plan_id')
         if plan_id:
             medidas = [medida for medida in medidas 
-                      if str(medida.plan.id) == plan_id]
+                      if str(medida.plan_id) == plan_id]
         
         organismo_id = request.GET.get('organismo_id')
         if organismo_id:
             medidas = [medida for medida in medidas 
                       if any(str(org.id) == organismo_id for org in medida.organismos.all())]
             
-        serializer = MedidaSerializer(medidas, many=True)
+        serializer = MedidaSerializer(medidas, many=True, proyeccion=proyeccion)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -1105,6 +1980,7 @@ class MedidaView(APIView):
         parameters=[
             OpenApiParameter(name='pk', type=int, location=OpenApiParameter.PATH, 
                            description='ID de la medida a obtener'),
+            *PARAMETROS_PROYECCION,
         ],
     ),
     put=extend_schema(
@@ -1145,8 +2021,9 @@ class MedidaDetailView(APIView):
     def get(self, request, pk):
         """Obtener una medidas por su id"""
         try:
-            medida = Medida.objects.get(pk=pk)
-            serializer = MedidaSerializer(medida)
+            proyeccion = Proyeccion.desde_request(request, MedidaSerializer)
+            medida = proyeccion.optimizar(Medida.objects.all(), MedidaSerializer).get(pk=pk)
+            serializer = MedidaSerializer(medida, proyeccion=proyeccion)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Medida.DoesNotExist:
             raise Http404("Medida no encontrada")
@@ -1,4 +1,5 @@
 from pathlib import Path
+from importlib.util import find_spec
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
@@ -29,6 +30,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'app_reporte',
     'rest_framework',
     'drf_spectacular',
@@ -44,6 +46,8 @@ SPECTACULAR_SETTINGS = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'app_reporte.middleware.CompresionMiddleware',
+    'app_reporte.middleware.PrimariaTrasEscrituraMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -87,6 +91,42 @@ DATABASES = {
     }
 }
 
+# Réplicas de solo lectura: DB_REPLICA_HOSTS=host1,host2 agrega los alias replica_1, replica_2...
+# En pruebas las réplicas apuntan a la base de default (MIRROR).
+for numero, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica_{numero}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+REPLICAS_LECTURA = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['app_reporte.routers.RouterReplicas']
+# Segundos que un cliente lee desde la base principal después de escribir
+REPLICA_VENTANA_PRIMARIA = int(os.getenv('REPLICA_VENTANA_PRIMARIA', '5'))
+# Retraso máximo tolerado (segundos) antes de dejar de leer desde una réplica
+REPLICA_RETRASO_MAXIMO = float(os.getenv('REPLICA_RETRASO_MAXIMO', '10'))
+# Cada cuántos segundos se vuelve a medir el retraso de cada réplica
+REPLICA_INTERVALO_VERIFICACION = float(os.getenv('REPLICA_INTERVALO_VERIFICACION', '5'))
+
+# Caché
+# Con varios procesos o servidores debe configurarse REDIS_URL: la caché en memoria
+# es local a cada proceso y las invalidaciones no llegan a los demás.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -144,8 +184,25 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # JSON con orjson si está instalado, columnar (?format=columnar), MessagePack si está instalado
+    # msgpack y la API navegable solo con DEBUG
+    'DEFAULT_RENDERER_CLASSES': [
+        'app_reporte.renderers.JSONRapidoRenderer',
+        'app_reporte.renderers.ColumnarRenderer',
+        *(['app_reporte.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    ],
 }
 
+# Segundos que se conserva en caché la representación serializada de un reporte (ver fragmentos.py)
+FRAGMENTOS_REPORTE_SEGUNDOS = int(os.getenv('FRAGMENTOS_REPORTE_SEGUNDOS', '86400'))
+
+# Segundos que se conserva en caché una página del listado de reportes (ver resultados.py)
+RESULTADOS_REPORTES_SEGUNDOS = int(os.getenv('RESULTADOS_REPORTES_SEGUNDOS', '300'))
+
+# Tamaño mínimo (bytes) de una respuesta para comprimirla con brotli o gzip
+COMPRESION_MINIMO_BYTES = int(os.getenv('COMPRESION_MINIMO_BYTES', '1024'))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -153,6 +210,76 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Días desde el envío tras los cuales un reporte aprobado o rechazado se puede archivar
+ARCHIVO_HORIZONTE_DIAS = int(os.getenv('ARCHIVO_HORIZONTE_DIAS', '730'))
+
+# Minutos que un revisor retiene los reportes pendientes que reclama antes de que vuelvan a la cola
+REVISION_DURACION_RECLAMO = int(os.getenv('REVISION_DURACION_RECLAMO', '15'))
+
+# Horas durante las que se reproduce la respuesta de una solicitud con Idempotency-Key
+IDEMPOTENCIA_TTL_HORAS = int(os.getenv('IDEMPOTENCIA_TTL_HORAS', '24'))
+# Segundos tras los que una clave en curso se libera si la solicitud nunca terminó
+IDEMPOTENCIA_EN_CURSO_SEGUNDOS = int(os.getenv('IDEMPOTENCIA_EN_CURSO_SEGUNDOS', '300'))
+
+# Segundos que el paquete de datos de referencia permanece en caché si nada lo invalida antes
+REFERENCIA_CACHE_SEGUNDOS = int(os.getenv('REFERENCIA_CACHE_SEGUNDOS', '86400'))
+
+# Días que se conservan los registros de eliminación; un token más antiguo recibe una copia completa
+SINCRONIZACION_RETENCION_DIAS = int(os.getenv('SINCRONIZACION_RETENCION_DIAS', '90'))
+# Segundos que cada consulta incremental retrocede para incluir escrituras confirmadas tarde
+SINCRONIZACION_MARGEN_SEGUNDOS = int(os.getenv('SINCRONIZACION_MARGEN_SEGUNDOS', '30'))
+
+# Bus de eventos: BusLocal (un solo proceso) o BusPostgres (LISTEN/NOTIFY entre procesos)
+EVENTOS_BUS = os.getenv('EVENTOS_BUS', 'app_reporte.eventos.BusLocal')
+# Segundos sin eventos tras los que el flujo SSE envía un latido
+EVENTOS_LATIDO_SEGUNDOS = int(os.getenv('EVENTOS_LATIDO_SEGUNDOS', '15'))
+# Milisegundos que el navegador espera antes de reconectar el flujo SSE
+EVENTOS_REINTENTO_MS = int(os.getenv('EVENTOS_REINTENTO_MS', '3000'))
+
+# Bandeja de salida (ver app_reporte/salida.py). Sin URL de webhook ni destinatarios no se registran eventos.
+SALIDA_WEBHOOK_URL = os.getenv('SALIDA_WEBHOOK_URL', '')
+# Si se define, cada envío lleva la firma HMAC-SHA256 del cuerpo en la cabecera X-SNA-Firma
+SALIDA_WEBHOOK_SECRETO = os.getenv('SALIDA_WEBHOOK_SECRETO', '')
+SALIDA_WEBHOOK_TIMEOUT = float(os.getenv('SALIDA_WEBHOOK_TIMEOUT', '10'))
+SALIDA_EMAIL_DESTINATARIOS = [d.strip() for d in os.getenv('SALIDA_EMAIL_DESTINATARIOS', '').split(',') if d.strip()]
+SALIDA_MAXIMO_INTENTOS = int(os.getenv('SALIDA_MAXIMO_INTENTOS', '8'))
+# Espera antes del reintento n: SALIDA_ESPERA_BASE * 2^(n-1) segundos, hasta SALIDA_ESPERA_MAXIMA
+SALIDA_ESPERA_BASE = int(os.getenv('SALIDA_ESPERA_BASE', '30'))
+SALIDA_ESPERA_MAXIMA = int(os.getenv('SALIDA_ESPERA_MAXIMA', '3600'))
+SALIDA_RETENCION_DIAS = int(os.getenv('SALIDA_RETENCION_DIAS', '30'))
+
+# Cola de tareas en segundo plano (ver app_reporte/tareas.py y el comando procesar_tareas).
+# Máximo de tareas en curso por cola en todos los nodos, por ejemplo "pesadas=1,salida=2"; sin límite si no se indica
+TAREAS_LIMITES_COLA = {
+    cola.strip(): int(limite)
+    for cola, _, limite in (par.partition('=') for par in os.getenv('TAREAS_LIMITES_COLA', 'pesadas=1').split(','))
+    if cola.strip() and limite.strip()
+}
+# Segundos tras los que una tarea en curso se considera abandonada (trabajador caído) y se reintenta
+TAREAS_TIEMPO_MAXIMO_SEGUNDOS = int(os.getenv('TAREAS_TIEMPO_MAXIMO_SEGUNDOS', '1800'))
+# Espera antes del reintento n: TAREAS_ESPERA_BASE * 2^(n-1) segundos, hasta TAREAS_ESPERA_MAXIMA
+TAREAS_ESPERA_BASE = int(os.getenv('TAREAS_ESPERA_BASE', '10'))
+TAREAS_ESPERA_MAXIMA = int(os.getenv('TAREAS_ESPERA_MAXIMA', '600'))
+TAREAS_RETENCION_DIAS = int(os.getenv('TAREAS_RETENCION_DIAS', '30'))
+# Tareas recurrentes: nombre -> tarea registrada, argumentos e intervalo en segundos
+TAREAS_PROGRAMADAS = {
+    'despachar_eventos': {'tarea': 'despachar_eventos', 'intervalo': 60},
+    'refrescar_metricas_revision': {'tarea': 'refrescar_metricas_revision', 'intervalo': 3600},
+    'purgar_claves_idempotencia': {'tarea': 'purgar_claves_idempotencia', 'intervalo': 3600},
+    'purgar_eliminaciones': {'tarea': 'purgar_eliminaciones', 'intervalo': 86400},
+    'purgar_eventos_enviados': {'tarea': 'purgar_eventos_enviados', 'intervalo': 86400},
+    'purgar_tareas': {'tarea': 'purgar_tareas', 'intervalo': 86400},
+}
+
+# Correo saliente. Por defecto un servidor SMTP local de pruebas,
+# por ejemplo: python -m aiosmtpd -n -l localhost:1025
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '1025'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'false').lower() == 'true'
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-responder@reporte-sna.local')
+
 #Manejo de archivos
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file